@@ -4,17 +4,44 @@ import logging
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from dotenv import load_dotenv
+
+# Einmal beim Start der App statt beim Import einzelner Module; muss vor den Controller-Imports stehen.
+load_dotenv()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from controllers.user_controller import user_router
 from controllers.auth_controller import auth_router
-from controllers.chess_lobby_controller import lobby_router
-from controllers.chess_game_controller import game_router
+from controllers.chess_lobby_controller import lobby_router, lobby_service
+from controllers.chess_game_controller import game_router, game_service
+from controllers.health_controller import health_router
+from database import mongodb, indexes
+from fastapi.concurrency import run_in_threadpool
 from websocket_router import ws_router
 from chess_exception import ChessException
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mongodb.connect()
+    if indexes.MONGO_CREATE_INDEXES:
+        try:
+            await run_in_threadpool(indexes.ensure_indexes)
+        except Exception as e:
+            logging.error(f"Indexe konnten beim Start nicht angelegt werden: {str(e)}")
+    await game_service.game_store.start()
+    await game_service.backplane.start()
+    await lobby_service.backplane.start()
+    yield
+    await lobby_service.directory.close()
+    await lobby_service.backplane.stop()
+    await game_service.backplane.stop()
+    await game_service.game_store.stop()
+    mongodb.close()
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -40,6 +67,7 @@ app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(lobby_router, prefix="/lobby", tags=["Lobby"])
 app.include_router(game_router, prefix="/game", tags=["Game"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
 
 @app.exception_handler(ChessException)
 async def chess_exception_handler(request: Request, exc: ChessException):
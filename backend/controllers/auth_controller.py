@@ -8,8 +8,8 @@ auth_service = AuthService()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @auth_router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Username oder Passwort falsch")
     
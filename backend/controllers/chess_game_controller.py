@@ -14,10 +14,11 @@ async def websocket_game(websocket: WebSocket, game_id: str):
     await game_service.connect(websocket, game_id)
     
     try:
-        game = game_service.get_game_state(game_id)
+        game = await game_service.load_game(game_id)
         
+        # Snapshot nur für den neuen Client, alle weiteren Änderungen kommen als game_delta.
         if game:
-            await game_service.broadcast(game_id, {"type": "game_state", "data": game.model_dump()})
+            await game_service.send_game_state(websocket, game)
 
         while True:
             print("Warten auf GameWebSocket-Nachricht...")
@@ -25,42 +26,64 @@ async def websocket_game(websocket: WebSocket, game_id: str):
             
             action = data.get("action")
 
-            if action == "move":
+            if action == "sync":
+                # Der Client hat eine Lücke in den Sequenznummern bemerkt und braucht den vollständigen Stand.
+                await game_service.send_game_state(websocket, await game_service.load_game(game_id))
+
+            elif action == "move":
                 game_id_from_message = data.get("game_id")
                 start_pos = data.get("start_pos")
                 end_pos = data.get("end_pos")
                 user_id = data.get("user_id")
 
                 if game_id_from_message != game_id:
-                    await websocket.send_json({"type": "error", "message": "Ungültige game_id!"})
+                    # flush: die Verbindung wird gleich getrennt, die Meldung soll vorher noch raus.
+                    await game_service.send_error(websocket, game_id, "Ungültige game_id!", flush=True)
                     return
 
                 try:
-                    game = await game_service.move_figure(tuple(start_pos), tuple(end_pos), game_id, user_id)
-                                        
-                    await game_service.broadcast(game_id, {"type": "game_state", "data": game.model_dump()})
+                    # move_figure verschickt das Delta des Zugs bereits an alle Verbindungen.
+                    await game_service.move_figure(tuple(start_pos), tuple(end_pos), game_id, user_id)
 
                 except ValueError as e:
-                    error_message = str(e)
-                    await websocket.send_json({"type": "error", "message": error_message})
+                    await game_service.send_error(websocket, game_id, str(e))
                     
     except WebSocketDisconnect:
-        game_service.disconnect(websocket, game_id)
         print(f"GameWebSocket-Verbindung geschlossen für game_id={game_id}")
     except Exception as e:
         error_message = f"Fehler: {str(e)}"
         print(f"Unbehandelter Fehler im GameWebSocket: {error_message}")
-        await websocket.send_json({"type": "error", "message": error_message})
+        await game_service.send_error(websocket, game_id, error_message, flush=True)
+    finally:
+        # Auch bei return oder Fehler, sonst bliebe ein Writer-Task für einen toten Client zurück.
+        game_service.disconnect(websocket, game_id)
 
 @game_router.post("/start_game/{game_id}/{user_id}", response_model=ChessGame)
 async def start_game(game_id: str, user_id: str):
     
     try:
         print(f"Spielstart angefordert für game_id={game_id}, user_id={user_id}")
-        return await game_service.start_game(game_id, user_id)
+        game = await game_service.start_game(game_id, user_id)
+        # Das pydantic-ChessGame entsteht erst hier für die Antwort.
+        return game.to_chess_game()
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@game_router.get("/legal_moves/{game_id}")
+async def legal_moves(game_id: str):
+    try:
+        return await game_service.get_legal_moves(game_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@game_router.get("/legal_moves_cache/stats")
+async def legal_moves_cache_stats():
+    return game_service.legal_move_cache.stats()._asdict()
+
+@game_router.get("/connections/stats")
+async def game_connection_stats():
+    return game_service.game_connections.stats()._asdict()
+
 # fallback route for debbuging 
 @game_router.post("/move/{game_id}/{user_id}")
 async def move(game_id: str, user_id: str, move_data: dict):
@@ -71,7 +94,8 @@ async def move(game_id: str, user_id: str, move_data: dict):
         if not start_pos or not end_pos:
             raise HTTPException(status_code=400, detail="Ungültige Eingabe! Start- und Endposition müssen angegeben werden.")
 
-        return  await game_service.move_figure(tuple(start_pos), tuple(end_pos), game_id, user_id)
+        game = await game_service.move_figure(tuple(start_pos), tuple(end_pos), game_id, user_id)
+        return game.to_chess_game() if game else None
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
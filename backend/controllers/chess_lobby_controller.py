@@ -1,7 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.websockets import WebSocket, WebSocketDisconnect
-from services.chess_lobby_service import ChessLobbyService
-from models.user import UserLobby
+from services.chess_lobby_service import ChessLobbyService, LOBBY_LIST_PAGE_SIZE, LOBBY_LIST_MAX_PAGE_SIZE
+from models.user import PlayerColor, UserLobby
 from models.lobby import Lobby
 
 lobby_router = APIRouter()
@@ -17,22 +17,68 @@ async def websocket_lobby(websocket: WebSocket, game_id: str):
             if data.get("action") == "refresh":
                 await lobby_service.broadcast(game_id, {"message": "refresh_lobby"})
     except WebSocketDisconnect:
+        pass
+    finally:
         lobby_service.disconnect(websocket, game_id)
 
+@lobby_router.websocket("/directory/ws")
+async def websocket_lobby_directory(websocket: WebSocket):
+    await websocket.accept()
+    await lobby_service.connect_directory(websocket)
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if data.get("action") == "sync":
+                await lobby_service.connect_directory(websocket)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        lobby_service.disconnect_directory(websocket)
+
+@lobby_router.get("/directory/stats")
+async def lobby_directory_stats():
+    return lobby_service.directory.stats()._asdict()
+
 @lobby_router.post("/create", response_model=Lobby)
 async def create_lobby(user: UserLobby):
     try:
-        return lobby_service.create_lobby(user)
+        return await lobby_service.create_lobby(user)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 @lobby_router.get("/list")
-async def list_lobbies():
+async def list_lobbies(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(LOBBY_LIST_PAGE_SIZE, ge=1, le=LOBBY_LIST_MAX_PAGE_SIZE),
+    open_only: bool = Query(False, alias="open"),
+    color: PlayerColor | None = None,
+):
     try:
-        return lobby_service.list_lobbies()
+        page = await lobby_service.list_lobbies_page(cursor, limit, open_only, color.value if color else None)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    # no-cache: der Browser fragt jedes Mal mit If-None-Match nach, bekommt aber ohne Änderung nur 304.
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+@lobby_router.get("/list/stats")
+async def lobby_listing_stats():
+    return lobby_service.listing_cache.stats()._asdict()
     
+@lobby_router.get("/connections/stats")
+async def lobby_connection_stats():
+    return lobby_service.lobby_connections.stats()._asdict()
+
 @lobby_router.post("/join/{game_id}", response_model=Lobby)
 async def join_lobby(game_id: str, user: UserLobby):
     try:
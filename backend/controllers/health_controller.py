@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from database import mongodb, indexes
+
+health_router = APIRouter()
+
+@health_router.get("/")
+async def health():
+    try:
+        latency_ms = await run_in_threadpool(mongodb.ping)
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": f"Datenbank nicht erreichbar: {str(e)}"},
+        )
+
+    return {"status": "ok", "database_latency_ms": round(latency_ms, 2)}
+
+@health_router.get("/db/pool")
+async def db_pool_stats():
+    return mongodb.pool_stats()
+
+@health_router.get("/db/indexes")
+async def db_index_usage():
+    try:
+        return await run_in_threadpool(indexes.index_usage)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"detail": f"Indexstatistik nicht verfügbar: {str(e)}"})
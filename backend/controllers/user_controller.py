@@ -8,8 +8,8 @@ user_service = UserService()
 auth_service = AuthService()
 
 @user_router.post("/register", response_model=UserResponse)
-def register(user: UserCreate):
-    new_user = user_service.create_user(user)
+async def register(user: UserCreate):
+    new_user = await user_service.create_user(user)
     if new_user is None:
         raise HTTPException(status_code=400, detail="Username existiert bereits")
     return new_user
@@ -21,11 +21,11 @@ def get_current_user_token(authorization: str = Header(None)) -> str | None:
     return None
 
 @user_router.get("/me", response_model=UserResponse)
-def get_current_user(username: str = Depends(get_current_user_token)):    
+async def get_current_user(username: str = Depends(get_current_user_token)):    
     if not username:
         raise HTTPException(status_code=401, detail="Nicht authentifiziert")
 
-    user = user_service.get_user_by_username(username)
+    user = await user_service.get_user_by_username(username)
     
     if not user:
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
@@ -37,15 +37,18 @@ async def update_user(user_id: str, request: Request):
     data = await request.json()
     username = data.get("username")
     password = data.get("password")
-    hashed_password = AuthService.hash_password(password) if password else None
-    updated_user = user_service.update_user(user_id, username=username, password=hashed_password)
+    # Gehasht wird nur im UserService, im Threadpool.
+    try:
+        updated_user = await user_service.update_user(user_id, username=username, password=password)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if not updated_user:
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
     return updated_user
 
 @user_router.delete("/delete/{user_id}")
-def delete_user(user_id: str):
-    if not user_service.delete_user(user_id):
+async def delete_user(user_id: str):
+    if not await user_service.delete_user(user_id):
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
     return {"message": "Benutzer erfolgreich gelöscht"}
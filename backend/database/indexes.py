@@ -0,0 +1,62 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database.mongodb import get_database
+from typing import Dict, List
+import os
+
+MONGO_CREATE_INDEXES = os.getenv("MONGO_CREATE_INDEXES", "true").lower() == "true"
+
+# Login und Registrierung suchen über den Namen; unique verhindert doppelte Namen auch bei gleichzeitiger Registrierung.
+USER_INDEXES = [
+    IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+]
+
+GAME_INDEXES = [
+    IndexModel([("player_white.user_id", ASCENDING), ("time_stamp_start", DESCENDING)], name="player_white_started"),
+    IndexModel([("player_black.user_id", ASCENDING), ("time_stamp_start", DESCENDING)], name="player_black_started"),
+    IndexModel([("status", ASCENDING), ("time_stamp_start", DESCENDING)], name="status_started"),
+    IndexModel([("time_stamp_start", DESCENDING)], name="started"),
+]
+
+# Für die MongoLobbyRegistry: "ist der Spieler schon in einer Lobby?" beim Erstellen und die Lobbyliste
+# (alle bzw. mit freiem Platz) in der Reihenfolge der Erstellung.
+# lobby_host macht das Erstellen atomar: höchstens eine Lobby je Host, auch über mehrere Worker.
+LOBBY_INDEXES = [
+    IndexModel([("players.user_id", ASCENDING)], name="lobby_player"),
+    IndexModel([("created", ASCENDING)], name="lobby_created"),
+    IndexModel([("open_slots", ASCENDING), ("created", ASCENDING)], name="lobby_open_created"),
+    IndexModel([("host_id", ASCENDING)], name="lobby_host", unique=True,
+               partialFilterExpression={"host_id": {"$exists": True}}),
+]
+
+COLLECTION_INDEXES = {
+    "users": USER_INDEXES,
+    "games": GAME_INDEXES,
+    "lobbies": LOBBY_INDEXES,
+}
+
+
+def ensure_indexes(db=None) -> Dict[str, List[str]]:
+    """Legt fehlende Indexe an; vorhandene mit gleicher Definition lässt Mongo unverändert."""
+    db = db if db is not None else get_database()
+    created = {}
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        try:
+            created[collection_name] = db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            # z. B. doppelte Benutzernamen aus der Zeit vor dem Unique-Index; der Start läuft trotzdem weiter.
+            print(f"[INDEXES] Indexe für {collection_name} konnten nicht angelegt werden: {e}")
+            created[collection_name] = []
+    return created
+
+
+def index_usage(db=None) -> Dict[str, Dict[str, dict]]:
+    """Zugriffe je Index seit dem letzten Neustart des Mongo-Servers ($indexStats)."""
+    db = db if db is not None else get_database()
+    usage = {}
+    for collection_name in COLLECTION_INDEXES:
+        usage[collection_name] = {
+            stats["name"]: {"ops": stats["accesses"]["ops"], "since": stats["accesses"]["since"]}
+            for stats in db[collection_name].aggregate([{"$indexStats": {}}])
+        }
+    return usage
@@ -1,11 +1,210 @@
 from pymongo import MongoClient
-from dotenv import load_dotenv
+from pymongo.monitoring import ConnectionPoolListener
+from typing import NamedTuple, Optional
 import os
+import threading
+import time
 
-load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
-db = client["chess_game"]
-users_collection = db["users"]
-games_collection = db["games"]
\ No newline at end of file
+class MongoSettings(NamedTuple):
+    uri: Optional[str]
+    db_name: str
+    max_pool_size: int
+    min_pool_size: int
+    max_idle_time_ms: Optional[int]
+    connect_timeout_ms: int
+    server_selection_timeout_ms: int
+    socket_timeout_ms: Optional[int]
+    wait_queue_timeout_ms: Optional[int]
+    write_concern_w: int | str
+    write_concern_journal: Optional[bool]
+    read_concern: Optional[str]
+    read_preference: str
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def load_settings() -> MongoSettings:
+    """Liest die Verbindungseinstellungen erst beim Verbindungsaufbau, nicht beim Import."""
+    write_concern_w = os.getenv("MONGO_WRITE_CONCERN_W", "1")
+    journal = os.getenv("MONGO_WRITE_CONCERN_J")
+
+    return MongoSettings(
+        uri=os.getenv("MONGO_URI"),
+        db_name=os.getenv("MONGO_DB_NAME", "chess_game"),
+        max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        max_idle_time_ms=_optional_int("MONGO_MAX_IDLE_TIME_MS"),
+        connect_timeout_ms=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+        server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        socket_timeout_ms=_optional_int("MONGO_SOCKET_TIMEOUT_MS"),
+        wait_queue_timeout_ms=_optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        write_concern_w=int(write_concern_w) if write_concern_w.isdigit() else write_concern_w,
+        write_concern_journal=journal.lower() == "true" if journal else None,
+        read_concern=os.getenv("MONGO_READ_CONCERN") or None,
+        read_preference=os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    )
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Zählt die Verbindungen des Pools mit, pymongo selbst bietet dafür keine öffentliche API."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self.lock:
+            self.created += 1
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.closed += 1
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self.lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failures": self.checkout_failures,
+            }
+
+
+client: Optional[MongoClient] = None
+settings: Optional[MongoSettings] = None
+pool_listener: Optional[PoolStatsListener] = None
+_client_lock = threading.Lock()
+
+
+def create_client(mongo_settings: MongoSettings, listener: PoolStatsListener) -> MongoClient:
+    write_concern = {"w": mongo_settings.write_concern_w}
+    if mongo_settings.write_concern_journal is not None:
+        write_concern["j"] = mongo_settings.write_concern_journal
+
+    options = {
+        "maxPoolSize": mongo_settings.max_pool_size,
+        "minPoolSize": mongo_settings.min_pool_size,
+        "maxIdleTimeMS": mongo_settings.max_idle_time_ms,
+        "connectTimeoutMS": mongo_settings.connect_timeout_ms,
+        "serverSelectionTimeoutMS": mongo_settings.server_selection_timeout_ms,
+        "socketTimeoutMS": mongo_settings.socket_timeout_ms,
+        "waitQueueTimeoutMS": mongo_settings.wait_queue_timeout_ms,
+        "readPreference": mongo_settings.read_preference,
+        "event_listeners": [listener],
+        **write_concern,
+    }
+    if mongo_settings.read_concern:
+        options["readConcernLevel"] = mongo_settings.read_concern
+
+    return MongoClient(mongo_settings.uri, **{key: value for key, value in options.items() if value is not None})
+
+
+def get_client() -> MongoClient:
+    """Baut den Client beim ersten Zugriff; aus dem Threadpool heraus ist das mehrfach gleichzeitig möglich."""
+    global client, settings, pool_listener
+    if client is not None:
+        return client
+
+    with _client_lock:
+        if client is None:
+            settings = load_settings()
+            pool_listener = PoolStatsListener()
+            client = create_client(settings, pool_listener)
+    return client
+
+
+def get_database():
+    get_client()
+    return client[settings.db_name]
+
+
+def connect() -> MongoClient:
+    """Wird im App-Lifespan aufgerufen. pymongo verbindet im Hintergrund, der Start blockiert also nicht."""
+    return get_client()
+
+
+def close():
+    global client, settings, pool_listener
+    with _client_lock:
+        if client is not None:
+            client.close()
+        client, settings, pool_listener = None, None, None
+
+
+def ping() -> float:
+    """Prüft die Erreichbarkeit und gibt die Antwortzeit in Millisekunden zurück."""
+    start = time.perf_counter()
+    get_client().admin.command("ping")
+    return (time.perf_counter() - start) * 1000
+
+
+def pool_stats() -> dict:
+    if client is None:
+        return {"connected": False}
+
+    return {
+        "connected": True,
+        "max_pool_size": settings.max_pool_size,
+        "min_pool_size": settings.min_pool_size,
+        "write_concern": client.write_concern.document,
+        "read_concern": client.read_concern.level,
+        "read_preference": client.read_preference.mongos_mode,
+        **pool_listener.snapshot(),
+    }
+
+
+class LazyCollection:
+    """Platzhalter für eine Collection: der Client entsteht erst beim ersten echten Zugriff,
+    der Import eines Repositorys öffnet also keine Verbindung."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_database()[self.name], attr)
+
+
+users_collection = LazyCollection("users")
+games_collection = LazyCollection("games")
+lobbies_collection = LazyCollection("lobbies")
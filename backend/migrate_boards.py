@@ -0,0 +1,112 @@
+import sys
+import os
+import argparse
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bson import BSON
+from dotenv import load_dotenv
+from typing import List, NamedTuple, Optional
+from models.chess_game import ChessGame, GameStatus
+from models.piece_board import PieceBoard
+from models.user import UserInGame, PlayerColor
+from repositories.chess_game_repo import ChessGameRepository
+from services.chess_board_service import ChessBoardService
+
+
+class EncodingMeasurement(NamedTuple):
+    squares_bytes: int
+    compact_bytes: int
+    squares_decode_seconds: float
+    compact_decode_seconds: float
+    squares_board_seconds: float
+    compact_board_seconds: float
+    compact_to_squares_seconds: float
+
+    @property
+    def size_reduction(self) -> float:
+        return 1 - self.compact_bytes / self.squares_bytes
+
+    @property
+    def decode_speedup(self) -> float:
+        return self.squares_decode_seconds / self.compact_decode_seconds
+
+    @property
+    def board_speedup(self) -> float:
+        return self.squares_board_seconds / self.compact_board_seconds
+
+
+def sample_game_document() -> dict:
+    """Ein gespeichertes Spiel im alten squares-Format, wie es vor der Umstellung in Mongo lag."""
+    game = ChessGame(
+        game_id="sample",
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    )
+    game_dict = game.model_dump(mode="json")
+    game_dict["_id"] = game_dict.pop("game_id")
+    for row in game_dict["board"]["squares"]:
+        for figure in row:
+            if figure:
+                figure["type"] = figure["name"].capitalize()
+    return game_dict
+
+
+def measure_encoding(game_document: dict, rounds: int = 2000) -> EncodingMeasurement:
+    compact_document = dict(game_document, board=ChessGameRepository.encode_board(game_document["board"]))
+    squares_bson = BSON.encode(game_document)
+    compact_bson = BSON.encode(compact_document)
+
+    def seconds_per_round(decode) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            decode()
+        return (time.perf_counter() - start) / rounds
+
+    return EncodingMeasurement(
+        squares_bytes=len(squares_bson),
+        compact_bytes=len(compact_bson),
+        squares_decode_seconds=seconds_per_round(lambda: BSON(squares_bson).decode()),
+        compact_decode_seconds=seconds_per_round(lambda: BSON(compact_bson).decode()),
+        # Bis zum PieceBoard, wie get_legal_moves ein nicht geladenes Spiel liest.
+        squares_board_seconds=seconds_per_round(
+            lambda: PieceBoard.from_squares(BSON(squares_bson).decode()["board"]["squares"])),
+        compact_board_seconds=seconds_per_round(lambda: PieceBoard.from_compact(BSON(compact_bson).decode()["board"])),
+        # Rückwandlung ins squares-Format, wie sie find_game_document standardmäßig macht.
+        compact_to_squares_seconds=seconds_per_round(
+            lambda: ChessGameRepository.decode_board(BSON(compact_bson).decode())),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gespeicherte Spiele auf das kompakte Brettformat (FEN + ID-Map) umstellen.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Dokumente pro bulk_write")
+    parser.add_argument("--measure", action="store_true", help="Nur Größe und Dekodierzeit beider Formate messen, ohne Datenbank")
+    parser.add_argument("--rounds", type=int, default=2000, help="Wiederholungen für --measure")
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        result = measure_encoding(sample_game_document(), args.rounds)
+        print(f"squares: {result.squares_bytes} bytes, BSON {result.squares_decode_seconds * 1e6:.1f}µs, "
+              f"bis PieceBoard {result.squares_board_seconds * 1e6:.1f}µs")
+        print(f"fen:     {result.compact_bytes} bytes, BSON {result.compact_decode_seconds * 1e6:.1f}µs, "
+              f"bis PieceBoard {result.compact_board_seconds * 1e6:.1f}µs, "
+              f"zurück ins squares-Format {result.compact_to_squares_seconds * 1e6:.1f}µs")
+        print(f"Größe -{result.size_reduction:.0%}, BSON-Dekodierung {result.decode_speedup:.1f}x, "
+              f"bis PieceBoard {result.board_speedup:.1f}x schneller")
+        return 0
+
+    # Vorher muss überall der Code laufen, der beide Formate lesen kann.
+    load_dotenv()
+    migrated = ChessGameRepository().migrate_boards(args.batch_size)
+    print(f"{migrated} Spiel(e) auf das kompakte Brettformat umgestellt.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+from models.chess_board import ChessBoard
+from models.figure import Figure, FigureColor, Pawn, Rook, Knight, Bishop, Queen, King
+from typing import Iterator, List, NamedTuple, Optional
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+PIECE_KINDS = {name: kind for kind, name in enumerate(PIECE_NAMES)}
+FIGURE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+COLORS = (FigureColor.WHITE, FigureColor.BLACK)
+FEN_SYMBOLS = "PNBRQKpnbrqk"
+FILES = "abcdefgh"
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_SYMBOLS = (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE))
+
+FULL_BOARD = (1 << 64) - 1
+NO_ATTACK_MAPS = (None, None)
+
+# Rochaderechte, die erhalten bleiben, wenn ein Zug ein Feld verlässt oder betritt.
+CASTLING_RIGHTS_KEPT = [0b1111] * 64
+CASTLING_RIGHTS_KEPT[0] &= ~BLACK_QUEENSIDE
+CASTLING_RIGHTS_KEPT[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_RIGHTS_KEPT[7] &= ~BLACK_KINGSIDE
+CASTLING_RIGHTS_KEPT[56] &= ~WHITE_QUEENSIDE
+CASTLING_RIGHTS_KEPT[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_RIGHTS_KEPT[63] &= ~WHITE_KINGSIDE
+
+
+def square_index(position: tuple[int, int]) -> int:
+    return position[0] * 8 + position[1]
+
+
+def square_position(square: int) -> tuple[int, int]:
+    return square >> 3, square & 7
+
+
+def piece_code(color: int, kind: int) -> int:
+    return color * 6 + kind
+
+
+def color_index(color: str) -> int:
+    return WHITE if color == FigureColor.WHITE else BLACK
+
+
+def square_name(square: int) -> str:
+    return f"{FILES[square & 7]}{8 - (square >> 3)}"
+
+
+def parse_square(name: str) -> int:
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+class PositionUndo(NamedTuple):
+    moving: int
+    captured: Optional[int]
+    captured_square: Optional[int]
+    castling_rights: int
+    en_passant: Optional[int]
+    attack_maps: tuple
+    attacks_from: Optional[List[int]]
+    stale_squares: int
+
+
+class BitboardPosition:
+    """Kompakte Stellung: zwölf 64-Bit-Bitboards (Index = Farbe * 6 + Figurentyp),
+    Zugrecht, Rochaderechte und En-passant-Feld. Feld-Index = Reihe * 8 + Spalte,
+    Reihe 0 ist wie auf dem ChessBoard die schwarze Grundreihe.
+    attacks_from hält je Feld die von der Figur dort angegriffenen Felder, sobald sie einmal berechnet
+    wurden; make_move merkt sich nur die Felder, die sich geändert haben (stale_squares), nachgezogen
+    wird erst bei Bedarf (MoveValidationService.update_attacks_from). attack_maps sind die daraus
+    gebildeten Angriffe pro Farbe. unmake_move stellt alles aus dem Undo-Record wieder her."""
+
+    __slots__ = ("bitboards", "side_to_move", "castling_rights", "en_passant", "attack_maps",
+                 "attacks_from", "stale_squares")
+
+    def __init__(self, bitboards: Optional[List[int]] = None, side_to_move: int = WHITE,
+                 castling_rights: int = 0, en_passant: Optional[int] = None):
+        self.bitboards = bitboards if bitboards is not None else [0] * 12
+        self.side_to_move = side_to_move
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.attack_maps = NO_ATTACK_MAPS
+        self.attacks_from: Optional[List[int]] = None
+        self.stale_squares = 0
+
+    @classmethod
+    def from_chess_board(cls, board: ChessBoard, current_turn: str = FigureColor.WHITE, last_move: Optional[dict] = None) -> "BitboardPosition":
+        bitboards = [0] * 12
+        squares = board.squares
+
+        for row in range(8):
+            for col, figure in enumerate(squares[row]):
+                if figure:
+                    code = piece_code(color_index(figure.color), PIECE_KINDS[figure.name])
+                    bitboards[code] |= 1 << (row * 8 + col)
+
+        return cls(
+            bitboards=bitboards,
+            side_to_move=color_index(current_turn),
+            castling_rights=cls.castling_rights_from_board(squares),
+            en_passant=cls.en_passant_from_last_move(last_move),
+        )
+
+    @classmethod
+    def from_game(cls, game, board: Optional[ChessBoard] = None) -> "BitboardPosition":
+        return cls.from_chess_board(board or game.board, game.current_turn, getattr(game, "last_move", None))
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "BitboardPosition":
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Ungültiger FEN-String: {fen}")
+
+        placement, side, castling, en_passant = fields[:4]
+        bitboards = [0] * 12
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Ungültiger FEN-String: {fen}")
+
+        for row, row_placement in enumerate(rows):
+            col = 0
+            for symbol in row_placement:
+                if symbol.isdigit():
+                    col += int(symbol)
+                elif symbol in FEN_SYMBOLS and col < 8:
+                    bitboards[FEN_SYMBOLS.index(symbol)] |= 1 << (row * 8 + col)
+                    col += 1
+                else:
+                    raise ValueError(f"Ungültiger FEN-String: {fen}")
+            if col != 8:
+                raise ValueError(f"Ungültiger FEN-String: {fen}")
+
+        castling_rights = 0
+        for symbol, right in CASTLING_SYMBOLS:
+            if symbol in castling:
+                castling_rights |= right
+
+        return cls(
+            bitboards=bitboards,
+            side_to_move=WHITE if side == "w" else BLACK,
+            castling_rights=castling_rights,
+            en_passant=None if en_passant == "-" else parse_square(en_passant),
+        )
+
+    def to_fen(self) -> str:
+        rows = []
+        for row in range(8):
+            row_placement, empty = "", 0
+            for col in range(8):
+                code = self.piece_at(row * 8 + col)
+                if code is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row_placement += str(empty)
+                    empty = 0
+                row_placement += FEN_SYMBOLS[code]
+            rows.append(row_placement + (str(empty) if empty else ""))
+
+        castling = "".join(symbol for symbol, right in CASTLING_SYMBOLS if self.castling_rights & right) or "-"
+        en_passant = square_name(self.en_passant) if self.en_passant is not None else "-"
+        return f"{'/'.join(rows)} {'w' if self.side_to_move == WHITE else 'b'} {castling} {en_passant}"
+
+    @staticmethod
+    def castling_rights_from_board(squares) -> int:
+        rights = 0
+        for row, color, kingside, queenside in ((7, FigureColor.WHITE, WHITE_KINGSIDE, WHITE_QUEENSIDE),
+                                                (0, FigureColor.BLACK, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            king = squares[row][4]
+            if not isinstance(king, King) or king.color != color or king.has_moved:
+                continue
+            for rook_col, right in ((7, kingside), (0, queenside)):
+                rook = squares[row][rook_col]
+                if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+                    rights |= right
+        return rights
+
+    @staticmethod
+    def en_passant_from_last_move(last_move: Optional[dict]) -> Optional[int]:
+        if not last_move or not last_move.get("two_square_pawn_move"):
+            return None
+
+        start_row, col = last_move["start"]
+        end_row = last_move["end"][0]
+        return square_index(((start_row + end_row) // 2, col))
+
+    def to_chess_board(self) -> ChessBoard:
+        board = ChessBoard.create_empty_board()
+
+        for code, bitboard in enumerate(self.bitboards):
+            color, kind = divmod(code, 6)
+            for square in iter_squares(bitboard):
+                row, col = square_position(square)
+                board.squares[row][col] = self._build_figure(color, kind, (row, col))
+
+        return board
+
+    def _build_figure(self, color: int, kind: int, position: tuple[int, int]) -> Figure:
+        figure_class = FIGURE_CLASSES[kind]
+        if kind == KING:
+            rights = (WHITE_KINGSIDE | WHITE_QUEENSIDE) if color == WHITE else (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+            return figure_class(color=COLORS[color], position=position, has_moved=not self.castling_rights & rights)
+        if kind == ROOK:
+            return figure_class(color=COLORS[color], position=position, has_moved=not self._rook_keeps_castling_right(color, position))
+        return figure_class(color=COLORS[color], position=position)
+
+    def _rook_keeps_castling_right(self, color: int, position: tuple[int, int]) -> bool:
+        home_row = 7 if color == WHITE else 0
+        if position == (home_row, 7):
+            return bool(self.castling_rights & (WHITE_KINGSIDE if color == WHITE else BLACK_KINGSIDE))
+        if position == (home_row, 0):
+            return bool(self.castling_rights & (WHITE_QUEENSIDE if color == WHITE else BLACK_QUEENSIDE))
+        return False
+
+    def occupancy(self, color: int) -> int:
+        base = color * 6
+        bitboards = self.bitboards
+        return (bitboards[base] | bitboards[base + 1] | bitboards[base + 2] |
+                bitboards[base + 3] | bitboards[base + 4] | bitboards[base + 5])
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy(WHITE) | self.occupancy(BLACK)
+
+    def piece_at(self, square: int) -> Optional[int]:
+        mask = 1 << square
+        for code, bitboard in enumerate(self.bitboards):
+            if bitboard & mask:
+                return code
+        return None
+
+    def king_square(self, color: int) -> Optional[int]:
+        king = self.bitboards[piece_code(color, KING)]
+        return king.bit_length() - 1 if king else None
+
+    def make_move(self, move: tuple[int, int, Optional[int]]) -> "PositionUndo":
+        from_square, to_square, promotion = move
+        bitboards = self.bitboards
+        us = self.side_to_move
+        them = 1 - us
+        from_mask = 1 << from_square
+        to_mask = 1 << to_square
+
+        moving = next(code for code in range(us * 6, us * 6 + 6) if bitboards[code] & from_mask)
+        kind = moving - us * 6
+        undo = PositionUndo(moving, None, None, self.castling_rights, self.en_passant, self.attack_maps,
+                            self.attacks_from, self.stale_squares)
+        changed = from_mask | to_mask
+
+        for code in range(them * 6, them * 6 + 6):
+            if bitboards[code] & to_mask:
+                bitboards[code] ^= to_mask
+                undo = undo._replace(captured=code, captured_square=to_square)
+                break
+        else:
+            if kind == PAWN and to_square == self.en_passant:
+                captured_square = (from_square & ~7) | (to_square & 7)
+                bitboards[them * 6 + PAWN] ^= 1 << captured_square
+                changed |= 1 << captured_square
+                undo = undo._replace(captured=them * 6 + PAWN, captured_square=captured_square)
+
+        if promotion is None:
+            bitboards[moving] ^= from_mask | to_mask
+        else:
+            bitboards[moving] ^= from_mask
+            bitboards[us * 6 + promotion] |= to_mask
+
+        if kind == KING and abs(to_square - from_square) == 2:
+            rook_mask = self.castling_rook_mask(from_square, to_square)
+            bitboards[us * 6 + ROOK] ^= rook_mask
+            changed |= rook_mask
+
+        self.castling_rights &= CASTLING_RIGHTS_KEPT[from_square] & CASTLING_RIGHTS_KEPT[to_square]
+        self.en_passant = (from_square + to_square) >> 1 if kind == PAWN and abs(to_square - from_square) == 16 else None
+        self.side_to_move = them
+        self.attack_maps = NO_ATTACK_MAPS
+        if self.attacks_from is not None:
+            self.stale_squares |= changed
+        return undo
+
+    def unmake_move(self, move: tuple[int, int, Optional[int]], undo: "PositionUndo"):
+        from_square, to_square, promotion = move
+        bitboards = self.bitboards
+        us = 1 - self.side_to_move
+        moving = undo.moving
+
+        if promotion is None:
+            bitboards[moving] ^= (1 << from_square) | (1 << to_square)
+        else:
+            bitboards[us * 6 + promotion] ^= 1 << to_square
+            bitboards[moving] ^= 1 << from_square
+
+        if undo.captured is not None:
+            bitboards[undo.captured] |= 1 << undo.captured_square
+
+        if moving - us * 6 == KING and abs(to_square - from_square) == 2:
+            bitboards[us * 6 + ROOK] ^= self.castling_rook_mask(from_square, to_square)
+
+        self.castling_rights = undo.castling_rights
+        self.en_passant = undo.en_passant
+        self.side_to_move = us
+        self.attack_maps = undo.attack_maps
+        self.attacks_from = undo.attacks_from
+        self.stale_squares = undo.stale_squares
+
+    def replace_piece(self, square: int, code: int):
+        """Ersetzt die Figur auf dem Feld, z. B. bei der Bauernumwandlung."""
+        mask = 1 << square
+        previous = self.piece_at(square)
+        if previous is not None:
+            self.bitboards[previous] ^= mask
+        self.bitboards[code] |= mask
+        self.attack_maps = NO_ATTACK_MAPS
+        if self.attacks_from is not None:
+            self.stale_squares |= mask
+
+    @staticmethod
+    def castling_rook_mask(from_square: int, to_square: int) -> int:
+        if to_square > from_square:
+            return (1 << (to_square + 1)) | (1 << (to_square - 1))
+        return (1 << (to_square - 2)) | (1 << (to_square + 1))
+
+    def copy(self) -> "BitboardPosition":
+        position = BitboardPosition(self.bitboards[:], self.side_to_move, self.castling_rights, self.en_passant)
+        # attacks_from wird beim Nachziehen kopiert, nie verändert, und kann daher geteilt werden.
+        position.attack_maps = self.attack_maps
+        position.attacks_from = self.attacks_from
+        position.stale_squares = self.stale_squares
+        return position
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BitboardPosition):
+            return NotImplemented
+        return (self.bitboards == other.bitboards and self.side_to_move == other.side_to_move and
+                self.castling_rights == other.castling_rights and self.en_passant == other.en_passant)
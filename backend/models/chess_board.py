@@ -1,11 +1,82 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, NamedTuple
 from models.figure import Figure
 
+class MoveUndo(NamedTuple):
+    start: tuple[int, int]
+    end: tuple[int, int]
+    figure: Figure
+    figure_position: tuple[int, int]
+    figure_has_moved: Optional[bool]
+    captured: Optional[Figure]
+    captured_position: Optional[tuple[int, int]]
+    rook_start: Optional[tuple[int, int]] = None
+    rook_end: Optional[tuple[int, int]] = None
+    rook_has_moved: Optional[bool] = None
+
 class ChessBoard(BaseModel):
-    
+
     squares: List[List[Optional[Figure]]]
 
     @classmethod
     def create_empty_board(cls):
         return cls(squares=[[None for _ in range(8)] for _ in range(8)])
+
+    def make_move(self, start: tuple[int, int], end: tuple[int, int]) -> MoveUndo:
+        squares = self.squares
+        start_row, start_col = start
+        end_row, end_col = end
+        figure = squares[start_row][start_col]
+
+        captured_position = (end_row, end_col)
+        captured = squares[end_row][end_col]
+        if captured is None and figure.name == "pawn" and start_col != end_col:
+            captured_position = (start_row, end_col)
+            captured = squares[start_row][end_col]
+        squares[captured_position[0]][captured_position[1]] = None
+
+        figure_position = figure.position
+        squares[end_row][end_col] = figure
+        squares[start_row][start_col] = None
+        figure.position = (end_row, end_col)
+
+        figure_has_moved = getattr(figure, "has_moved", None)
+        if figure_has_moved is not None:
+            figure.has_moved = True
+
+        undo = MoveUndo(start, end, figure, figure_position, figure_has_moved, captured, captured_position if captured else None)
+
+        if figure.name == "king" and abs(start_col - end_col) == 2:
+            rook_col, rook_end_col = (7, end_col - 1) if end_col > start_col else (0, end_col + 1)
+            rook = squares[start_row][rook_col]
+            if rook is not None:
+                squares[start_row][rook_end_col] = rook
+                squares[start_row][rook_col] = None
+                rook.position = (start_row, rook_end_col)
+                undo = undo._replace(rook_start=(start_row, rook_col), rook_end=(start_row, rook_end_col),
+                                     rook_has_moved=getattr(rook, "has_moved", None))
+                if undo.rook_has_moved is not None:
+                    rook.has_moved = True
+
+        return undo
+
+    def unmake_move(self, undo: MoveUndo):
+        squares = self.squares
+
+        if undo.rook_start is not None:
+            rook = squares[undo.rook_end[0]][undo.rook_end[1]]
+            squares[undo.rook_start[0]][undo.rook_start[1]] = rook
+            squares[undo.rook_end[0]][undo.rook_end[1]] = None
+            rook.position = undo.rook_start
+            if undo.rook_has_moved is not None:
+                rook.has_moved = undo.rook_has_moved
+
+        figure = undo.figure
+        squares[undo.start[0]][undo.start[1]] = figure
+        squares[undo.end[0]][undo.end[1]] = None
+        figure.position = undo.figure_position
+        if undo.figure_has_moved is not None:
+            figure.has_moved = undo.figure_has_moved
+
+        if undo.captured is not None:
+            squares[undo.captured_position[0]][undo.captured_position[1]] = undo.captured
@@ -1,9 +1,9 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 from enum import Enum
 from models.chess_board import ChessBoard
 from models.user import UserInGame
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 class GameStatus(str, Enum):
     RUNNING = "running"
@@ -19,6 +19,11 @@ class ChessGame(BaseModel):
     board: ChessBoard
     status: GameStatus = GameStatus.RUNNING
     last_move: Optional[dict] = None
+    king_positions: Dict[str, tuple[int, int]] = Field(default_factory=dict)
+    position_hash: Optional[str] = None
+    repetition_counts: Dict[str, int] = Field(default_factory=dict)
+    # Sequenznummer des Spielstands für das game_delta-Protokoll; wird mitgespeichert, damit alle Worker sie teilen.
+    seq: int = 0
 
     @field_serializer("time_stamp_start")
     def serialize_timestamp(self, timestamp: datetime) -> str:
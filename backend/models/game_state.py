@@ -0,0 +1,127 @@
+import copy
+from datetime import datetime
+from models.bitboard_position import COLORS, square_position
+from models.chess_board import ChessBoard
+from models.chess_game import ChessGame, GameStatus
+from models.figure import Figure
+from models.piece_board import PieceBoard
+from models.user import UserInGame, PlayerColor
+from typing import Dict, Optional
+
+
+class GameState:
+    """Laufendes Spiel im GameStore: das Brett als PieceBoard (Figurencodes, IDs, has_moved) und die
+    daraus gebildete BitboardPosition, die execute_move und promote_pawn Zug für Zug mitführen,
+    samt den Angriffskarten beider Seiten (MoveValidationService.update_attack_maps).
+    Pydantic-Figuren gibt es hier nicht; ein ChessGame entsteht erst an der API-Grenze (to_chess_game)."""
+
+    __slots__ = ("game_id", "time_stamp_start", "player_white", "player_black", "current_turn", "status",
+                 "last_move", "king_positions", "position_hash", "repetition_counts", "seq", "pieces", "position")
+
+    def __init__(self, game_id: str, time_stamp_start, player_white: UserInGame, player_black: UserInGame,
+                 current_turn: str, pieces: PieceBoard, status: GameStatus = GameStatus.RUNNING,
+                 last_move: Optional[dict] = None, king_positions: Optional[Dict[str, tuple[int, int]]] = None,
+                 position_hash: Optional[str] = None, repetition_counts: Optional[Dict[str, int]] = None, seq: int = 0):
+        self.game_id = game_id
+        self.time_stamp_start = time_stamp_start
+        self.player_white = player_white
+        self.player_black = player_black
+        self.current_turn = PlayerColor(current_turn)
+        self.status = GameStatus(status)
+        self.last_move = last_move
+        self.position_hash = position_hash
+        self.repetition_counts = repetition_counts if repetition_counts is not None else {}
+        self.seq = seq
+        self.pieces = pieces
+        self.position = pieces.to_position(self.current_turn, last_move)
+        self.king_positions = king_positions or {
+            COLORS[color].value: square_position(square)
+            for color in (0, 1) if (square := self.position.king_square(color)) is not None
+        }
+
+    @classmethod
+    def from_document(cls, game_data: dict) -> "GameState":
+        """Baut das Spiel direkt aus dem Mongo-Dokument, egal ob das Brett kompakt oder im squares-Format gespeichert ist."""
+        board = game_data["board"]
+        pieces = PieceBoard.from_compact(board) if "fen" in board else PieceBoard.from_squares(board["squares"])
+        king_positions = {color: tuple(position) for color, position in (game_data.get("king_positions") or {}).items()}
+        return cls(
+            game_id=game_data["game_id"],
+            time_stamp_start=game_data["time_stamp_start"],
+            player_white=UserInGame.model_validate(game_data["player_white"]),
+            player_black=UserInGame.model_validate(game_data["player_black"]),
+            current_turn=game_data["current_turn"],
+            pieces=pieces,
+            status=game_data.get("status", GameStatus.RUNNING),
+            last_move=game_data.get("last_move"),
+            king_positions=king_positions,
+            position_hash=game_data.get("position_hash"),
+            repetition_counts=dict(game_data.get("repetition_counts") or {}),
+            seq=game_data.get("seq", 0),
+        )
+
+    @classmethod
+    def from_chess_game(cls, game: ChessGame) -> "GameState":
+        last_move = game.last_move
+        if last_move and isinstance(last_move.get("figure"), Figure):
+            last_move = {**last_move, "figure": last_move["figure"].model_dump(mode="json")}
+        return cls(
+            game_id=game.game_id,
+            time_stamp_start=game.time_stamp_start,
+            player_white=game.player_white.model_copy(deep=True),
+            player_black=game.player_black.model_copy(deep=True),
+            current_turn=game.current_turn,
+            pieces=PieceBoard.from_chess_board(game.board),
+            status=game.status,
+            last_move=copy.deepcopy(last_move),
+            king_positions=dict(game.king_positions),
+            position_hash=game.position_hash,
+            repetition_counts=dict(game.repetition_counts),
+            seq=game.seq,
+        )
+
+    def to_chess_game(self) -> ChessGame:
+        """Das pydantic-Modell für REST-Antworten und den game_state-Snapshot."""
+        return ChessGame(
+            game_id=self.game_id,
+            time_stamp_start=self.time_stamp_start,
+            player_white=self.player_white.model_copy(deep=True),
+            player_black=self.player_black.model_copy(deep=True),
+            current_turn=self.current_turn.value,
+            board=ChessBoard.model_construct(squares=self.pieces.to_squares()),
+            status=self.status,
+            last_move=copy.deepcopy(self.last_move),
+            king_positions=dict(self.king_positions),
+            position_hash=self.position_hash,
+            repetition_counts=dict(self.repetition_counts),
+            seq=self.seq,
+        )
+
+    def to_document(self, board: Optional[dict] = None) -> dict:
+        """Das Spiel im Speicherformat des ChessGameRepository, das Brett kompakt (oder das übergebene,
+        bereits kodierte Brett, z. B. die vorberechnete Startstellung)."""
+        time_stamp_start = self.time_stamp_start
+        return {
+            "game_id": self.game_id,
+            "time_stamp_start": time_stamp_start.isoformat() if isinstance(time_stamp_start, datetime) else time_stamp_start,
+            "player_white": self.player_white.model_dump(),
+            "player_black": self.player_black.model_dump(),
+            "current_turn": self.current_turn.value,
+            "board": board if board is not None else self.pieces.to_compact(),
+            "status": self.status.value,
+            "last_move": copy.deepcopy(self.last_move),
+            "king_positions": dict(self.king_positions),
+            "position_hash": self.position_hash,
+            "repetition_counts": dict(self.repetition_counts),
+            "seq": self.seq,
+        }
+
+    def delta_changes(self) -> dict:
+        # Dieselben Felder wie zuvor model_dump(mode="json", include=DELTA_FIELDS), in derselben Reihenfolge.
+        return {
+            "current_turn": self.current_turn.value,
+            "status": self.status.value,
+            "last_move": self.last_move,
+            "king_positions": {color: list(position) for color, position in self.king_positions.items()},
+            "position_hash": self.position_hash,
+        }
@@ -0,0 +1,224 @@
+from models.chess_board import ChessBoard
+from models.bitboard_position import (
+    BitboardPosition, WHITE, BLACK, PAWN, ROOK, KING, PIECE_NAMES, PIECE_KINDS, FIGURE_CLASSES, COLORS, FEN_SYMBOLS,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, piece_code, color_index
+)
+from models.figure import Figure
+from typing import List, Optional
+
+EMPTY = -1
+FEN_CODES = {symbol: code for code, symbol in enumerate(FEN_SYMBOLS)}
+
+# (Königsfeld, Turmfeld, Rochaderecht) für die Ableitung der Rochaderechte aus den has_moved-Flags.
+CASTLING_SQUARES = (
+    (60, 63, WHITE_KINGSIDE), (60, 56, WHITE_QUEENSIDE),
+    (4, 7, BLACK_KINGSIDE), (4, 0, BLACK_QUEENSIDE),
+)
+
+# Gleichbleibender Teil der gespeicherten Figuren-Dicts je Figurencode.
+FIGURE_DOCUMENTS = tuple(
+    {"name": PIECE_NAMES[code % 6], "color": COLORS[code // 6].value, "type": FIGURE_CLASSES[code % 6].__name__}
+    for code in range(12)
+)
+# Dasselbe im JSON-Format von Figure.model_dump(mode="json"), wie es an die Clients geht.
+FIGURE_FIELDS = tuple({"name": PIECE_NAMES[code % 6], "color": COLORS[code // 6].value} for code in range(12))
+
+
+class PieceBoard:
+    """Interne Brettdarstellung für die Engine: Figurencodes (Farbe * 6 + Typ, EMPTY = leer),
+    Figuren-IDs und has_moved-Flags in flachen 64er-Arrays, Feld-Index = Reihe * 8 + Spalte.
+    Laufende Spiele halten das Brett so (siehe GameState); pydantic-Figuren entstehen erst in
+    to_squares/to_chess_board, also an der API-Grenze."""
+
+    __slots__ = ("codes", "ids", "moved")
+
+    def __init__(self, codes: Optional[List[int]] = None, ids: Optional[List[Optional[str]]] = None,
+                 moved: Optional[bytearray] = None):
+        self.codes = codes if codes is not None else [EMPTY] * 64
+        self.ids = ids if ids is not None else [None] * 64
+        self.moved = moved if moved is not None else bytearray(64)
+
+    @classmethod
+    def from_squares(cls, squares) -> "PieceBoard":
+        """Akzeptiert Figure-Objekte ebenso wie die gespeicherten Figuren-Dicts aus Mongo."""
+        board = cls()
+        codes, ids, moved = board.codes, board.ids, board.moved
+
+        for row in range(8):
+            for col, figure in enumerate(squares[row]):
+                if not figure:
+                    continue
+                square = row * 8 + col
+                if isinstance(figure, dict):
+                    codes[square] = piece_code(color_index(figure["color"]), PIECE_KINDS[figure["name"]])
+                    ids[square] = figure.get("id")
+                    moved[square] = bool(figure.get("has_moved"))
+                else:
+                    codes[square] = piece_code(color_index(figure.color), PIECE_KINDS[figure.name])
+                    ids[square] = figure.id
+                    moved[square] = bool(getattr(figure, "has_moved", False))
+
+        return board
+
+    @classmethod
+    def from_chess_board(cls, board: ChessBoard) -> "PieceBoard":
+        return cls.from_squares(board.squares)
+
+    def copy(self) -> "PieceBoard":
+        return PieceBoard(self.codes[:], self.ids[:], bytearray(self.moved))
+
+    def figure_at(self, square: int) -> Optional[Figure]:
+        code = self.codes[square]
+        if code == EMPTY:
+            return None
+
+        color, kind = divmod(code, 6)
+        fields = {"color": COLORS[color], "position": (square >> 3, square & 7)}
+        if self.ids[square] is not None:
+            fields["id"] = self.ids[square]
+        if kind in (ROOK, KING):
+            fields["has_moved"] = bool(self.moved[square])
+        return FIGURE_CLASSES[kind](**fields)
+
+    def figure_json(self, square: int) -> Optional[dict]:
+        """Die Figur auf dem Feld wie Figure.model_dump(mode="json"), ohne das pydantic-Objekt zu bauen."""
+        code = self.codes[square]
+        if code == EMPTY:
+            return None
+
+        figure = {"id": self.ids[square], **FIGURE_FIELDS[code], "position": [square >> 3, square & 7]}
+        if code % 6 in (ROOK, KING):
+            figure["has_moved"] = bool(self.moved[square])
+        return figure
+
+    def make_move(self, from_square: int, to_square: int) -> List[int]:
+        """Zieht die Figur samt geschlagener Figur, En-passant-Bauer und Rochade-Turm;
+        liefert die geänderten Felder. Die Legalität prüft der Aufrufer."""
+        codes = self.codes
+        code = codes[from_square]
+        changed = [from_square, to_square]
+
+        if code % 6 == PAWN and codes[to_square] == EMPTY and (from_square ^ to_square) & 7:
+            captured_square = (from_square & ~7) | (to_square & 7)
+            self._clear(captured_square)
+            changed.append(captured_square)
+
+        self._move_piece(from_square, to_square)
+
+        if code % 6 == KING and abs(to_square - from_square) == 2:
+            rook_from, rook_to = (to_square + 1, to_square - 1) if to_square > from_square else (to_square - 2, to_square + 1)
+            self._move_piece(rook_from, rook_to)
+            changed += (rook_from, rook_to)
+
+        return changed
+
+    def promote(self, square: int, kind: int):
+        # Die umgewandelte Figur behält die ID des Bauern und gilt als noch nicht gezogen.
+        self.codes[square] = piece_code(self.codes[square] // 6, kind)
+        self.moved[square] = 0
+
+    def _move_piece(self, from_square: int, to_square: int):
+        self.codes[to_square] = self.codes[from_square]
+        self.ids[to_square] = self.ids[from_square]
+        self.moved[to_square] = 1
+        self._clear(from_square)
+
+    def _clear(self, square: int):
+        self.codes[square] = EMPTY
+        self.ids[square] = None
+        self.moved[square] = 0
+
+    def to_squares(self) -> List[List[Optional[Figure]]]:
+        figure_at = self.figure_at
+        return [[figure_at(square) for square in range(row * 8, row * 8 + 8)] for row in range(8)]
+
+    def to_chess_board(self) -> ChessBoard:
+        return ChessBoard(squares=self.to_squares())
+
+    def to_document(self) -> List[List[Optional[dict]]]:
+        """Figuren im Speicherformat des ChessGameRepository, ohne Umweg über pydantic."""
+        codes, ids, moved = self.codes, self.ids, self.moved
+        rows = []
+        for row in range(8):
+            cells = []
+            for square in range(row * 8, row * 8 + 8):
+                code = codes[square]
+                if code == EMPTY:
+                    cells.append(None)
+                    continue
+
+                figure = {"id": ids[square], **FIGURE_DOCUMENTS[code], "position": (row, square & 7)}
+                if code % 6 in (ROOK, KING):
+                    figure["has_moved"] = bool(moved[square])
+                cells.append(figure)
+            rows.append(cells)
+        return rows
+
+    def to_compact(self) -> dict:
+        """Kompaktes Speicherformat: FEN-Figurenstellung, Figuren-IDs je Feld-Index und die Felder
+        bewegter Türme und Könige. Ersetzt die 64 Figuren-Dicts im gespeicherten Spiel."""
+        codes = self.codes
+        rows, ids, moved = [], {}, []
+        for row in range(8):
+            row_placement, empty = "", 0
+            for square in range(row * 8, row * 8 + 8):
+                code = codes[square]
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row_placement += str(empty)
+                    empty = 0
+                row_placement += FEN_SYMBOLS[code]
+                if self.ids[square] is not None:
+                    ids[str(square)] = self.ids[square]
+                if self.moved[square] and code % 6 in (ROOK, KING):
+                    moved.append(square)
+            rows.append(row_placement + (str(empty) if empty else ""))
+
+        return {"fen": "/".join(rows), "ids": ids, "moved": moved}
+
+    @classmethod
+    def from_compact(cls, compact: dict) -> "PieceBoard":
+        board = cls()
+        codes, moved = board.codes, board.moved
+
+        square = 0
+        for symbol in compact["fen"]:
+            code = FEN_CODES.get(symbol)
+            if code is not None:
+                codes[square] = code
+                square += 1
+            elif symbol != "/":
+                square += int(symbol)
+        if square != 64:
+            raise ValueError(f"Ungültige Figurenstellung: {compact['fen']}")
+
+        for square, piece_id in compact.get("ids", {}).items():
+            board.ids[int(square)] = piece_id
+        for square in compact.get("moved", ()):
+            moved[square] = 1
+        return board
+
+    def castling_rights(self) -> int:
+        codes, moved = self.codes, self.moved
+        rights = 0
+        for king_square, rook_square, right in CASTLING_SQUARES:
+            color = WHITE if king_square == 60 else BLACK
+            if codes[king_square] == piece_code(color, KING) and not moved[king_square] and \
+                    codes[rook_square] == piece_code(color, ROOK) and not moved[rook_square]:
+                rights |= right
+        return rights
+
+    def to_position(self, current_turn: str, last_move: Optional[dict] = None) -> BitboardPosition:
+        bitboards = [0] * 12
+        for square, code in enumerate(self.codes):
+            if code != EMPTY:
+                bitboards[code] |= 1 << square
+
+        return BitboardPosition(
+            bitboards=bitboards,
+            side_to_move=color_index(current_turn),
+            castling_rights=self.castling_rights(),
+            en_passant=BitboardPosition.en_passant_from_last_move(last_move),
+        )
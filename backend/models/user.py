@@ -24,7 +24,7 @@ class UserDB(UserBase):
 
 class UserInGame(UserBase):
     color: PlayerColor
-    captured_figures: List[str] = []
+    captured_figures: List[dict] = []
     move_history: List[str] = []
 
 class UserLobby(UserBase):
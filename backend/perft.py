@@ -0,0 +1,150 @@
+import sys
+import os
+import argparse
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from typing import Dict, List, NamedTuple, Optional
+from models.bitboard_position import BitboardPosition, FEN_SYMBOLS, square_name
+from models.figure import FigureColor
+from services.chess_board_service import ChessBoardService
+from services.move_validation_service import MoveValidationService
+
+
+class PerftPosition(NamedTuple):
+    name: str
+    fen: Optional[str]
+    expected_nodes: List[int]
+
+
+# Veröffentlichte Referenzwerte, https://www.chessprogramming.org/Perft_Results
+PERFT_POSITIONS: Dict[str, PerftPosition] = {
+    "start": PerftPosition("start", None, [20, 400, 8902, 197281, 4865609]),
+    "kiwipete": PerftPosition(
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603],
+    ),
+    "position3": PerftPosition(
+        "position3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624],
+    ),
+    "position4": PerftPosition(
+        "position4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333],
+    ),
+    "position5": PerftPosition(
+        "position5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487],
+    ),
+}
+
+
+class PerftResult(NamedTuple):
+    depth: int
+    nodes: int
+    seconds: float
+    divide: Dict[str, int]
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else float("inf")
+
+
+def load_position(name: str = "start", fen: Optional[str] = None) -> BitboardPosition:
+    if fen:
+        return BitboardPosition.from_fen(fen)
+
+    perft_position = PERFT_POSITIONS.get(name)
+    if perft_position is None:
+        raise ValueError(f"Unbekannte Perft-Stellung: {name}")
+
+    if perft_position.fen is None:
+        board = ChessBoardService().initialize_board()
+        return BitboardPosition.from_chess_board(board, FigureColor.WHITE)
+    return BitboardPosition.from_fen(perft_position.fen)
+
+
+def move_name(move: tuple[int, int, Optional[int]]) -> str:
+    from_square, to_square, promotion = move
+    suffix = FEN_SYMBOLS[promotion + 6] if promotion is not None else ""
+    return f"{square_name(from_square)}{square_name(to_square)}{suffix}"
+
+
+def perft(position: BitboardPosition, depth: int) -> int:
+    if depth == 0:
+        return 1
+
+    moves = MoveValidationService.generate_position_moves(position)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        undo = position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move(move, undo)
+    return nodes
+
+
+def run_perft(position: BitboardPosition, depth: int) -> PerftResult:
+    divide = {}
+    start = time.perf_counter()
+
+    for move in MoveValidationService.generate_position_moves(position):
+        undo = position.make_move(move)
+        divide[move_name(move)] = perft(position, depth - 1)
+        position.unmake_move(move, undo)
+
+    seconds = time.perf_counter() - start
+    return PerftResult(depth, sum(divide.values()), seconds, divide)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perft-Zählung und Geschwindigkeitsmessung für den Zuggenerator.")
+    parser.add_argument("--position", default="start", choices=sorted(PERFT_POSITIONS), help="Referenzstellung")
+    parser.add_argument("--fen", help="Eigene Stellung als FEN (ersetzt --position)")
+    parser.add_argument("--depth", type=int, default=3, help="Suchtiefe in Halbzügen")
+    parser.add_argument("--divide", action="store_true", help="Knoten pro Zug ausgeben")
+    parser.add_argument("--suite", action="store_true", help="Alle Referenzstellungen bis --depth prüfen")
+    args = parser.parse_args(argv)
+
+    if args.depth < 1:
+        parser.error("--depth muss mindestens 1 sein")
+
+    if args.suite:
+        names = list(PERFT_POSITIONS)
+    else:
+        names = [args.position]
+
+    failed = False
+    for name in names:
+        position = load_position(name, None if args.suite else args.fen)
+        result = run_perft(position, args.depth)
+
+        if args.divide:
+            for move, nodes in sorted(result.divide.items()):
+                print(f"{move}: {nodes}")
+
+        expected = None
+        if not args.fen and args.depth <= len(PERFT_POSITIONS[name].expected_nodes):
+            expected = PERFT_POSITIONS[name].expected_nodes[args.depth - 1]
+
+        status = ""
+        if expected is not None:
+            status = "OK" if expected == result.nodes else f"FEHLER (erwartet {expected})"
+            failed = failed or expected != result.nodes
+
+        label = "fen" if args.fen and not args.suite else name
+        print(f"{label} depth={result.depth} nodes={result.nodes} time={result.seconds:.3f}s "
+              f"nps={result.nodes_per_second:,.0f} {status}".rstrip())
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+from fastapi.concurrency import run_in_threadpool
+from models.chess_game import ChessGame
+from models.game_state import GameState
+from models.user import UserDB
+from repositories.chess_game_repo import ChessGameRepository
+from repositories.user_repo import UserRepository
+
+
+class AsyncChessGameRepository:
+    """Awaitbare Fassung des ChessGameRepository: die blockierenden pymongo-Aufrufe laufen im
+    Threadpool, damit die Event-Loop für alle anderen Spieler frei bleibt."""
+
+    def __init__(self, repo: ChessGameRepository = None):
+        self.repo = repo or ChessGameRepository()
+
+    async def insert_game(self, game: ChessGame | dict):
+        return await run_in_threadpool(self.repo.insert_game, game)
+
+    async def find_game_by_id(self, game_id: str) -> ChessGame | None:
+        return await run_in_threadpool(self.repo.find_game_by_id, game_id)
+
+    async def find_game_state(self, game_id: str) -> GameState | None:
+        return await run_in_threadpool(self.repo.find_game_state, game_id)
+
+    async def find_game_document(self, game_id: str, decode_board: bool = True) -> dict | None:
+        return await run_in_threadpool(self.repo.find_game_document, game_id, decode_board=decode_board)
+
+
+class AsyncUserRepository:
+    def __init__(self, repo: UserRepository = None):
+        self.repo = repo or UserRepository()
+
+    async def insert_user(self, user: UserDB):
+        return await run_in_threadpool(self.repo.insert_user, user)
+
+    async def find_user_by_username(self, username: str) -> UserDB | None:
+        return await run_in_threadpool(self.repo.find_user_by_username, username)
+
+    async def find_user_by_id(self, user_id: str) -> UserDB | None:
+        return await run_in_threadpool(self.repo.find_user_by_id, user_id)
+
+    async def update_user(self, user_id: str, update_data: dict) -> UserDB | None:
+        return await run_in_threadpool(self.repo.update_user, user_id, update_data)
+
+    async def delete_user(self, user_id: str) -> bool:
+        return await run_in_threadpool(self.repo.delete_user, user_id)
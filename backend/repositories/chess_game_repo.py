@@ -1,28 +1,212 @@
+import os
 from database.mongodb import games_collection
-from models.chess_game import ChessGame
+from models.chess_board import ChessBoard
+from models.chess_game import ChessGame, GameStatus
+from models.figure import Figure
+from models.game_state import GameState
+from models.bitboard_position import FIGURE_CLASSES
+from models.piece_board import PieceBoard
+from pymongo import UpdateOne
+from typing import Dict
+
+# Alle n Schreibvorgänge eines Spiels wird das ganze Dokument ersetzt, dazwischen nur die Änderungen.
+GAME_SNAPSHOT_INTERVAL = int(os.getenv("GAME_SNAPSHOT_INTERVAL", 25))
+APPEND_ONLY_FIELDS = ("move_history", "captured_figures")
+# "fen": kompaktes Brett (FEN + ID-Map), "squares": altes Format mit 64 Figuren-Dicts. Lesen kann der
+# Repository-Code beide Formate, umgestellt wird beim nächsten Snapshot oder per migrate_boards.py.
+GAME_BOARD_ENCODING = os.getenv("GAME_BOARD_ENCODING", "fen")
+# Dispatch für gespeicherte Figuren: zuerst über "type", für Dokumente ohne "type" über "name".
+FIGURE_TYPES = {figure_class.__name__: figure_class for figure_class in FIGURE_CLASSES}
+FIGURE_NAMES = {figure_class.__name__.lower(): figure_class for figure_class in FIGURE_CLASSES}
+
 
 class ChessGameRepository:
+    def __init__(self, snapshot_interval: int = GAME_SNAPSHOT_INTERVAL, board_encoding: str = GAME_BOARD_ENCODING):
+        self.snapshot_interval = snapshot_interval
+        self.board_encoding = board_encoding
+        # Zuletzt geschriebener Stand je Spiel, Grundlage für die Delta-Updates.
+        self.persisted_games: Dict[str, dict] = {}
+        self.writes_since_snapshot: Dict[str, int] = {}
+
     def insert_game(self, game: ChessGame | dict):
         if isinstance(game, dict):
             game_dict = game
         else:
             game_dict = game.model_dump()
-        
+
         game_dict["_id"] = game_dict.pop("game_id")
-        
-        for row in game_dict["board"]["squares"]:
-            for i, figure in enumerate(row):
-                if figure and not isinstance(figure, dict):
-                    figure_dict = figure.model_dump()
-                    figure_dict["type"] = figure.__class__.__name__ 
-                    row[i] = figure_dict
-                    
-        games_collection.replace_one({"_id": game_dict["_id"]}, game_dict, upsert=True)
-    
+
+        if self.board_encoding == "fen":
+            game_dict["board"] = self.encode_board(game_dict["board"])
+        elif "fen" in game_dict["board"]:
+            self.decode_board(game_dict)
+        else:
+            for row in game_dict["board"]["squares"]:
+                for i, figure in enumerate(row):
+                    if figure and not isinstance(figure, dict):
+                        figure_dict = figure.model_dump()
+                        figure_dict["type"] = figure.__class__.__name__
+                        row[i] = figure_dict
+
+        game_id = game_dict["_id"]
+        previous = self.persisted_games.get(game_id)
+        try:
+            if previous is None or self.writes_since_snapshot.get(game_id, 0) + 1 >= self.snapshot_interval:
+                games_collection.replace_one({"_id": game_id}, game_dict, upsert=True)
+                self.writes_since_snapshot[game_id] = 0
+            else:
+                update = self.build_update(previous, game_dict)
+                # Das Delta gilt nur für den Stand, auf dem es beruht (gleiche seq). Hat inzwischen ein anderer
+                # Worker oder ein früherer Prozess geschrieben, würden die $push-Einträge doppelt angehängt:
+                # dann stattdessen das ganze Dokument ersetzen.
+                if update and games_collection.update_one({"_id": game_id, "seq": previous.get("seq")},
+                                                          update).matched_count == 0:
+                    games_collection.replace_one({"_id": game_id}, game_dict, upsert=True)
+                    self.writes_since_snapshot[game_id] = 0
+                else:
+                    self.writes_since_snapshot[game_id] += 1
+        except Exception:
+            # Stand in der Datenbank unbekannt: beim nächsten Mal wieder vollständig schreiben.
+            self.forget_game(game_id)
+            raise
+
+        if game_dict.get("status") == GameStatus.RUNNING:
+            self.persisted_games[game_id] = game_dict
+        else:
+            self.forget_game(game_id)
+
+    def forget_game(self, game_id: str):
+        """Vergisst den zuletzt geschriebenen Stand; der nächste Schreibvorgang ersetzt das ganze Dokument."""
+        self.persisted_games.pop(game_id, None)
+        self.writes_since_snapshot.pop(game_id, None)
+
+    @staticmethod
+    def encode_board(board: dict) -> dict:
+        if "fen" in board:
+            return board
+        return PieceBoard.from_squares(board["squares"]).to_compact()
+
+    @staticmethod
+    def decode_board(game_data: dict) -> dict:
+        """Liefert das Brett immer im squares-Format, egal in welchem Format es gespeichert ist."""
+        board = game_data.get("board")
+        if board and "fen" in board:
+            game_data["board"] = {"squares": PieceBoard.from_compact(board).to_document()}
+        return game_data
+
+    @staticmethod
+    def decode_figure(figure_data: dict) -> Figure:
+        figure_class = FIGURE_TYPES.get(figure_data.get("type")) or FIGURE_NAMES.get(figure_data.get("name"))
+        if figure_class is None:
+            raise ValueError(f"Unbekannte Figur: {figure_data}")
+
+        # Direkt in die richtige Klasse validieren; "type" wird dabei als Zusatzfeld ignoriert.
+        return figure_class.model_validate(figure_data)
+
+    @classmethod
+    def decode_game(cls, game_data: dict) -> ChessGame:
+        """Baut das Spiel in einem Durchgang aus dem Mongo-Dokument: Figuren direkt typisiert,
+        das Spiel selbst wird genau einmal validiert."""
+        board = game_data["board"]
+        if "fen" in board:
+            squares = PieceBoard.from_compact(board).to_squares()
+        else:
+            decode_figure = cls.decode_figure
+            squares = [[decode_figure(figure) if figure else None for figure in row] for row in board["squares"]]
+
+        game_data["board"] = ChessBoard.model_construct(squares=squares)
+        return ChessGame.model_validate(game_data)
+
+    @staticmethod
+    def build_update(previous: dict, current: dict) -> dict:
+        """Baut ein $set/$push/$unset-Update, das previous in current überführt."""
+        set_fields, push_fields = {}, {}
+        removed_fields = {key: "" for key in previous if key not in current}
+
+        for key, value in current.items():
+            if key == "_id" or previous.get(key) == value:
+                continue
+
+            previous_board = previous.get(key)
+            if key == "board" and isinstance(previous_board, dict) and "squares" in previous_board and "squares" in value:
+                for row, (previous_row, current_row) in enumerate(zip(previous_board["squares"], value["squares"])):
+                    for col, (previous_figure, figure) in enumerate(zip(previous_row, current_row)):
+                        if previous_figure != figure:
+                            set_fields[f"board.squares.{row}.{col}"] = figure
+            elif key == "board" and isinstance(previous_board, dict) and "fen" in previous_board and "fen" in value:
+                for board_key, board_value in value.items():
+                    previous_value = previous_board.get(board_key)
+                    if previous_value == board_value:
+                        continue
+                    if board_key == "ids" and isinstance(previous_value, dict):
+                        # Nur die IDs der Felder, die sich geändert haben.
+                        for square, piece_id in board_value.items():
+                            if previous_value.get(square) != piece_id:
+                                set_fields[f"board.ids.{square}"] = piece_id
+                        for square in previous_value:
+                            if square not in board_value:
+                                removed_fields[f"board.ids.{square}"] = ""
+                    else:
+                        set_fields[f"board.{board_key}"] = board_value
+            elif key.startswith("player_") and isinstance(previous.get(key), dict):
+                for player_key, player_value in value.items():
+                    previous_value = previous[key].get(player_key)
+                    if previous_value == player_value:
+                        continue
+                    path = f"{key}.{player_key}"
+                    if player_key in APPEND_ONLY_FIELDS and isinstance(previous_value, list) and \
+                            player_value[:len(previous_value)] == previous_value:
+                        push_fields[path] = {"$each": player_value[len(previous_value):]}
+                    else:
+                        set_fields[path] = player_value
+            else:
+                set_fields[key] = value
+
+        update = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if push_fields:
+            update["$push"] = push_fields
+        if removed_fields:
+            update["$unset"] = removed_fields
+        return update
+
     def find_game_by_id(self, game_id: str) -> ChessGame | None:
+        game_data = self.find_game_document(game_id, decode_board=False)
+        if game_data:
+            return self.decode_game(game_data)
+        return None
+
+    def find_game_state(self, game_id: str) -> GameState | None:
+        """Das laufende Spiel direkt aus dem Dokument, ohne pydantic-Figuren (siehe GameState.from_document)."""
+        game_data = self.find_game_document(game_id, decode_board=False)
+        if game_data:
+            return GameState.from_document(game_data)
+        return None
+
+    def find_game_document(self, game_id: str, decode_board: bool = True) -> dict | None:
+        """Mit decode_board=False bleibt ein kompakt gespeichertes Brett im FEN-Format, für Aufrufer,
+        die daraus direkt ein PieceBoard bauen."""
         game_data = games_collection.find_one({"_id": game_id})
         if game_data:
             game_data["game_id"] = str(game_data.pop("_id"))
-            return ChessGame(**game_data)
-        return None
-    
\ No newline at end of file
+            if decode_board:
+                self.decode_board(game_data)
+        return game_data
+
+    def migrate_boards(self, batch_size: int = 500) -> int:
+        """Schreibt gespeicherte Spiele im alten squares-Format auf das kompakte Format um."""
+        migrated = 0
+        batch = []
+        for game_data in games_collection.find({"board.squares": {"$exists": True}}, {"board": 1}):
+            compact = self.encode_board(game_data["board"])
+            # Nur umschreiben, wenn das Brett inzwischen nicht schon neu gespeichert wurde.
+            batch.append(UpdateOne({"_id": game_data["_id"], "board.squares": {"$exists": True}},
+                                   {"$set": {"board": compact}}))
+            if len(batch) >= batch_size:
+                migrated += games_collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+
+        if batch:
+            migrated += games_collection.bulk_write(batch, ordered=False).modified_count
+        return migrated
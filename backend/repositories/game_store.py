@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import time
+from fastapi.concurrency import run_in_threadpool
+from models.chess_game import GameStatus
+from models.game_state import GameState
+from repositories.async_repo import AsyncChessGameRepository
+from typing import Dict, List, Optional
+
+GAME_STORE_FLUSH_INTERVAL = float(os.getenv("GAME_STORE_FLUSH_INTERVAL", 1.0))
+GAME_STORE_IDLE_TIMEOUT = float(os.getenv("GAME_STORE_IDLE_TIMEOUT", 3600))
+# Leer = kein Journal; ungespeicherte Züge gehen dann bei einem Absturz innerhalb eines Flush-Intervalls verloren.
+GAME_STORE_JOURNAL_PATH = os.getenv("GAME_STORE_JOURNAL_PATH", "")
+# fsync einmal pro Flush-Intervall statt pro Zug.
+GAME_STORE_JOURNAL_FSYNC = os.getenv("GAME_STORE_JOURNAL_FSYNC", "false").lower() == "true"
+
+
+class GameStore:
+    """Hält laufende Spiele im Prozess als maßgeblichen Stand und schreibt Änderungen verzögert
+    über das ChessGameRepository nach Mongo. Solange kein Flush-Task läuft (start() wurde nicht
+    aufgerufen, z. B. in Tests oder Skripten), wird jede Änderung sofort geschrieben.
+    Gehalten wird der GameState mit kompaktem PieceBoard, geschrieben dessen Dokument (GameState.to_document)."""
+
+    def __init__(self, repo=None, flush_interval: float = GAME_STORE_FLUSH_INTERVAL,
+                 journal_path: str = GAME_STORE_JOURNAL_PATH, idle_timeout: float = GAME_STORE_IDLE_TIMEOUT,
+                 journal_fsync: bool = GAME_STORE_JOURNAL_FSYNC):
+        self.repo = repo
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self.idle_timeout = idle_timeout
+        self.games: Dict[str, GameState] = {}
+        self.last_access: Dict[str, float] = {}
+        self.versions: Dict[str, int] = {}
+        self.dirty: Dict[str, int] = {}
+        # game_id -> seq, die ein anderer Worker gemeldet hat; ein neu geladener Stand muss mindestens so weit sein.
+        self.remote_seqs: Dict[str, int] = {}
+        self.remote_seen: Dict[str, float] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        # Journalzeilen, die der Writer-Task noch nicht geschrieben hat.
+        self.journal_pending: List[str] = []
+        self.journal_task: Optional[asyncio.Task] = None
+        self.journal_file = None
+        # Schreiben, fsync und Kürzen des Journals laufen im Threadpool, aber nie gleichzeitig.
+        self.journal_lock = asyncio.Lock()
+
+    @property
+    def repo(self):
+        return self.async_repo.repo if self.async_repo is not None else None
+
+    @repo.setter
+    def repo(self, repo):
+        self.async_repo = AsyncChessGameRepository(repo) if repo is not None else None
+
+    @property
+    def write_behind(self) -> bool:
+        return self.flush_task is not None and not self.flush_task.done()
+
+    @property
+    def journaling(self) -> bool:
+        return bool(self.journal_path) and self.write_behind
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        game = self.games.get(game_id)
+        if game is not None:
+            self.last_access[game_id] = time.monotonic()
+        return game
+
+    def put(self, game: GameState):
+        """Übernimmt ein bereits gespeichertes Spiel in den Speicher, ohne es als geändert zu markieren."""
+        if game.status != GameStatus.RUNNING:
+            return
+        self.games[game.game_id] = game
+        self.last_access[game.game_id] = time.monotonic()
+        if game.seq >= self.remote_seqs.get(game.game_id, 0):
+            self.remote_seqs.pop(game.game_id, None)
+            self.remote_seen.pop(game.game_id, None)
+
+    def expected_seq(self, game_id: str) -> int:
+        return self.remote_seqs.get(game_id, 0)
+
+    async def save(self, game: GameState, write_through: bool = False, delta: Optional[str] = None):
+        """write_through schreibt auch bei laufendem Flush-Task sofort, z. B. bevor andere Worker
+        von der Änderung erfahren und das Spiel aus Mongo neu laden. delta ist die game_delta-Nachricht
+        der Änderung (siehe GameSnapshotCache.serialize_delta); nur sie kommt ins Journal."""
+        game_id = game.game_id
+        self.games[game_id] = game
+        self.last_access[game_id] = time.monotonic()
+        self.versions[game_id] = self.versions.get(game_id, 0) + 1
+
+        if write_through or not self.write_behind:
+            version = self.versions[game_id]
+            await self.async_repo.insert_game(game.to_document())
+            # Ältere, noch nicht geschriebene Stände sind damit überholt.
+            if self.dirty.get(game_id, version) <= version:
+                self.dirty.pop(game_id, None)
+            self._evict_if_finished(game_id)
+            return
+
+        self.dirty[game_id] = self.versions[game_id]
+        if delta is not None:
+            self._append_journal(game, delta)
+
+    def discard(self, game_id: str):
+        self.games.pop(game_id, None)
+        self.last_access.pop(game_id, None)
+        self.versions.pop(game_id, None)
+        self.dirty.pop(game_id, None)
+        # Auch die Delta-Grundlage im Repository: sie wäre veraltet und bliebe sonst für immer im Speicher.
+        if self.repo is not None:
+            self.repo.forget_game(game_id)
+
+    def release(self, game_id: str, seq: int = 0):
+        """Vergisst einen von anderer Stelle geänderten Stand; eigene, noch nicht geschriebene Änderungen bleiben.
+        seq ist der Stand des anderen Workers, den ein Neuladen mindestens erreichen muss."""
+        if seq > self.remote_seqs.get(game_id, 0):
+            self.remote_seqs[game_id] = seq
+            self.remote_seen[game_id] = time.monotonic()
+        if game_id not in self.dirty:
+            self.discard(game_id)
+
+    async def flush(self) -> int:
+        flushed = 0
+        for game_id, version in list(self.dirty.items()):
+            game = self.games.get(game_id)
+            if game is None:
+                self.dirty.pop(game_id, None)
+                continue
+
+            try:
+                # Der Snapshot entsteht in der Event-Loop, nur das Schreiben läuft im Threadpool.
+                await self.async_repo.insert_game(game.to_document())
+            except Exception as e:
+                print(f"[GAME STORE] Fehler beim Speichern von game_id={game_id}: {e}")
+                continue
+
+            # Nur als sauber markieren, wenn seit dem Schreiben keine neue Änderung kam.
+            if self.dirty.get(game_id) == version:
+                del self.dirty[game_id]
+                self._evict_if_finished(game_id)
+            flushed += 1
+
+        await self._sync_journal()
+        self._evict_idle_games()
+        return flushed
+
+    async def recover(self) -> int:
+        """Spielt nach einem Absturz die im Journal stehenden, nicht mehr geschriebenen Züge auf den
+        gespeicherten Stand der Spiele und schreibt diese nach Mongo."""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+
+        entries: Dict[str, List[dict]] = {}
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Eine beim Absturz halb geschriebene letzte Zeile wird übersprungen.
+                    continue
+                entries.setdefault(entry["delta"]["game_id"], []).append(entry)
+
+        recovered = 0
+        for game_id, game_entries in entries.items():
+            game_data = await self.async_repo.find_game_document(game_id)
+            if game_data is None:
+                print(f"[GAME STORE] Spiel aus dem Journal nicht gefunden: game_id={game_id}")
+                continue
+            applied = [self.apply_journal_entry(game_data, entry) for entry in game_entries]
+            if any(applied):
+                await self.async_repo.insert_game(game_data)
+                recovered += 1
+
+        self._truncate_journal()
+        print(f"[GAME STORE] {recovered} Spiel(e) aus dem Journal wiederhergestellt.")
+        return recovered
+
+    @staticmethod
+    def apply_journal_entry(game_data: dict, entry: dict) -> bool:
+        """Überträgt einen Zug aus dem Journal auf das Spieldokument (Brett im squares-Format).
+        Bereits gespeicherte oder nicht direkt anschließende Züge werden übergangen."""
+        delta = entry["delta"]
+        if delta["seq"] != game_data.get("seq", 0) + 1:
+            return False
+
+        squares = game_data["board"]["squares"]
+        for square in delta["squares"]:
+            row, col = square["position"]
+            squares[row][col] = square["figure"]
+        game_data.update(delta["changes"])
+        game_data["repetition_counts"] = entry["repetition_counts"]
+        game_data["seq"] = delta["seq"]
+
+        move = delta.get("move")
+        if move:
+            mover = game_data["player_white"] if move["color"] == "white" else game_data["player_black"]
+            mover["move_history"].append(move["notation"])
+            if move["captured"]:
+                mover["captured_figures"].append(move["captured"])
+        return True
+
+    async def start(self):
+        if self.write_behind:
+            return
+        await self.recover()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+        await self.flush()
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _evict_if_finished(self, game_id: str):
+        game = self.games.get(game_id)
+        if game is not None and game.status != GameStatus.RUNNING and game_id not in self.dirty:
+            self.discard(game_id)
+
+    def _evict_idle_games(self):
+        if self.idle_timeout <= 0:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        for game_id, last_access in list(self.last_access.items()):
+            if last_access < deadline and game_id not in self.dirty:
+                self.discard(game_id)
+        # Gemeldete Stände von Spielen, die hier nie wieder geladen wurden.
+        for game_id, seen in list(self.remote_seen.items()):
+            if seen < deadline:
+                self.remote_seqs.pop(game_id, None)
+                del self.remote_seen[game_id]
+
+    def _append_journal(self, game: GameState, delta: str):
+        if not self.journal_path:
+            return
+        # Die Wiederholungszählung steht nicht im Delta, wird für die Remis-Erkennung aber gebraucht.
+        repetition_counts = json.dumps(game.repetition_counts, separators=(",", ":"))
+        self.journal_pending.append(f'{{"repetition_counts":{repetition_counts},"delta":{delta}}}\n')
+        if self.journal_task is None or self.journal_task.done():
+            self.journal_task = asyncio.create_task(self._write_journal())
+
+    async def _write_journal(self):
+        # Alles, was während eines Schreibvorgangs dazukommt, geht im nächsten Durchgang gemeinsam raus.
+        while self.journal_pending:
+            async with self.journal_lock:
+                lines, self.journal_pending = self.journal_pending, []
+                try:
+                    await run_in_threadpool(self._write_journal_lines, lines)
+                except Exception as e:
+                    print(f"[GAME STORE] Fehler beim Schreiben des Journals: {e}")
+
+    def _write_journal_lines(self, lines: List[str]):
+        if self.journal_file is None:
+            self.journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self.journal_file.write("".join(lines))
+        self.journal_file.flush()
+
+    async def _sync_journal(self):
+        """Kürzt das Journal, sobald alles in Mongo steht, sonst ein fsync für alle Züge seit dem letzten Flush."""
+        if self.journal_task is not None and not self.journal_task.done():
+            await self.journal_task
+        async with self.journal_lock:
+            if self.journal_file is None:
+                return
+            if not self.dirty:
+                await run_in_threadpool(self.journal_file.truncate, 0)
+            elif self.journal_fsync:
+                await run_in_threadpool(os.fsync, self.journal_file.fileno())
+
+    def _truncate_journal(self):
+        if self.journal_path and os.path.exists(self.journal_path):
+            open(self.journal_path, "w").close()
@@ -0,0 +1,514 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+from itertools import islice
+from database.mongodb import lobbies_collection
+from models.lobby import Lobby
+from models.user import PlayerColor, UserLobby
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# "memory": Lobbys nur im Prozess (ein Worker, Tests), "mongo": gemeinsam für alle Worker und über Neustarts hinweg.
+LOBBY_REGISTRY = os.getenv("LOBBY_REGISTRY", "memory")
+# Wie oft eine bedingte Änderung wiederholt wird, wenn ein anderer Worker die Lobby dazwischen geändert hat.
+LOBBY_UPDATE_RETRIES = int(os.getenv("LOBBY_UPDATE_RETRIES", 3))
+MAX_LOBBY_PLAYERS = 2
+
+LOBBY_NOT_FOUND_ERROR = "Lobby nicht gefunden."
+ALREADY_IN_LOBBY_ERROR = "Du hast bereits eine Lobby erstellt. Du darfst aber gerne einer anderen beitreten."
+INVALID_CURSOR_ERROR = "Ungültiger Cursor."
+
+
+class LobbyRegistry:
+    """Gemeinsame Prüfungen beider Registries; die Fehlermeldungen sind die des ChessLobbyService."""
+
+    # True, wenn die Aufrufe blockieren (Mongo) und deshalb im Threadpool laufen sollten.
+    blocking = False
+    # shared: mehrere Worker teilen sich die Lobbys; version sieht dann nur die eigenen Änderungen.
+    shared = False
+    # Wird bei jeder Änderung erhöht; gecachte Lobbylisten gelten nur für ihre Version.
+    version = 0
+
+    def changed(self):
+        self.version += 1
+
+    @staticmethod
+    def matches(lobby: Lobby, open_only: bool = False, color: Optional[str] = None) -> bool:
+        """Filter der Lobbyliste: freier Platz und, mit color, diese Farbe noch nicht vergeben."""
+        if (open_only or color is not None) and len(lobby.players) >= MAX_LOBBY_PLAYERS:
+            return False
+        return color is None or all(player.color != color for player in lobby.players)
+
+    @staticmethod
+    def check_join(lobby: Optional[Lobby], user: UserLobby):
+        if not lobby:
+            raise ValueError("Lobby existiert nicht.")
+        if any(player.user_id == user.user_id for player in lobby.players):
+            raise ValueError("Du bist bereits in dieser Lobby.")
+        if len(lobby.players) >= MAX_LOBBY_PLAYERS:
+            raise ValueError("Lobby ist bereits voll.")
+
+    @staticmethod
+    def check_leave(lobby: Optional[Lobby], user_id: str):
+        if not lobby:
+            raise ValueError("Lobby nicht gefunden, oder bereits gelöscht.")
+        if user_id not in [player.user_id for player in lobby.players]:
+            raise ValueError("Du bist nicht mehr in dieser Lobby.")
+
+    @staticmethod
+    def check_color(lobby: Optional[Lobby], user_id: str, color: str) -> UserLobby:
+        if not lobby:
+            raise ValueError(LOBBY_NOT_FOUND_ERROR)
+        player = next((player for player in lobby.players if player.user_id == user_id), None)
+        if not player:
+            raise ValueError("Spieler nicht gefunden.")
+        if any(other.color == color for other in lobby.players if other.user_id != user_id):
+            raise ValueError("Farbe bereits vergeben.")
+        return player
+
+    @staticmethod
+    def check_status(lobby: Optional[Lobby], user_id: str) -> UserLobby:
+        if not lobby:
+            raise ValueError(LOBBY_NOT_FOUND_ERROR)
+        player = next((player for player in lobby.players if player.user_id == user_id), None)
+        if not player:
+            raise ValueError("Spieler nicht gefunden.")
+        if player.color == None:
+            raise ValueError("Wähle zuerst eine Farbe.")
+        return player
+
+
+class LobbyOrder:
+    """Game-IDs sortiert nach ihrer Position (Reihenfolge der Erstellung). Einfügen und Entfernen über
+    Binärsuche, eine Seite beginnt direkt hinter der Position des Cursors."""
+
+    def __init__(self):
+        self.positions: List[int] = []
+        self.game_ids: Dict[int, str] = {}
+
+    def add(self, position: int, game_id: str):
+        if position not in self.game_ids:
+            insort(self.positions, position)
+            self.game_ids[position] = game_id
+
+    def discard(self, position: int):
+        if self.game_ids.pop(position, None) is not None:
+            del self.positions[bisect_left(self.positions, position)]
+
+    def after(self, position: int) -> Iterator[Tuple[int, str]]:
+        for index in range(bisect_right(self.positions, position), len(self.positions)):
+            yield self.positions[index], self.game_ids[self.positions[index]]
+
+    def clear(self):
+        self.positions.clear()
+        self.game_ids.clear()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.game_ids[position] for position in self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+class InMemoryLobbyRegistry(LobbyRegistry):
+    """Lobbys im Prozess. Jede Operation prüft und ändert unter einem Lock, damit sie auch aus dem
+    Threadpool heraus atomar bleibt. Die Sekundärindexe werden bei jeder Änderung mitgeführt, damit
+    kein Aufruf über alle Lobbys laufen muss."""
+
+    def __init__(self):
+        self.lobbies: Dict[str, Lobby] = {}
+        # user_id -> game_ids; beitreten darf ein Spieler auch mehreren Lobbys, erstellen nur ohne Lobby.
+        self.user_lobbies: Dict[str, Set[str]] = {}
+        # Position je Lobby; alle Listen und Filter sind danach sortiert, der Cursor ist die letzte Position.
+        self.positions: Dict[str, int] = {}
+        self.next_position = 0
+        self.order = LobbyOrder()
+        # Lobbys mit freiem Platz, und davon die, in denen die Farbe noch frei ist (Filter der Lobbyliste).
+        self.open_lobbies = LobbyOrder()
+        self.free_colors: Dict[str, LobbyOrder] = {color.value: LobbyOrder() for color in PlayerColor}
+        self.lock = threading.RLock()
+
+    def _add(self, lobby: Lobby):
+        if lobby.game_id not in self.positions:
+            self.positions[lobby.game_id] = self.next_position
+            self.order.add(self.next_position, lobby.game_id)
+            self.next_position += 1
+        self.lobbies[lobby.game_id] = lobby
+        self._index(lobby)
+
+    def _remove(self, game_id: str):
+        position = self.positions.pop(game_id, None)
+        if position is not None:
+            self.order.discard(position)
+
+    def _index(self, lobby: Lobby):
+        for player in lobby.players:
+            self.user_lobbies.setdefault(player.user_id, set()).add(lobby.game_id)
+        self._index_slots(lobby)
+
+    def _index_slots(self, lobby: Lobby):
+        position = self.positions[lobby.game_id]
+        if len(lobby.players) < MAX_LOBBY_PLAYERS:
+            self.open_lobbies.add(position, lobby.game_id)
+        else:
+            self.open_lobbies.discard(position)
+        for color, lobbies in self.free_colors.items():
+            if self.matches(lobby, color=color):
+                lobbies.add(position, lobby.game_id)
+            else:
+                lobbies.discard(position)
+
+    def _unindex_player(self, game_id: str, user_id: str):
+        game_ids = self.user_lobbies.get(user_id)
+        if game_ids is not None:
+            game_ids.discard(game_id)
+            if not game_ids:
+                del self.user_lobbies[user_id]
+
+    def _unindex(self, lobby: Lobby):
+        for player in lobby.players:
+            self._unindex_player(lobby.game_id, player.user_id)
+        self._unindex_slots(lobby.game_id)
+
+    def _unindex_slots(self, game_id: str):
+        position = self.positions[game_id]
+        self.open_lobbies.discard(position)
+        for lobbies in self.free_colors.values():
+            lobbies.discard(position)
+
+    def get(self, game_id: str) -> Optional[Lobby]:
+        return self.lobbies.get(game_id)
+
+    def all(self) -> List[Lobby]:
+        return list(self.lobbies.values())
+
+    def ids(self) -> List[str]:
+        return list(self.lobbies)
+
+    def count(self) -> int:
+        return len(self.lobbies)
+
+    def find_open(self, limit: Optional[int] = None) -> List[Lobby]:
+        with self.lock:
+            return [self.lobbies[game_id] for game_id in islice(self.open_lobbies, limit)]
+
+    def count_open(self) -> int:
+        return len(self.open_lobbies)
+
+    def find_page(self, after: Optional[str], limit: int, open_only: bool = False,
+                  color: Optional[str] = None) -> Tuple[List[Lobby], Optional[str]]:
+        """Bis zu limit Lobbys nach dem Cursor und der Cursor der nächsten Seite (None auf der letzten).
+        Jeder Filter hat seinen eigenen sortierten Index; der Einstieg ist eine Binärsuche, die Kosten
+        hängen weder von den Lobbys davor noch von den herausgefilterten ab."""
+        try:
+            after_position = int(after) if after else -1
+        except ValueError:
+            raise ValueError(INVALID_CURSOR_ERROR)
+
+        if color is not None:
+            index = self.free_colors.get(color)
+            if index is None:
+                return [], None
+        else:
+            index = self.open_lobbies if open_only else self.order
+
+        with self.lock:
+            entries = list(islice(index.after(after_position), limit + 1))
+            page = [self.lobbies[game_id] for _, game_id in entries[:limit]]
+            return page, str(entries[limit - 1][0]) if len(entries) > limit else None
+
+    def put(self, lobby: Lobby):
+        with self.lock:
+            previous = self.lobbies.get(lobby.game_id)
+            if previous is not None:
+                self._unindex(previous)
+            self._add(lobby)
+            self.changed()
+
+    def delete(self, game_id: str) -> bool:
+        with self.lock:
+            lobby = self.lobbies.pop(game_id, None)
+            if lobby is None:
+                return False
+            self._unindex(lobby)
+            self._remove(game_id)
+            self.changed()
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.lobbies.clear()
+            self.user_lobbies.clear()
+            self.positions.clear()
+            self.order.clear()
+            self.open_lobbies.clear()
+            for lobbies in self.free_colors.values():
+                lobbies.clear()
+            self.changed()
+
+    def find_by_user(self, user_id: str) -> Optional[Lobby]:
+        game_ids = self.user_lobbies.get(user_id)
+        return self.lobbies[next(iter(game_ids))] if game_ids else None
+
+    def create(self, lobby: Lobby) -> Lobby:
+        with self.lock:
+            if any(player.user_id in self.user_lobbies for player in lobby.players):
+                raise ValueError(ALREADY_IN_LOBBY_ERROR)
+            self._add(lobby)
+            self.changed()
+        return lobby
+
+    def join(self, game_id: str, user: UserLobby) -> Lobby:
+        with self.lock:
+            lobby = self.lobbies.get(game_id)
+            self.check_join(lobby, user)
+            lobby.players.append(user)
+            self.user_lobbies.setdefault(user.user_id, set()).add(game_id)
+            self._index_slots(lobby)
+            self.changed()
+        return lobby
+
+    def leave(self, game_id: str, user_id: str) -> Optional[Lobby]:
+        """Gibt None zurück, wenn der letzte Spieler gegangen und die Lobby damit gelöscht ist."""
+        with self.lock:
+            lobby = self.lobbies.get(game_id)
+            self.check_leave(lobby, user_id)
+            lobby.players.remove(next(player for player in lobby.players if player.user_id == user_id))
+            self._unindex_player(game_id, user_id)
+            self.changed()
+            if not lobby.players:
+                del self.lobbies[game_id]
+                self._unindex_slots(game_id)
+                self._remove(game_id)
+                return None
+            self._index_slots(lobby)
+        return lobby
+
+    def set_color(self, game_id: str, user_id: str, color: str) -> Lobby:
+        with self.lock:
+            lobby = self.lobbies.get(game_id)
+            self.check_color(lobby, user_id, color).color = color
+            self._index_slots(lobby)
+            self.changed()
+        return lobby
+
+    def set_status(self, game_id: str, user_id: str, status: str) -> Lobby:
+        with self.lock:
+            lobby = self.lobbies.get(game_id)
+            self.check_status(lobby, user_id).status = status
+            self.changed()
+        return lobby
+
+
+class MongoLobbyRegistry(LobbyRegistry):
+    """Lobbys in der Collection "lobbies", geteilt von allen Workern. Jede Änderung ist ein einzelnes
+    bedingtes find_one_and_update; schlägt die Bedingung fehl, liefert die Prüfung auf dem aktuellen
+    Dokument die passende Fehlermeldung. version zählt nur die Änderungen dieses Workers, die der anderen
+    meldet der ChessLobbyService über den Backplane-Kanal "lobby_directory".
+    created (ObjectId, zeitlich aufsteigend) legt die Reihenfolge der Erstellung für die Lobbyliste fest."""
+
+    blocking = True
+    shared = True
+
+    def __init__(self, collection=lobbies_collection, retries: int = LOBBY_UPDATE_RETRIES):
+        self.collection = collection
+        self.retries = retries
+
+    @staticmethod
+    def encode(lobby: Lobby) -> dict:
+        # open_slots wird bei join/leave mitgezählt und ist indexiert (lobby_open_created), für die Suche nach freien Lobbys.
+        # host_id ist unique (lobby_host): ein Spieler kann auch bei gleichzeitigen Anfragen nur eine Lobby erstellen.
+        document = {"_id": lobby.game_id, "players": [player.model_dump(mode="json") for player in lobby.players],
+                    "open_slots": MAX_LOBBY_PLAYERS - len(lobby.players)}
+        if lobby.players:
+            document["host_id"] = lobby.players[0].user_id
+        return document
+
+    @staticmethod
+    def decode(document: dict) -> Lobby:
+        return Lobby(game_id=document["_id"], players=document["players"])
+
+    def get(self, game_id: str) -> Optional[Lobby]:
+        document = self.collection.find_one({"_id": game_id})
+        return self.decode(document) if document else None
+
+    def all(self) -> List[Lobby]:
+        return [self.decode(document) for document in self.collection.find()]
+
+    def ids(self) -> List[str]:
+        return [document["_id"] for document in self.collection.find({}, {"_id": 1})]
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+    def find_open(self, limit: Optional[int] = None) -> List[Lobby]:
+        cursor = self.collection.find({"open_slots": {"$gt": 0}})
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [self.decode(document) for document in cursor]
+
+    def count_open(self) -> int:
+        return self.collection.count_documents({"open_slots": {"$gt": 0}})
+
+    def find_page(self, after: Optional[str], limit: int, open_only: bool = False,
+                  color: Optional[str] = None) -> Tuple[List[Lobby], Optional[str]]:
+        """Seiten in der Reihenfolge der Erstellung (created), der Cursor ist created der letzten Lobby.
+        Mit Filter als $in über die möglichen open_slots, damit lobby_open_created die Sortierung liefert,
+        statt alle offenen Lobbys im Speicher zu sortieren."""
+        query = {}
+        if after:
+            try:
+                query["created"] = {"$gt": ObjectId(after)}
+            except (InvalidId, TypeError):
+                raise ValueError(INVALID_CURSOR_ERROR)
+        if open_only or color is not None:
+            query["open_slots"] = {"$in": list(range(1, MAX_LOBBY_PLAYERS + 1))}
+        if color is not None:
+            query["players.color"] = {"$ne": color}
+
+        documents = list(self.collection.find(query).sort("created", ASCENDING).limit(limit + 1))
+        page = [self.decode(document) for document in documents[:limit]]
+        return page, str(documents[limit - 1]["created"]) if len(documents) > limit else None
+
+    def put(self, lobby: Lobby):
+        document = self.encode(lobby)
+        game_id = document.pop("_id")
+        # created bleibt beim Überschreiben erhalten, damit die Lobby ihren Platz in der Liste behält.
+        update = {"$set": document, "$setOnInsert": {"created": ObjectId()}}
+        if "host_id" not in document:
+            update["$unset"] = {"host_id": ""}
+        self.collection.update_one({"_id": game_id}, update, upsert=True)
+        self.changed()
+
+    def delete(self, game_id: str) -> bool:
+        self.changed()
+        return self.collection.delete_one({"_id": game_id}).deleted_count > 0
+
+    def clear(self):
+        self.collection.delete_many({})
+        self.changed()
+
+    def find_by_user(self, user_id: str) -> Optional[Lobby]:
+        document = self.collection.find_one({"players.user_id": user_id})
+        return self.decode(document) if document else None
+
+    def create(self, lobby: Lobby) -> Lobby:
+        # Die Abfrage liefert die Meldung für Spieler, die schon in einer Lobby sind; gegen zwei gleichzeitige
+        # Erstellungen schützt erst der Unique-Index auf host_id.
+        if any(self.find_by_user(player.user_id) for player in lobby.players):
+            raise ValueError(ALREADY_IN_LOBBY_ERROR)
+        try:
+            self.collection.insert_one({**self.encode(lobby), "created": ObjectId()})
+        except DuplicateKeyError:
+            raise ValueError(ALREADY_IN_LOBBY_ERROR)
+        self.changed()
+        return lobby
+
+    def _update(self, game_id: str, condition: dict, update: dict, check: Callable[[Optional[Lobby]], object],
+                array_filters: Optional[list] = None) -> dict:
+        for _ in range(self.retries):
+            document = self.collection.find_one_and_update(
+                {"_id": game_id, **condition}, update,
+                array_filters=array_filters, return_document=ReturnDocument.AFTER
+            )
+            if document:
+                self.changed()
+                return document
+            # Bedingung nicht erfüllt: wirft die passende Meldung, sonst hat sich die Lobby inzwischen geändert.
+            check(self.get(game_id))
+        raise ValueError("Die Lobby wurde gleichzeitig geändert. Bitte versuche es erneut.")
+
+    def join(self, game_id: str, user: UserLobby) -> Lobby:
+        document = self._update(
+            game_id,
+            {"players.user_id": {"$ne": user.user_id}, "open_slots": {"$gt": 0}},
+            {"$push": {"players": user.model_dump(mode="json")}, "$inc": {"open_slots": -1}},
+            lambda lobby: self.check_join(lobby, user),
+        )
+        return self.decode(document)
+
+    def leave(self, game_id: str, user_id: str) -> Optional[Lobby]:
+        document = self._update(
+            game_id,
+            {"players.user_id": user_id},
+            {"$pull": {"players": {"user_id": user_id}}, "$inc": {"open_slots": 1}},
+            lambda lobby: self.check_leave(lobby, user_id),
+        )
+        if document.get("host_id") == user_id:
+            # Der Host gibt seine Lobby ab und darf danach wieder eine erstellen.
+            self.collection.update_one({"_id": game_id, "host_id": user_id}, {"$unset": {"host_id": ""}})
+        if not document["players"]:
+            # Nur löschen, wenn nicht gerade jemand beigetreten ist.
+            self.collection.delete_one({"_id": game_id, "players": {"$size": 0}})
+            return None
+        return self.decode(document)
+
+    def set_color(self, game_id: str, user_id: str, color: str) -> Lobby:
+        document = self._update(
+            game_id,
+            {"$and": [
+                {"players.user_id": user_id},
+                {"players": {"$not": {"$elemMatch": {"user_id": {"$ne": user_id}, "color": color}}}},
+            ]},
+            {"$set": {"players.$[player].color": color}},
+            lambda lobby: self.check_color(lobby, user_id, color),
+            array_filters=[{"player.user_id": user_id}],
+        )
+        return self.decode(document)
+
+    def set_status(self, game_id: str, user_id: str, status: str) -> Lobby:
+        document = self._update(
+            game_id,
+            {"players": {"$elemMatch": {"user_id": user_id, "color": {"$ne": None}}}},
+            {"$set": {"players.$[player].status": status}},
+            lambda lobby: self.check_status(lobby, user_id),
+            array_filters=[{"player.user_id": user_id}],
+        )
+        return self.decode(document)
+
+
+class LobbyRegistryView(MutableMapping):
+    """Dict-Sicht auf die Registry für Code und Tests, die noch direkt mit game_lobbies arbeiten."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def __getitem__(self, game_id: str) -> Lobby:
+        lobby = self.registry.get(game_id)
+        if lobby is None:
+            raise KeyError(game_id)
+        return lobby
+
+    def __setitem__(self, game_id: str, lobby: Lobby):
+        self.registry.put(lobby)
+
+    def __delitem__(self, game_id: str):
+        if not self.registry.delete(game_id):
+            raise KeyError(game_id)
+
+    def __contains__(self, game_id) -> bool:
+        return self.registry.get(game_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.registry.ids())
+
+    def __len__(self) -> int:
+        return self.registry.count()
+
+    def values(self):
+        return self.registry.all()
+
+    def clear(self):
+        self.registry.clear()
+
+
+def create_lobby_registry(backend: str = LOBBY_REGISTRY):
+    if backend == "memory":
+        return InMemoryLobbyRegistry()
+    if backend == "mongo":
+        return MongoLobbyRegistry()
+    raise ValueError(f"Unbekannte LOBBY_REGISTRY: {backend}")
@@ -0,0 +1,59 @@
+import copy
+from models.chess_game import ChessGame
+from models.game_state import GameState
+from models.user import UserDB
+from repositories.chess_game_repo import ChessGameRepository
+from typing import Dict
+
+
+class InMemoryChessGameRepository:
+    """Ersatz für das ChessGameRepository ohne Mongo, z. B. für Tests und lokale Entwicklung."""
+
+    def __init__(self):
+        self.games: Dict[str, dict] = {}
+
+    def insert_game(self, game: ChessGame | dict):
+        game_dict = copy.deepcopy(game) if isinstance(game, dict) else game.model_dump()
+        self.games[game_dict["game_id"]] = game_dict
+
+    def forget_game(self, game_id: str):
+        pass
+
+    def find_game_by_id(self, game_id: str) -> ChessGame | None:
+        game_data = self.find_game_document(game_id)
+        return ChessGameRepository.decode_game(game_data) if game_data else None
+
+    def find_game_state(self, game_id: str) -> GameState | None:
+        game_data = self.find_game_document(game_id)
+        return GameState.from_document(game_data) if game_data else None
+
+    def find_game_document(self, game_id: str, decode_board: bool = True) -> dict | None:
+        game_data = self.games.get(game_id)
+        return copy.deepcopy(game_data) if game_data else None
+
+
+class InMemoryUserRepository:
+    def __init__(self):
+        self.users: Dict[str, UserDB] = {}
+
+    def insert_user(self, user: UserDB):
+        if self.find_user_by_username(user.username):
+            raise ValueError("Username existiert bereits")
+        self.users[user.user_id] = user.model_copy()
+
+    def find_user_by_username(self, username: str) -> UserDB | None:
+        user = next((user for user in self.users.values() if user.username == username), None)
+        return user.model_copy() if user else None
+
+    def find_user_by_id(self, user_id: str) -> UserDB | None:
+        user = self.users.get(user_id)
+        return user.model_copy() if user else None
+
+    def update_user(self, user_id: str, update_data: dict) -> UserDB | None:
+        if not update_data or user_id not in self.users:
+            return None
+        self.users[user_id] = self.users[user_id].model_copy(update=update_data)
+        return self.users[user_id].model_copy()
+
+    def delete_user(self, user_id: str) -> bool:
+        return self.users.pop(user_id, None) is not None
@@ -1,13 +1,18 @@
 from database.mongodb import users_collection
 from models.user import UserDB
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 
 class UserRepository:
     def insert_user(self, user: UserDB):
         user_dict = user.model_dump(by_alias=True)
         user_dict["_id"] = user_dict.pop("user_id")
-        users_collection.insert_one(user_dict)
+        try:
+            users_collection.insert_one(user_dict)
+        except DuplicateKeyError:
+            # Unique-Index auf username: gleichzeitige Registrierung mit demselben Namen.
+            raise ValueError("Username existiert bereits")
 
     def find_user_by_username(self, username: str) -> UserDB | None:
         user_data = users_collection.find_one({"username": username})
@@ -27,11 +32,15 @@ class UserRepository:
         if not update_data:
             return None
 
-        updated_user = users_collection.find_one_and_update(
-            {"_id": user_id},
-            {"$set": update_data},
-            return_document=ReturnDocument.AFTER
-        )
+        try:
+            updated_user = users_collection.find_one_and_update(
+                {"_id": user_id},
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Unique-Index auf username: Umbenennen auf einen vergebenen Namen.
+            raise ValueError("Username existiert bereits")
 
         if updated_user:
             updated_user["user_id"] = str(updated_user.pop("_id"))
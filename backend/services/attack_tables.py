@@ -0,0 +1,76 @@
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+NORTH, SOUTH, WEST, EAST, NORTH_WEST, NORTH_EAST, SOUTH_WEST, SOUTH_EAST = range(8)
+DIRECTION_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+ORTHOGONAL_DIRECTIONS = (NORTH, SOUTH, WEST, EAST)
+DIAGONAL_DIRECTIONS = (NORTH_WEST, NORTH_EAST, SOUTH_WEST, SOUTH_EAST)
+POSITIVE_DIRECTIONS = frozenset(
+    direction for direction, (row_step, col_step) in enumerate(DIRECTION_STEPS) if row_step * 8 + col_step > 0
+)
+
+
+def _build_leaper_table(offsets) -> list[int]:
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        attacks = 0
+        for row_step, col_step in offsets:
+            r, c = row + row_step, col + col_step
+            if 0 <= r < 8 and 0 <= c < 8:
+                attacks |= 1 << (r * 8 + c)
+        table.append(attacks)
+    return table
+
+
+def _build_ray_table() -> list[list[int]]:
+    table = []
+    for row_step, col_step in DIRECTION_STEPS:
+        rays = []
+        for square in range(64):
+            row, col = divmod(square, 8)
+            ray = 0
+            r, c = row + row_step, col + col_step
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray |= 1 << (r * 8 + c)
+                r += row_step
+                c += col_step
+            rays.append(ray)
+        table.append(rays)
+    return table
+
+
+KNIGHT_ATTACKS = _build_leaper_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _build_leaper_table(KING_OFFSETS)
+# Index 0 = weiße Bauern (ziehen Richtung Reihe 0), Index 1 = schwarze Bauern.
+PAWN_ATTACKS = (
+    _build_leaper_table(((-1, -1), (-1, 1))),
+    _build_leaper_table(((1, -1), (1, 1))),
+)
+RAYS = _build_ray_table()
+
+
+def ray_attacks(square: int, occupied: int, direction: int) -> int:
+    ray = RAYS[direction][square]
+    blockers = ray & occupied
+    if blockers:
+        if direction in POSITIVE_DIRECTIONS:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        ray ^= RAYS[direction][blocker]
+    return ray
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    return (ray_attacks(square, occupied, NORTH) | ray_attacks(square, occupied, SOUTH) |
+            ray_attacks(square, occupied, WEST) | ray_attacks(square, occupied, EAST))
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    return (ray_attacks(square, occupied, NORTH_WEST) | ray_attacks(square, occupied, NORTH_EAST) |
+            ray_attacks(square, occupied, SOUTH_WEST) | ray_attacks(square, occupied, SOUTH_EAST))
+
+
+def queen_attacks(square: int, occupied: int) -> int:
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
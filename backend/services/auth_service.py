@@ -1,14 +1,13 @@
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from passlib.context import CryptContext
 from models.user import UserResponse
 from repositories.user_repo import UserRepository
+from repositories.async_repo import AsyncUserRepository
+from fastapi.concurrency import run_in_threadpool
 from jwt.exceptions import ExpiredSignatureError
 import jwt
 import os
 
-load_dotenv()
-
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 90))
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -20,6 +19,15 @@ token_blacklist = set()
 class AuthService:
     def __init__(self, user_repo: UserRepository = None):
         self.user_repo = user_repo or UserRepository()
+
+    @property
+    def user_repo(self):
+        return self._user_repo
+
+    @user_repo.setter
+    def user_repo(self, user_repo):
+        self._user_repo = user_repo
+        self.async_user_repo = AsyncUserRepository(user_repo)
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -49,11 +57,12 @@ class AuthService:
     def verify_password(password: str, hashed_password: str) -> bool:
         return pwd_context.verify(password, hashed_password)
     
-    def authenticate_user(self, username: str, password: str) -> UserResponse | None:
-        user_data = self.user_repo.find_user_by_username(username)
+    async def authenticate_user(self, username: str, password: str) -> UserResponse | None:
+        user_data = await self.async_user_repo.find_user_by_username(username)
         if not user_data:
             return None
-        if not self.verify_password(password, user_data.password_hash):
+        # bcrypt ist absichtlich langsam und würde sonst die Event-Loop blockieren.
+        if not await run_in_threadpool(self.verify_password, password, user_data.password_hash):
             return None
 
         return UserResponse(user_id=user_data.user_id, username=user_data.username)
@@ -1,41 +1,56 @@
 from models.chess_board import ChessBoard
 from models.figure import Figure, FigureColor, Pawn, Rook, Knight, Bishop, Queen, King
+from models.bitboard_position import square_name
+from models.piece_board import PieceBoard
 from typing import List, Optional
 
+BACK_RANK = (Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook)
+
+
+def _build_start_position_template() -> tuple:
+    # IDs aus Farbe, Figur und Startfeld statt uuid4, z. B. "white-rook-a1".
+    def create_figure(figure_class, color: FigureColor, row: int, col: int) -> Figure:
+        figure_id = f"{color.value}-{figure_class.__name__.lower()}-{square_name(row * 8 + col)}"
+        return figure_class(id=figure_id, color=color, position=(row, col))
+
+    rows = [tuple(None for _ in range(8)) for _ in range(8)]
+    rows[0] = tuple(create_figure(figure_class, FigureColor.BLACK, 0, col) for col, figure_class in enumerate(BACK_RANK))
+    rows[1] = tuple(create_figure(Pawn, FigureColor.BLACK, 1, col) for col in range(8))
+    rows[6] = tuple(create_figure(Pawn, FigureColor.WHITE, 6, col) for col in range(8))
+    rows[7] = tuple(create_figure(figure_class, FigureColor.WHITE, 7, col) for col, figure_class in enumerate(BACK_RANK))
+    return tuple(rows)
+
+
+# Unveränderliche Vorlage: wird nie herausgegeben, neue Spiele bekommen Kopien.
+START_POSITION_TEMPLATE = _build_start_position_template()
+START_POSITION_PIECES = PieceBoard.from_squares(START_POSITION_TEMPLATE)
+# Bereits im Speicherformat des ChessGameRepository serialisiert: kompakt (GAME_BOARD_ENCODING="fen")
+# und im alten squares-Format.
+START_POSITION_COMPACT = START_POSITION_PIECES.to_compact()
+START_POSITION_DOCUMENT = tuple(tuple(row) for row in START_POSITION_PIECES.to_document())
+
+
 class ChessBoardService:
     def __init__(self, board: Optional[ChessBoard] = None):
         self.board = board if board else ChessBoard.create_empty_board()
 
 
     def initialize_board(self) -> ChessBoard:
-        self.board = ChessBoard(squares=self.create_start_position())
+        # Die Kopien der Vorlage sind bereits gültige Figuren, eine erneute Validierung ist unnötig.
+        self.board = ChessBoard.model_construct(squares=self.create_start_position())
         return self.board
 
     @staticmethod
     def create_start_position() -> List[List[Optional[Figure]]]:
-        board = ChessBoard.create_empty_board().squares
-
-        board[0] = [
-            Rook(color=FigureColor.BLACK, position=(0, 0)),
-            Knight(color=FigureColor.BLACK, position=(0, 1)),
-            Bishop(color=FigureColor.BLACK, position=(0, 2)),
-            Queen(color=FigureColor.BLACK, position=(0, 3)),
-            King(color=FigureColor.BLACK, position=(0, 4)),
-            Bishop(color=FigureColor.BLACK, position=(0, 5)),
-            Knight(color=FigureColor.BLACK, position=(0, 6)),
-            Rook(color=FigureColor.BLACK, position=(0, 7)),
-        ]
-        board[1] = [Pawn(color=FigureColor.BLACK, position=(1, i)) for i in range(8)]
-
-        board[6] = [Pawn(color=FigureColor.WHITE, position=(6, i)) for i in range(8)]
-        board[7] = [
-            Rook(color=FigureColor.WHITE, position=(7, 0)),
-            Knight(color=FigureColor.WHITE, position=(7, 1)),
-            Bishop(color=FigureColor.WHITE, position=(7, 2)),
-            Queen(color=FigureColor.WHITE, position=(7, 3)),
-            King(color=FigureColor.WHITE, position=(7, 4)),
-            Bishop(color=FigureColor.WHITE, position=(7, 5)),
-            Knight(color=FigureColor.WHITE, position=(7, 6)),
-            Rook(color=FigureColor.WHITE, position=(7, 7)),
-        ]
-        return board
+        return [[figure.model_copy() if figure else None for figure in row] for row in START_POSITION_TEMPLATE]
+
+    @staticmethod
+    def start_position_document() -> List[List[Optional[dict]]]:
+        return [[dict(figure) if figure else None for figure in row] for row in START_POSITION_DOCUMENT]
+
+    @staticmethod
+    def start_board_document(encoding: str) -> dict:
+        """Das gespeicherte Brett eines neuen Spiels im Format des Repositorys, ohne es neu zu kodieren."""
+        if encoding == "squares":
+            return {"squares": ChessBoardService.start_position_document()}
+        return {"fen": START_POSITION_COMPACT["fen"], "ids": dict(START_POSITION_COMPACT["ids"]), "moved": []}
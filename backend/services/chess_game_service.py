@@ -1,56 +1,148 @@
 from models.chess_game import ChessGame, GameStatus
+from models.game_state import GameState
 from models.user import UserInGame, PlayerColor, PlayerStatus
-from models.figure import Figure, FigureColor, Pawn, Rook, Knight, Bishop, Queen, King
+from models.figure import Figure, Pawn, Rook, Knight, Bishop, Queen, King, FigureColor
 from repositories.chess_game_repo import ChessGameRepository
-from services.chess_board_service import ChessBoardService
-from models.figure import King, Queen, Bishop, Knight, Rook, Pawn, FigureColor
+from repositories.game_store import GameStore
+from repositories.async_repo import AsyncChessGameRepository
+from services.chess_board_service import ChessBoardService, START_POSITION_PIECES
 from services.move_validation_service import MoveValidationService
 from services.chess_lobby_service import ChessLobbyService
+from services.zobrist_service import ZobristService
+from services.legal_move_cache import LegalMoveCache, PositionAnalysis
+from services.game_snapshot_cache import GameSnapshotCache
+from services.connection_manager import ConnectionManager
+from services.pubsub_backplane import create_backplane
+from models.bitboard_position import (
+    BitboardPosition, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PIECE_NAMES, COLORS,
+    piece_code, color_index, square_index
+)
+from models.piece_board import PieceBoard, EMPTY
 from typing import Dict, List
 from fastapi.websockets import WebSocket
 from datetime import datetime
-import copy
 import asyncio
+import json
+import os
+import weakref
 
 class ChessGameException(Exception):
     """Benutzerdefinierte Exception für Schachspiel-Fehler."""
     pass
 
 LOBBY_NOT_FOUND_ERROR = "Lobby nicht gefunden."
+REPETITION_DRAW_COUNT = 3
+# Wie oft und in welchem Abstand ein Stand neu gelesen wird, der hinter der von einem anderen Worker gemeldeten seq liegt.
+GAME_RELOAD_ATTEMPTS = int(os.getenv("GAME_RELOAD_ATTEMPTS", 5))
+GAME_RELOAD_DELAY = float(os.getenv("GAME_RELOAD_DELAY", 0.05))
+START_POSITION_HASH = ZobristService.format_hash(ZobristService.hash_position(START_POSITION_PIECES.to_position(FigureColor.WHITE)))
+
+PROMOTION_CHOICES = {
+    "queen": QUEEN,
+    "rook": ROOK,
+    "bishop": BISHOP,
+    "knight": KNIGHT
+}
 
 class ChessGameService:
     def __init__(self):
+        self.game_store = GameStore()
         self.game_repo = ChessGameRepository()
-        self.active_game_connections: Dict[str, List[WebSocket]] = {}
+        self.game_connections = ConnectionManager("game")
+        # Broadcasts laufen über das Backplane, damit auch die Clients anderer Worker sie bekommen.
+        self.backplane = create_backplane()
+        self.backplane.subscribe("game", self.deliver_game_message)
+        self.game_locks = weakref.WeakValueDictionary()
         self.lobby_service = ChessLobbyService()
+        self.legal_move_cache = LegalMoveCache()
+        self.snapshot_cache = GameSnapshotCache()
         
         print(f"🕵️‍♂️ Instanz-Check ChessLobbyService in GameService: {id(self.lobby_service)}")
         
+    @property
+    def game_repo(self):
+        return self._game_repo
+
+    @game_repo.setter
+    def game_repo(self, game_repo):
+        # Der GameStore schreibt immer über das aktuelle Repository, auch wenn es ersetzt wird.
+        self._game_repo = game_repo
+        self.async_game_repo = AsyncChessGameRepository(game_repo)
+        self.game_store.repo = game_repo
+
+    def game_lock(self, game_id: str) -> asyncio.Lock:
+        # Züge eines Spiels laufen nacheinander, auch wenn sie an await-Punkten unterbrochen werden.
+        lock = self.game_locks.get(game_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.game_locks[game_id] = lock
+        return lock
+
     async def connect(self, websocket: WebSocket, game_id: str):
-        if game_id not in self.active_game_connections:
-            self.active_game_connections[game_id] = []
-        self.active_game_connections[game_id].append(websocket)
+        self.game_connections.connect(websocket, game_id)
 
     def disconnect(self, websocket: WebSocket, game_id: str):
-        if game_id in self.active_game_connections:
-            self.active_game_connections[game_id].remove(websocket)
-            if not self.active_game_connections[game_id]:
-                del self.active_game_connections[game_id]
+        if self.game_connections.disconnect(websocket, game_id):
+            self.snapshot_cache.invalidate(game_id)
 
     async def broadcast(self, game_id: str, message: dict):
-        
-        if game_id in self.active_game_connections:
-            
-            for index, ws in enumerate(self.active_game_connections[game_id]):
-                try:
-                    await ws.send_json(message)
-                except Exception as e:
-                    print(f"Fehler beim Senden an WebSocket [{index+1}]: {e}")
-        else:
+        # Einmal serialisieren statt send_json pro Verbindung; gleiche Kodierung wie send_json.
+        await self.broadcast_text(game_id, json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+    async def broadcast_game_state(self, game: GameState):
+        await self.broadcast_text(game.game_id, self.snapshot_cache.get(game))
+
+    async def send_game_state(self, websocket: WebSocket, game: GameState):
+        # Vollständiger Stand nur für diese Verbindung: beim Verbinden und wenn der Client eine Lücke meldet.
+        self.game_connections.send_text(websocket, game.game_id, self.snapshot_cache.get(game))
+
+    async def send_error(self, websocket: WebSocket, game_id: str, message: str, flush: bool = False):
+        # Über die Warteschlange der Verbindung, damit der Fehler nicht zwischen eingereihte Nachrichten gerät.
+        text = json.dumps({"type": "error", "message": message}, separators=(",", ":"), ensure_ascii=False)
+        self.game_connections.send_text(websocket, game_id, text)
+        if flush:
+            await self.game_connections.flush(websocket, game_id)
+
+    async def broadcast_game_delta(self, game: GameState, squares: list[int], move: dict | None = None):
+        """Zählt die Sequenz hoch, verschickt das Delta und speichert das Spiel. Mit mehreren Workern wird
+        vorher direkt nach Mongo geschrieben, damit ein anderer Worker beim Neuladen schon diesen Stand findet."""
+        # Die Sequenz zählt jede Änderung mit, auch wenn gerade niemand zuschaut.
+        game.seq += 1
+        if self.backplane.distributed:
+            await self.game_store.save(game, write_through=True)
+            await self.broadcast_text(game.game_id, GameSnapshotCache.serialize_delta(game, squares, move))
+            return
+
+        # Dasselbe Delta geht an die Clients und als Eintrag ins Journal des GameStore.
+        delta = None
+        if game.game_id in self.game_connections or self.game_store.journaling:
+            delta = GameSnapshotCache.serialize_delta(game, squares, move)
+        if game.game_id in self.game_connections:
+            await self.broadcast_text(game.game_id, delta)
+        await self.game_store.save(game, delta=delta)
+
+    async def broadcast_text(self, game_id: str, text: str):
+        await self.backplane.publish("game", game_id, text)
+
+    def deliver_game_message(self, game_id: str, text: str, remote: bool):
+        if remote:
+            # Ein anderer Worker hat das Spiel geändert: den eigenen Stand im Speicher beim nächsten Zugriff neu laden,
+            # aber erst, wenn Mongo mindestens den gemeldeten Stand hat.
+            self.game_store.release(game_id, self.message_seq(text))
+        # Nur einreihen: gesendet wird von den Writer-Tasks der Verbindungen, parallel für alle Clients.
+        if not self.game_connections.broadcast_text(game_id, text) and not self.backplane.distributed:
             print(f"[BROADCAST] Keine aktiven WebSocket-Verbindungen für game_id={game_id}.")
-                
-    async def start_game(self, game_id: str, user_id: str) -> ChessGame:
-        lobby = self.lobby_service.get_lobbies(game_id)
+
+    @staticmethod
+    def message_seq(text: str) -> int:
+        try:
+            seq = json.loads(text).get("seq")
+        except (ValueError, AttributeError):
+            return 0
+        return seq if isinstance(seq, int) else 0
+
+    async def start_game(self, game_id: str, user_id: str) -> GameState:
+        lobby = await self.lobby_service.get_lobby(game_id)
         if not lobby:
             raise ChessGameException("Lobby nicht gefunden.")
 
@@ -69,11 +161,8 @@ class ChessGameService:
         if any(player.status != PlayerStatus.READY for player in lobby.players):
             raise ChessGameException("Beide Spieler müssen bereit sein.")
 
-        chess_board_service = ChessBoardService()
-        chess_board_service.initialize_board()
-        chess_board = chess_board_service.board
-
-        game = ChessGame(
+        # Das Brett ist eine Kopie der vorberechneten Startstellung, ohne eine einzige pydantic-Figur.
+        game = GameState(
             game_id=game_id,
             time_stamp_start=datetime.now(),
             player_white=UserInGame(
@@ -87,36 +176,101 @@ class ChessGameService:
                 color=player_black.color
             ),
             current_turn=PlayerColor.WHITE,
-            board=chess_board,
-            status=GameStatus.RUNNING
+            pieces=START_POSITION_PIECES.copy(),
+            status=GameStatus.RUNNING,
+            king_positions={FigureColor.WHITE.value: (7, 4), FigureColor.BLACK.value: (0, 4)},
+            position_hash=START_POSITION_HASH,
+            repetition_counts={START_POSITION_HASH: 1}
         )
 
-        if isinstance(game, dict):
-            game = ChessGame(**game)
-
-        self.game_repo.insert_game(game.model_dump())
+        game_document = game.to_document(board=ChessBoardService.start_board_document(self.game_repo.board_encoding))
+        await self.async_game_repo.insert_game(game_document)
+        MoveValidationService.update_attack_maps(game.position)
+        self.game_store.put(game)
         await self.lobby_service.notify_game_start(game.game_id)
         await asyncio.sleep(5)
-        await self.broadcast(game_id, {"type": "game_state", "data": game.model_dump()})
+        await self.broadcast_game_state(game)
         return game
 
-    def get_game_state(self, game_id: str) -> ChessGame | None:
-        game_data = self.game_repo.find_game_by_id(game_id)
-        
+    def get_game_state(self, game_id: str) -> ChessGame:
+        """Der Spielstand als ChessGame für die API; intern wird mit dem GameState gearbeitet."""
+        game = self.game_store.get(game_id)
+        if game is None:
+            game = self.build_game(self.game_repo.find_game_state(game_id))
+
+        return game.to_chess_game()
+
+    async def load_game(self, game_id: str) -> GameState:
+        game = self.game_store.get(game_id)
+        if game is not None:
+            return game
+
+        expected_seq = self.game_store.expected_seq(game_id)
+        for attempt in range(GAME_RELOAD_ATTEMPTS):
+            game = await self.async_game_repo.find_game_state(game_id)
+            if game is None or game.seq >= expected_seq:
+                return self.build_game(game)
+            await asyncio.sleep(GAME_RELOAD_DELAY)
+        raise ValueError("Spielstand wird gerade aktualisiert, bitte erneut versuchen.")
+
+    def build_game(self, game: GameState | None) -> GameState:
+        # Das Repository baut den GameState direkt aus dem Dokument, siehe ChessGameRepository.find_game_state.
+        if not game:
+            raise ValueError("Spiel nicht gefunden.")
+
+        MoveValidationService.update_attack_maps(game.position)
+        self.game_store.put(game)
+        return game
+
+    async def get_legal_moves(self, game_id: str) -> dict:
+        game = self.game_store.get(game_id)
+        if game is not None:
+            game_data = {"game_id": game.game_id, "current_turn": game.current_turn.value, "status": game.status}
+        else:
+            game_data = await self.async_game_repo.find_game_document(game_id, decode_board=False)
+
         if not game_data:
             raise ValueError("Spiel nicht gefunden.")
-        
-        if isinstance(game_data, ChessGame):
-            game_dict = game_data.model_dump()
+
+        if game_data["status"] != GameStatus.RUNNING:
+            return {"game_id": game_data["game_id"], "current_turn": game_data["current_turn"], "legal_moves": [],
+                    "in_check": False, "checkmate": False, "stalemate": False}
+
+        analysis = self.get_position_analysis(game) if game is not None else self.get_document_analysis(game_data)
+        return {
+            "game_id": game_data["game_id"],
+            "current_turn": game_data["current_turn"],
+            "legal_moves": [{"start": start_pos, "end": end_pos} for start_pos, end_pos in analysis.legal_moves],
+            "in_check": analysis.in_check,
+            "checkmate": analysis.checkmate,
+            "stalemate": analysis.stalemate,
+        }
+
+    def get_document_analysis(self, game_data: dict) -> PositionAnalysis:
+        # Arbeitet direkt auf dem gespeicherten Dokument, ohne pydantic-Figuren zu bauen.
+        current_turn = game_data["current_turn"]
+        position = None
+        if game_data.get("position_hash"):
+            key = (ZobristService.parse_hash(game_data["position_hash"]), current_turn)
         else:
-            game_dict = game_data
+            position = self.document_position(game_data)
+            key = (ZobristService.hash_position(position), current_turn)
 
-        for row in game_dict["board"]["squares"]:
-            for i, figure in enumerate(row):
-                if figure:
-                    row[i] = self.convert_figure(figure)
+        analysis = self.legal_move_cache.get(key)
+        if analysis is None:
+            analysis = MoveValidationService.evaluate_bitboard_position(position or self.document_position(game_data))
+            self.legal_move_cache.put(key, analysis)
+        return analysis
 
-        return ChessGame(**game_dict)
+    @staticmethod
+    def document_position(game_data: dict) -> BitboardPosition:
+        board = game_data["board"]
+        pieces = PieceBoard.from_compact(board) if "fen" in board else PieceBoard.from_squares(board["squares"])
+        return pieces.to_position(game_data["current_turn"], game_data.get("last_move"))
+
+    def get_position_analysis(self, game: GameState) -> PositionAnalysis:
+        key = (self.get_position_hash(game), game.current_turn)
+        return self.legal_move_cache.get_or_compute(key, lambda: MoveValidationService.evaluate_bitboard_position(game.position))
 
     @staticmethod
     def convert_figure(figure_data: dict) -> Figure:
@@ -136,8 +290,12 @@ class ChessGameService:
         
         raise ValueError(f"Unbekannte Figur: {figure_data}")
 
-    async def move_figure(self, start_pos: tuple[int, int], end_pos: tuple[int, int], game_id: str, user_id: str) -> ChessGame | None:
-        game = self.get_game_state(game_id)        
+    async def move_figure(self, start_pos: tuple[int, int], end_pos: tuple[int, int], game_id: str, user_id: str) -> GameState | None:
+        async with self.game_lock(game_id):
+            return await self.execute_move(start_pos, end_pos, game_id, user_id)
+
+    async def execute_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int], game_id: str, user_id: str) -> GameState | None:
+        game = await self.load_game(game_id)        
 
         if (game.current_turn == PlayerColor.WHITE and user_id != game.player_white.user_id) or \
             (game.current_turn == PlayerColor.BLACK and user_id != game.player_black.user_id):
@@ -146,108 +304,174 @@ class ChessGameService:
         if game.status != GameStatus.RUNNING:
             raise ValueError("Spiel ist bereits beendet.")
 
-        figure = game.board.squares[start_pos[0]][start_pos[1]]
-        figure = self.convert_figure(figure) if isinstance(figure, dict) else figure
+        pieces, position = game.pieces, game.position
+        start_square, end_square = square_index(start_pos), square_index(end_pos)
+        code = pieces.codes[start_square] if MoveValidationService.is_within_board(start_pos) else EMPTY
         
-        if figure is None:
+        if code == EMPTY:
             raise ValueError("Du hast ein leeres Feld ausgewählt!")
         
-        if figure.color.value != game.current_turn:
-            raise ValueError(f"Es ist {game.current_turn}'s Zug!")
-        
-        if not MoveValidationService.is_move_valid(figure, start_pos, end_pos, game.board, game):
-            raise ValueError("Ungültiger Zug - from MoveValidationService!")
-        
-        if MoveValidationService.is_king_in_check(game, game.board)[0]:
-            raise ValueError("Zug nicht möglich! Dein König steht im Schach!")
-        
-        if MoveValidationService.simulate_move_and_check(game, game.board, start_pos, end_pos):
-            raise ValueError("Zug nicht möglich! Dein König stünde im Schach!")
+        if code // 6 != color_index(game.current_turn):
+            raise ValueError(f"Es ist {game.current_turn.value}'s Zug!")
         
-        if captured_figure := game.board.squares[end_pos[0]][end_pos[1]]:
-            capturing_player = game.player_black if captured_figure.color == FigureColor.WHITE else game.player_white
-            capturing_player.captured_figures.append(copy.deepcopy(captured_figure))
-
-        game.board.squares[end_pos[0]][end_pos[1]] = figure
-        game.board.squares[start_pos[0]][start_pos[1]] = None
-        figure.position = end_pos
+        if (start_pos, end_pos) not in self.get_position_analysis(game).legal_moves:
+            self.raise_illegal_move_error(start_pos, end_pos, game)
+
+        color, kind = divmod(code, 6)
+        # Ein Bauer auf der letzten Reihe wird automatisch zur Dame.
+        promotion = QUEEN if kind == PAWN and end_pos[0] in (0, 7) else None
+        move = (start_square, end_square, promotion)
+
+        position_hash = self.get_position_hash(game)
+        state_before = ZobristService.position_state_key(position)
+        undo = position.make_move(move)
+        MoveValidationService.update_attack_maps(position)
+        position_hash = ZobristService.update_for_position_move(position_hash, move, undo)
+        position_hash ^= state_before ^ ZobristService.position_state_key(position)
+
+        captured_figure = pieces.figure_json(undo.captured_square) if undo.captured is not None else None
+        changed_squares = pieces.make_move(start_square, end_square)
+
+        if kind == KING:
+            game.king_positions[COLORS[color].value] = end_pos
+
+        if captured_figure:
+            capturing_player = game.player_black if captured_figure["color"] == FigureColor.WHITE else game.player_white
+            capturing_player.captured_figures.append(captured_figure)
                 
         active_player = game.player_white if game.current_turn == PlayerColor.WHITE else game.player_black
-        notation = f"{figure.position}{start_pos[1]}{start_pos[0]}{end_pos[1]}{end_pos[0]}"
+        notation = f"{end_pos}{start_pos[1]}{start_pos[0]}{end_pos[1]}{end_pos[0]}"
         active_player.move_history.append(notation)
         
         game.last_move = {
-            "figure": figure,
+            "figure": pieces.figure_json(end_square),
             "start": start_pos,
             "end": end_pos,
-            "two_square_pawn_move": isinstance(figure, Pawn) and abs(start_pos[0] - end_pos[0]) == 2
+            "two_square_pawn_move": kind == PAWN and abs(start_pos[0] - end_pos[0]) == 2
         }
         
-        if isinstance(figure, (King, Rook)):
-            figure.has_moved = True
-            
-        if isinstance(figure, Pawn) and (end_pos[0] == 0 or end_pos[0] == 7):
-            await self.promote_pawn(game_id, end_pos, "queen")
+        if promotion is not None:
+            pieces.promote(end_square, promotion)
 
         game.current_turn = PlayerColor.BLACK if game.current_turn == PlayerColor.WHITE else PlayerColor.WHITE
-                
-        await self.broadcast(game_id, {"type": "game_state", "data": game.model_dump()})
-        
-        king_in_check, _ = MoveValidationService.is_king_in_check(game, game.board)
-        
-        if MoveValidationService.is_stalemate(game, game.board):
+
+        irreversible = undo.captured is not None or kind == PAWN or undo.castling_rights != position.castling_rights
+        repetition_count = self.record_position(game, position_hash, irreversible)
+
+        evaluation = self.get_position_analysis(game)
+        if evaluation.stalemate or evaluation.checkmate or repetition_count >= REPETITION_DRAW_COUNT:
             game.status = GameStatus.ENDED
-            self.game_repo.insert_game(game)
+
+        await self.broadcast_game_delta(game, changed_squares, {
+            "start": list(start_pos),
+            "end": list(end_pos),
+            "color": COLORS[color].value,
+            "notation": notation,
+            "captured": captured_figure,
+            "promotion": PIECE_NAMES[promotion] if promotion is not None else None,
+        })
+
+        if evaluation.stalemate:
             raise ValueError("Patt! Spiel endet unentschieden!")
 
-        if MoveValidationService.is_king_checkmate(game, game.board):
-            game.status = GameStatus.ENDED
-            self.game_repo.insert_game(game)
+        if evaluation.checkmate:
             winner = PlayerColor.WHITE if game.current_turn == PlayerColor.BLACK else PlayerColor.BLACK
             loser = game.current_turn
             
             await self.send_notification(game.game_id, f"Schachmatt! {winner} hat gewonnen! {loser} hat verloren!")
         
             raise ValueError(f"Schachmatt! {winner} hat gewonnen! {loser} hat verloren!")
-        
-        self.game_repo.insert_game(game)
-        
-        if king_in_check:
+
+        if repetition_count >= REPETITION_DRAW_COUNT:
+            raise ValueError("Remis durch dreifache Stellungswiederholung!")
+
+        if evaluation.in_check:
             raise ValueError(f"Schach! {game.current_turn.value} ist im Schach!")
         
         return game
     
+    @staticmethod
+    def raise_illegal_move_error(start_pos: tuple[int, int], end_pos: tuple[int, int], game: GameState):
+        # Nur für abgelehnte Züge: die ausführliche Prüfung liefert die passende Fehlermeldung.
+        position = game.position
+        start_square, end_square = square_index(start_pos), square_index(end_pos)
+        move = next((move for move in MoveValidationService.generate_pseudo_legal_moves(position)
+                     if move[0] == start_square and move[1] == end_square), None)
+        if move is None:
+            raise ValueError("Ungültiger Zug - from MoveValidationService!")
+        
+        if MoveValidationService.is_king_in_check_position(position):
+            raise ValueError("Zug nicht möglich! Dein König steht im Schach!")
+        
+        if not MoveValidationService.is_legal_position_move(position, move):
+            raise ValueError("Zug nicht möglich! Dein König stünde im Schach!")
+
+        raise ValueError("Ungültiger Zug - from MoveValidationService!")
+
     async def send_notification(self, game_id: str, message: str):
         await self.broadcast(game_id, {"type": "notification", "message": message})
 
-    async def promote_pawn(self, game_id: str, position: tuple[int, int], promotion_choice: str) -> ChessGame:
-        game = self.get_game_state(game_id)
+    @staticmethod
+    def get_position_hash(game: GameState) -> int:
+        if game.position_hash:
+            return ZobristService.parse_hash(game.position_hash)
+
+        # Ältere Spiele ohne Hash: einmal vollständig berechnen und die aktuelle Stellung mitzählen.
+        position_hash = ZobristService.hash_position(game.position)
+        game.position_hash = ZobristService.format_hash(position_hash)
+        game.repetition_counts = {game.position_hash: 1}
+        return position_hash
+
+    @staticmethod
+    def record_position(game: GameState, position_hash: int, irreversible: bool = False) -> int:
+        game.position_hash = ZobristService.format_hash(position_hash)
+        if irreversible:
+            # Nach Schlag- oder Bauernzügen und verlorenen Rochaderechten kann sich keine frühere Stellung wiederholen.
+            game.repetition_counts = {}
+
+        count = game.repetition_counts.get(game.position_hash, 0) + 1
+        game.repetition_counts[game.position_hash] = count
+        return count
 
+    @staticmethod
+    def apply_promotion(game: GameState, position: tuple[int, int], promotion_choice: str) -> tuple[int, int]:
+        """Wandelt den Bauern auf dem Brett und in der Stellung um; liefert (Bauerncode, neuer Figurencode)."""
         row, col = position
-        figure = game.board.squares[row][col]
+        square = square_index(position)
+        code = game.pieces.codes[square]
 
-        if not isinstance(figure, Pawn):
+        if code == EMPTY or code % 6 != PAWN:
             raise ValueError("Nur Bauern können umgewandelt werden.")
 
-        promotion_row = 0 if figure.color == FigureColor.WHITE else 7
+        promotion_row = 0 if code // 6 == color_index(FigureColor.WHITE) else 7
         if row != promotion_row:
             raise ValueError("Der Bauer hat die letzte Reihe noch nicht erreicht.")
 
-        valid_choices = {
-            "queen": Queen,
-            "rook": Rook,
-            "bishop": Bishop,
-            "knight": Knight
-        }
-
-        chosen_figure = valid_choices.get(promotion_choice.lower())
-        if chosen_figure is None:
+        kind = PROMOTION_CHOICES.get(promotion_choice.lower())
+        if kind is None:
             raise ValueError("Ungültige Umwandlungsfigur. Wähle: 'queen', 'rook', 'bishop' oder 'knight'.")
 
-        promoted_figure = chosen_figure(color=figure.color, position=position, id=figure.id)
-        game.board.squares[row][col] = promoted_figure
+        game.pieces.promote(square, kind)
+        promoted_code = piece_code(code // 6, kind)
+        game.position.replace_piece(square, promoted_code)
+        MoveValidationService.update_attack_maps(game.position)
+        return code, promoted_code
 
-        self.game_repo.insert_game(game)
+    async def promote_pawn(self, game_id: str, position: tuple[int, int], promotion_choice: str) -> GameState:
+        async with self.game_lock(game_id):
+            game = await self.load_game(game_id)
 
-        return game
-    
\ No newline at end of file
+            position_hash = self.get_position_hash(game)
+            pawn_code, promoted_code = self.apply_promotion(game, position, promotion_choice)
+
+            # Die Stellung mit dem Bauern auf der letzten Reihe wird durch die umgewandelte ersetzt.
+            if game.repetition_counts.get(game.position_hash, 0) > 1:
+                game.repetition_counts[game.position_hash] -= 1
+            else:
+                game.repetition_counts.pop(game.position_hash, None)
+            square = square_index(position)
+            self.record_position(game, ZobristService.update_for_piece_change(position_hash, pawn_code, promoted_code, square))
+
+            await self.broadcast_game_delta(game, [square])
+
+            return game
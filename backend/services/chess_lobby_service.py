@@ -1,9 +1,21 @@
+import json
+import os
 import uuid
+from fastapi.concurrency import run_in_threadpool
 from fastapi.websockets import WebSocket
+from repositories.lobby_registry import LobbyRegistryView, create_lobby_registry
+from services.connection_manager import ConnectionManager
+from services.lobby_directory import LobbyDirectory
+from services.lobby_listing_cache import LobbyListingCache, LobbyListPage
+from services.pubsub_backplane import create_backplane
 from models.lobby import Lobby
 from models.user import UserLobby
 
 LOBBY_NOT_FOND_ERROR = "Lobby nicht gefunden."
+LOBBY_LIST_PAGE_SIZE = int(os.getenv("LOBBY_LIST_PAGE_SIZE", 50))
+LOBBY_LIST_MAX_PAGE_SIZE = int(os.getenv("LOBBY_LIST_MAX_PAGE_SIZE", 200))
+# Lobbys im Snapshot von /lobby/directory/ws; weitere Seiten holt der Client über /lobby/list mit next_cursor.
+LOBBY_DIRECTORY_SNAPSHOT_SIZE = int(os.getenv("LOBBY_DIRECTORY_SNAPSHOT_SIZE", LOBBY_LIST_MAX_PAGE_SIZE))
 
 class ChessLobbyService:
     _instance = None
@@ -11,167 +23,176 @@ class ChessLobbyService:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ChessLobbyService, cls).__new__(cls)
-            cls._instance.game_lobbies = {}
-            cls._instance.active_lobby_connections = {}
+            cls._instance.registry = create_lobby_registry()
+            cls._instance.lobby_connections = ConnectionManager("lobby")
+            cls._instance.backplane = create_backplane()
+            cls._instance.listing_cache = LobbyListingCache()
+            cls._instance.directory = LobbyDirectory()
+            cls._instance.backplane.subscribe("lobby", cls._instance.deliver_lobby_message)
+            cls._instance.backplane.subscribe("lobby_directory", cls._instance.deliver_directory_message)
         return cls._instance
     
     def __init__(self):
         print(f"Instanz-Check ChessLobbyService: {id(self)}")
+
+    @property
+    def game_lobbies(self) -> LobbyRegistryView:
+        # Alte dict-Schnittstelle, gelesen und geschrieben wird in der Registry.
+        return LobbyRegistryView(self.registry)
+
+    @game_lobbies.setter
+    def game_lobbies(self, lobbies: dict):
+        self.registry.clear()
+        for lobby in lobbies.values():
+            self.registry.put(lobby)
+
+    async def call_registry(self, method, *args):
+        # Die Mongo-Registry blockiert und läuft im Threadpool, die In-Memory-Registry direkt in der Event-Loop.
+        if self.registry.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
                 
     def get_lobbies(self, game_id: str = None):
         if game_id:
-            return self.game_lobbies.get(game_id)
+            return self.registry.get(game_id)
         return self.game_lobbies
 
+    async def get_lobby(self, game_id: str) -> Lobby | None:
+        return await self.call_registry(self.registry.get, game_id)
+
     async def connect(self, websocket: WebSocket, game_id: str):
-        if game_id not in self.active_lobby_connections:
-            self.active_lobby_connections[game_id] = []
-        self.active_lobby_connections[game_id].append(websocket)
+        self.lobby_connections.connect(websocket, game_id)
 
     def disconnect(self, websocket: WebSocket, game_id: str):
-        if game_id in self.active_lobby_connections:
-            self.active_lobby_connections[game_id].remove(websocket)
-            
-            if not self.active_lobby_connections[game_id]:  
-                del self.active_lobby_connections[game_id]  
-                
-    async def broadcast(self, game_id: str, message: dict):
-        if game_id in self.active_lobby_connections:
-            for ws in self.active_lobby_connections[game_id]:
-                await ws.send_json(message)
+        self.lobby_connections.disconnect(websocket, game_id)
 
-    async def notify_lobby_update(self, game_id: str):
-        if game_id in self.active_lobby_connections:
-            lobby = self.game_lobbies.get(game_id)
-            if lobby:
-                data = {
-                    "type": "lobby_update",
-                    "game_id": lobby.game_id,
-                    "players": [
-                        {
-                            "user_id": user.user_id,
-                            "username": user.username,
-                            "color": user.color,
-                            "status": user.status
-                        }
-                        for user in lobby.players
-                    ]
-                }
-                for connection in self.active_lobby_connections[game_id]:
-                    await connection.send_json(data)
-        
-    async def notify_game_start(self, game_id: str):
-        if game_id not in self.active_lobby_connections:
-            return
-
-        lobby = self.game_lobbies.get(game_id)
-        if not lobby:
-            return
+    async def broadcast(self, game_id: str, message: dict):
+        # Ein fehlerhafter Client bricht die Verteilung nicht mehr ab, er wird vom ConnectionManager getrennt.
+        await self.backplane.publish("lobby", game_id, json.dumps(message, separators=(",", ":"), ensure_ascii=False))
 
-        data = {"type": "game_start", "game_id": game_id}
+    def deliver_lobby_message(self, game_id: str, text: str, remote: bool):
+        self.lobby_connections.broadcast_text(game_id, text)
 
-        for connection in self.active_lobby_connections.get(game_id, []):
-            await connection.send_json(data)
+    async def connect_directory(self, websocket: WebSocket):
+        # Auch für {"action": "sync"} nach einer Lücke in seq: neuer Snapshot, die Verbindung bleibt angemeldet.
+        await self.directory.subscribe(websocket, self.directory_snapshot)
 
-    def create_lobby(self, user: UserLobby) -> Lobby:
-        for lobby in self.game_lobbies.values():
-            if any(player.user_id == user.user_id for player in lobby.players):
-                raise ValueError("Du hast bereits eine Lobby erstellt. Du darfst aber gerne einer anderen beitreten.")
+    def disconnect_directory(self, websocket: WebSocket):
+        self.directory.disconnect(websocket)
 
-        game_id = str(uuid.uuid4()) 
+    async def directory_snapshot(self) -> str:
+        return (await self.list_lobbies_page(limit=LOBBY_DIRECTORY_SNAPSHOT_SIZE)).body
 
-        new_lobby = Lobby(
-            game_id=game_id,
-            players=[user]
-        )
+    async def notify_directory_change(self, event: str, game_id: str, lobby: Lobby | None = None):
+        """event ist "created", "updated" oder "removed". Über die Backplane erfahren auch andere Worker
+        davon, für ihre Verzeichnis-Clients und den Cache der Lobbyliste."""
+        if not self.directory.active and not self.backplane.distributed:
+            return
+        data = {"event": event, **self.lobby_data(lobby)} if lobby else {"event": event, "game_id": game_id}
+        await self.backplane.publish("lobby_directory", game_id, json.dumps(data, separators=(",", ":"), ensure_ascii=False))
 
-        self.game_lobbies[game_id] = new_lobby
-        return new_lobby
+    def deliver_directory_message(self, game_id: str, text: str, remote: bool):
+        if remote:
+            self.registry.changed()
+        if self.directory.active:
+            self.directory.push(json.loads(text))
 
-    def list_lobbies(self) -> dict:
+    @staticmethod
+    def lobby_data(lobby: Lobby) -> dict:
         return {
-            "lobbies": [
+            "game_id": lobby.game_id,
+            "players": [
                 {
-                    "game_id": lobby.game_id,
-                    "players": [
-                        {
-                            "user_id": user.user_id,
-                            "username": user.username,
-                            "color": user.color,
-                            "status": user.status
-                        }
-                        for user in lobby.players
-                    ]
+                    "user_id": user.user_id,
+                    "username": user.username,
+                    "color": user.color,
+                    "status": user.status
                 }
-                for lobby in self.game_lobbies.values()
+                for user in lobby.players
             ]
         }
 
-    async def join_lobby(self, game_id: str, user: UserLobby) -> Lobby:
-        lobby = self.game_lobbies.get(game_id)
+    async def notify_lobby_update(self, game_id: str, lobby: Lobby | None = None):
+        if game_id in self.lobby_connections or self.directory.active or self.backplane.distributed:
+            lobby = lobby or await self.get_lobby(game_id)
+            if lobby:
+                await self.notify_directory_change("updated", game_id, lobby)
+                if game_id in self.lobby_connections or self.backplane.distributed:
+                    await self.broadcast(game_id, {"type": "lobby_update", **self.lobby_data(lobby)})
+        
+    async def notify_game_start(self, game_id: str):
+        if game_id not in self.lobby_connections and not self.backplane.distributed:
+            return
+
+        lobby = await self.get_lobby(game_id)
         if not lobby:
-            raise ValueError("Lobby existiert nicht.")
+            return
 
-        if any(player.user_id == user.user_id for player in lobby.players):
-            raise ValueError("Du bist bereits in dieser Lobby.")
+        await self.broadcast(game_id, {"type": "game_start", "game_id": game_id})
+
+    async def create_lobby(self, user: UserLobby) -> Lobby:
+        new_lobby = Lobby(
+            game_id=str(uuid.uuid4()),
+            players=[user]
+        )
+        lobby = await self.call_registry(self.registry.create, new_lobby)
+        await self.notify_directory_change("created", lobby.game_id, lobby)
+        return lobby
 
-        if len(lobby.players) >= 2:
-            raise ValueError("Lobby ist bereits voll.")
+    async def list_lobbies(self, cursor: str | None = None, limit: int = LOBBY_LIST_PAGE_SIZE,
+                           open_only: bool = False, color: str | None = None) -> dict:
+        if limit < 1:
+            raise ValueError("Das Limit muss mindestens 1 sein.")
+        lobbies, next_cursor = await self.call_registry(
+            self.registry.find_page, cursor, min(limit, LOBBY_LIST_MAX_PAGE_SIZE), open_only, color
+        )
+        return {"lobbies": [self.lobby_data(lobby) for lobby in lobbies], "next_cursor": next_cursor}
+
+    async def list_lobbies_page(self, cursor: str | None = None, limit: int = LOBBY_LIST_PAGE_SIZE,
+                                open_only: bool = False, color: str | None = None) -> LobbyListPage:
+        """Wie list_lobbies, aber serialisiert und gecacht, bis sich eine Lobby ändert."""
+        version = self.registry.version
+        if self.registry.shared and not self.backplane.distributed:
+            # Änderungen anderer Worker kämen nie an und der Cache bliebe veraltet: jedes Mal neu lesen.
+            body = json.dumps(await self.list_lobbies(cursor, limit, open_only, color),
+                              separators=(",", ":"), ensure_ascii=False)
+            return LobbyListPage(body, LobbyListingCache.etag(body), version)
+
+        key = (cursor, limit, open_only, color)
+        page = self.listing_cache.get(key, version)
+        if page is None:
+            listing = await self.list_lobbies(cursor, limit, open_only, color)
+            page = self.listing_cache.put(key, version, json.dumps(listing, separators=(",", ":"), ensure_ascii=False))
+        return page
 
-        lobby.players.append(user)
+    async def join_lobby(self, game_id: str, user: UserLobby) -> Lobby:
+        lobby = await self.call_registry(self.registry.join, game_id, user)
         
-        await self.notify_lobby_update(game_id)
+        await self.notify_lobby_update(game_id, lobby)
 
         return lobby
 
     async def leave_lobby(self, game_id: str, user_id: str) -> Lobby:
-        lobby = self.game_lobbies.get(game_id)
-        if not lobby:
-            raise ValueError("Lobby nicht gefunden, oder bereits gelöscht.")
-
-        if user_id not in [player.user_id for player in lobby.players]:
-            raise ValueError("Du bist nicht mehr in dieser Lobby.")
-        
-        lobby.players.remove(next(player for player in lobby.players if player.user_id == user_id))
+        lobby = await self.call_registry(self.registry.leave, game_id, user_id)
 
-        if not lobby.players:
-            del self.game_lobbies[game_id]
+        if lobby is None:
+            await self.notify_directory_change("removed", game_id)
             return None
         
-        await self.notify_lobby_update(game_id)
+        await self.notify_lobby_update(game_id, lobby)
 
         return lobby
     
     async def set_player_color(self, game_id: str, user_id: str, color: str) -> Lobby:
-        lobby = self.game_lobbies.get(game_id)
-        if not lobby:
-            raise ValueError(LOBBY_NOT_FOND_ERROR)
-
-        player = next((player for player in lobby.players if player.user_id == user_id), None)
-        if not player:
-            raise ValueError("Spieler nicht gefunden.")
+        lobby = await self.call_registry(self.registry.set_color, game_id, user_id, color)
         
-        if any(player.color == color for player in lobby.players if player.user_id != user_id):
-            raise ValueError("Farbe bereits vergeben.")
-
-        player.color = color
-        
-        await self.notify_lobby_update(game_id)
+        await self.notify_lobby_update(game_id, lobby)
 
         return lobby
     
     async def set_player_status(self, game_id: str, user_id: str, status: str) -> Lobby:
-        lobby = self.game_lobbies.get(game_id)
-        if not lobby:
-            raise ValueError(LOBBY_NOT_FOND_ERROR)
+        lobby = await self.call_registry(self.registry.set_status, game_id, user_id, status)
         
-        player = next((player for player in lobby.players if player.user_id == user_id), None)
-        if not player:
-            raise ValueError("Spieler nicht gefunden.")
-        if player.color == None:
-            raise ValueError("Wähle zuerst eine Farbe.")
-        player.status = status
+        await self.notify_lobby_update(game_id, lobby)
         
-        await self.notify_lobby_update(game_id)
-        
-        return lobby
\ No newline at end of file
+        return lobby
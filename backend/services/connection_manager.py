@@ -0,0 +1,179 @@
+import asyncio
+import os
+from fastapi.websockets import WebSocket
+from typing import Dict, List, NamedTuple, Optional
+
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", 64))
+WEBSOCKET_SEND_TIMEOUT = float(os.getenv("WEBSOCKET_SEND_TIMEOUT", 5.0))
+# "disconnect": ein Client mit voller Warteschlange wird getrennt und muss neu verbinden (bekommt dann den
+# aktuellen Stand), "drop_oldest": die älteste wartende Nachricht wird verworfen.
+WEBSOCKET_OVERFLOW_POLICY = os.getenv("WEBSOCKET_OVERFLOW_POLICY", "disconnect")
+# 1013 = "Try Again Later"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ConnectionStats(NamedTuple):
+    connections: int
+    queued_messages: int
+    max_queue_depth: int
+    queue_size: int
+    sent_messages: int
+    dropped_messages: int
+    dropped_connections: int
+
+
+class ClientConnection:
+    """Eine WebSocket-Verbindung mit eigener, begrenzter Sendewarteschlange. Ein Writer-Task schickt
+    die Nachrichten nacheinander ab, ein langsamer Client hält damit keinen anderen auf."""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.queue_size)
+        self.closed = False
+        self.writer_task = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, text: str) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.manager.overflow_policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(text)
+            self.manager.dropped_messages += 1
+            return True
+
+        self.manager.dropped_messages += 1
+        self.manager.drop(self, "Sendewarteschlange voll")
+        return False
+
+    async def _write_loop(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), self.manager.send_timeout)
+                self.manager.sent_messages += 1
+            except Exception as e:
+                reason = "Zeitüberschreitung beim Senden" if isinstance(e, asyncio.TimeoutError) else str(e)
+                self.manager.drop(self, reason)
+                return
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Wartende Nachrichten verwerfen, damit drain() nicht auf einen toten Client wartet.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.manager.dropped_messages += 1
+        if self.writer_task is not asyncio.current_task():
+            self.writer_task.cancel()
+
+
+class ConnectionManager:
+    """Verwaltet die WebSocket-Verbindungen je Schlüssel (game_id) und verteilt Nachrichten über
+    die Warteschlangen der einzelnen Verbindungen, ohne selbst auf das Senden zu warten."""
+
+    def __init__(self, name: str, queue_size: int = WEBSOCKET_SEND_QUEUE_SIZE,
+                 send_timeout: float = WEBSOCKET_SEND_TIMEOUT, overflow_policy: str = WEBSOCKET_OVERFLOW_POLICY):
+        self.name = name
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.overflow_policy = overflow_policy
+        self.connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        self.sent_messages = 0
+        self.dropped_messages = 0
+        self.dropped_connections = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.connections
+
+    def get(self, key: str) -> List[WebSocket]:
+        return list(self.connections.get(key, {}))
+
+    def connect(self, websocket: WebSocket, key: str) -> ClientConnection:
+        connection = ClientConnection(websocket, self)
+        self.connections.setdefault(key, {})[websocket] = connection
+        return connection
+
+    def disconnect(self, websocket: WebSocket, key: str) -> bool:
+        """Gibt True zurück, wenn damit die letzte Verbindung des Schlüssels entfernt wurde."""
+        connections = self.connections.get(key)
+        if not connections or websocket not in connections:
+            return False
+
+        connections.pop(websocket).close()
+        if not connections:
+            del self.connections[key]
+            return True
+        return False
+
+    def drop(self, connection: ClientConnection, reason: str):
+        if connection.closed:
+            return
+        key = next((key for key, connections in self.connections.items()
+                    if connections.get(connection.websocket) is connection), None)
+        print(f"[{self.name.upper()} WS] Langsamer oder toter Client für {key} getrennt: {reason}")
+        self.dropped_connections += 1
+        if key is not None:
+            self.disconnect(connection.websocket, key)
+        else:
+            connection.close()
+        asyncio.create_task(self._close_websocket(connection.websocket))
+
+    async def _close_websocket(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), self.send_timeout)
+        except Exception:
+            pass
+
+    def send_text(self, websocket: WebSocket, key: str, text: str) -> bool:
+        connection = self.connections.get(key, {}).get(websocket)
+        return connection.enqueue(text) if connection is not None else False
+
+    async def flush(self, websocket: WebSocket, key: str):
+        """Wartet, bis die Warteschlange dieser Verbindung leer ist, z. B. vor dem Schließen nach einem Fehler."""
+        connection = self.connections.get(key, {}).get(websocket)
+        if connection is not None:
+            await connection.queue.join()
+
+    def broadcast_text(self, key: str, text: str) -> int:
+        """Reiht die Nachricht bei allen Verbindungen des Schlüssels ein und gibt deren Anzahl zurück."""
+        connections = self.connections.get(key)
+        if not connections:
+            return 0
+        return sum(connection.enqueue(text) for connection in list(connections.values()))
+
+    async def drain(self, key: Optional[str] = None):
+        """Wartet, bis alle eingereihten Nachrichten verschickt oder verworfen sind."""
+        keys = [key] if key is not None else list(self.connections)
+        queues = [connection.queue for k in keys for connection in self.connections.get(k, {}).values()]
+        await asyncio.gather(*(queue.join() for queue in queues))
+
+    async def close(self):
+        for key in list(self.connections):
+            for websocket in list(self.connections.get(key, {})):
+                self.disconnect(websocket, key)
+        await asyncio.sleep(0)
+
+    def stats(self) -> ConnectionStats:
+        depths = [connection.queue.qsize() for connections in self.connections.values()
+                  for connection in connections.values()]
+        return ConnectionStats(
+            connections=len(depths),
+            queued_messages=sum(depths),
+            max_queue_depth=max(depths, default=0),
+            queue_size=self.queue_size,
+            sent_messages=self.sent_messages,
+            dropped_messages=self.dropped_messages,
+            dropped_connections=self.dropped_connections,
+        )
@@ -0,0 +1,73 @@
+import json
+from models.game_state import GameState
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+# Version des game_state/game_delta-Protokolls, wird bei inkompatiblen Änderungen erhöht.
+GAME_STATE_PROTOCOL_VERSION = 2
+
+
+class SnapshotStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+
+
+class GameSnapshotCache:
+    """Hält je Spiel die fertig serialisierte game_state-Nachricht. Der Snapshot wird einmal pro Spielstand
+    gebaut und nur beim Verbinden oder nach einer Lücke verschickt, jede Änderung danach geht als
+    game_delta mit der nächsten Sequenznummer (GameState.seq) raus. Nur der Snapshot baut dafür einmal
+    das pydantic-ChessGame, die Deltas kommen direkt aus dem PieceBoard."""
+
+    def __init__(self):
+        # game_id -> (Spielobjekt, Stand, JSON-Text); ein neu aus Mongo geladenes Objekt zählt als neuer Stand.
+        self.snapshots: Dict[str, Tuple[GameState, tuple, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def serialize(game: GameState) -> str:
+        # data hat das gleiche Format wie zuvor send_json({"type": "game_state", "data": game.model_dump()}).
+        return (f'{{"type":"game_state","v":{GAME_STATE_PROTOCOL_VERSION},"seq":{game.seq},"data":'
+                + game.to_chess_game().model_dump_json() + "}")
+
+    @staticmethod
+    def serialize_delta(game: GameState, squares: Iterable[int], move: Optional[dict] = None) -> str:
+        """Nur die geänderten Felder (Feld-Index = Reihe * 8 + Spalte) des Bretts und des Spiels;
+        die Größe hängt nicht von der Spiellänge ab."""
+        figure_json = game.pieces.figure_json
+        return json.dumps({
+            "type": "game_delta",
+            "v": GAME_STATE_PROTOCOL_VERSION,
+            "seq": game.seq,
+            "game_id": game.game_id,
+            "move": move,
+            "squares": [
+                {"position": [square >> 3, square & 7], "figure": figure_json(square)}
+                for square in dict.fromkeys(squares)
+            ],
+            "changes": game.delta_changes(),
+        }, separators=(",", ":"), ensure_ascii=False)
+
+    @staticmethod
+    def state_version(game: GameState) -> tuple:
+        # Jeder Zug verlängert eine Zughistorie, Umwandlung ändert den Hash, Spielende den Status.
+        return (game.seq, len(game.player_white.move_history), len(game.player_black.move_history),
+                game.position_hash, game.status)
+
+    def get(self, game: GameState) -> str:
+        version = self.state_version(game)
+        cached = self.snapshots.get(game.game_id)
+        if cached is not None and cached[0] is game and cached[1] == version:
+            self.hits += 1
+            return cached[2]
+
+        self.misses += 1
+        message = self.serialize(game)
+        self.snapshots[game.game_id] = (game, version, message)
+        return message
+
+    def invalidate(self, game_id: str):
+        self.snapshots.pop(game_id, None)
+
+    def stats(self) -> SnapshotStats:
+        return SnapshotStats(self.hits, self.misses, len(self.snapshots))
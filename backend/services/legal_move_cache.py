@@ -0,0 +1,93 @@
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+
+LEGAL_MOVE_CACHE_MAX_ENTRIES = int(os.getenv("LEGAL_MOVE_CACHE_MAX_ENTRIES", 10000))
+LEGAL_MOVE_CACHE_MAX_BYTES = int(os.getenv("LEGAL_MOVE_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+# Grobe Schätzung des Speicherbedarfs: Schlüssel, OrderedDict-Knoten und Analyse-Tupel
+# plus ein Zug-Tupel aus zwei Koordinaten-Tupeln je legalem Zug.
+ENTRY_BASE_BYTES = 400
+MOVE_BYTES = 200
+
+
+class PositionAnalysis(NamedTuple):
+    legal_moves: tuple
+    in_check: bool
+    checkmate: bool
+    stalemate: bool
+    attackers: tuple = ()
+
+    @property
+    def legal_move_count(self) -> int:
+        return len(self.legal_moves)
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_entries: int
+    max_bytes: int
+
+
+class LegalMoveCache:
+    """LRU-Cache für Stellungsanalysen, Schlüssel = (Zobrist-Hash, Spieler am Zug).
+    Begrenzt durch die Anzahl der Einträge und eine geschätzte Speichergrenze."""
+
+    def __init__(self, max_entries: int = LEGAL_MOVE_CACHE_MAX_ENTRIES, max_bytes: int = LEGAL_MOVE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def estimate_size(analysis: PositionAnalysis) -> int:
+        return ENTRY_BASE_BYTES + MOVE_BYTES * len(analysis.legal_moves)
+
+    def get(self, key: Hashable) -> Optional[PositionAnalysis]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, analysis: PositionAnalysis):
+        size = self.estimate_size(analysis)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= previous[1]
+
+        self.entries[key] = (analysis, size)
+        self.size_bytes += size
+
+        while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], PositionAnalysis]) -> PositionAnalysis:
+        analysis = self.get(key)
+        if analysis is None:
+            analysis = compute()
+            self.put(key, analysis)
+        return analysis
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self.entries),
+                          self.size_bytes, self.max_entries, self.max_bytes)
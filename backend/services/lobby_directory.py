@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+from fastapi.websockets import WebSocket
+from services.connection_manager import ConnectionManager
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+# Wie lange Änderungen gesammelt werden, bevor sie als ein lobby_events-Paket rausgehen.
+LOBBY_DIRECTORY_COALESCE_DELAY = float(os.getenv("LOBBY_DIRECTORY_COALESCE_DELAY", 0.1))
+# Alle Verbindungen des Verzeichnisses hängen am selben Schlüssel im ConnectionManager.
+DIRECTORY_KEY = "directory"
+
+
+class DirectoryStats(NamedTuple):
+    connections: int
+    seq: int
+    events: int
+    coalesced_events: int
+    batches: int
+    pending_events: int
+
+
+class LobbyDirectory:
+    """Verteilt Änderungen an allen Lobbys (created/updated/removed) an die Verbindungen von
+    /lobby/directory/ws. Änderungen derselben Lobby innerhalb von coalesce_delay werden zum letzten
+    Stand zusammengefasst und gemeinsam mit fortlaufender seq verschickt. Jede Verbindung bekommt
+    zuerst einen Snapshot; was während dessen Aufbau verschickt wird, folgt direkt danach."""
+
+    def __init__(self, coalesce_delay: float = LOBBY_DIRECTORY_COALESCE_DELAY):
+        self.coalesce_delay = coalesce_delay
+        self.connections = ConnectionManager("lobby_directory")
+        # game_id -> letzte Änderung, in der Reihenfolge der ersten Änderung seit dem letzten Paket.
+        self.pending: Dict[str, dict] = {}
+        # Verbindungen, deren Snapshot gerade gebaut wird, mit den Paketen, die sie danach noch brauchen.
+        self.joining: Dict[WebSocket, List[str]] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        self.seq = 0
+        self.events = 0
+        self.coalesced_events = 0
+        self.batches = 0
+
+    @property
+    def active(self) -> bool:
+        return DIRECTORY_KEY in self.connections or bool(self.joining)
+
+    def push(self, event: dict):
+        if not self.active:
+            return
+        self.events += 1
+        game_id = event["game_id"]
+        previous = self.pending.get(game_id)
+        if previous is not None:
+            self.coalesced_events += 1
+            # Eine neue Lobby bleibt "created", auch wenn sie sich im selben Paket noch ändert.
+            if previous["event"] == "created" and event["event"] == "updated":
+                event = {**event, "event": "created"}
+        self.pending[game_id] = event
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.coalesce_delay)
+        finally:
+            self.flush_task = None
+        self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.seq += 1
+        self.batches += 1
+        text = json.dumps({"type": "lobby_events", "seq": self.seq, "events": list(self.pending.values())},
+                          separators=(",", ":"), ensure_ascii=False)
+        self.pending.clear()
+        self.connections.broadcast_text(DIRECTORY_KEY, text)
+        for buffered in self.joining.values():
+            buffered.append(text)
+
+    async def subscribe(self, websocket: WebSocket, snapshot: Callable[[], Awaitable[str]]):
+        """Schickt einen Snapshot und meldet die Verbindung, falls noch nicht geschehen, für die Pakete an.
+        snapshot liefert das JSON-Objekt der Lobbyliste ({"lobbies": [...], ...})."""
+        seq = self.seq
+        self.joining[websocket] = []
+        try:
+            body = await snapshot()
+        finally:
+            buffered = self.joining.pop(websocket)
+
+        if websocket not in self.connections.connections.get(DIRECTORY_KEY, {}):
+            self.connections.connect(websocket, DIRECTORY_KEY)
+        self.connections.send_text(websocket, DIRECTORY_KEY, f'{{"type":"lobby_snapshot","seq":{seq},' + body[1:])
+        for text in buffered:
+            self.connections.send_text(websocket, DIRECTORY_KEY, text)
+
+    def disconnect(self, websocket: WebSocket):
+        self.connections.disconnect(websocket, DIRECTORY_KEY)
+
+    async def close(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        self.pending.clear()
+        await self.connections.close()
+
+    def stats(self) -> DirectoryStats:
+        return DirectoryStats(
+            connections=self.connections.stats().connections,
+            seq=self.seq,
+            events=self.events,
+            coalesced_events=self.coalesced_events,
+            batches=self.batches,
+            pending_events=len(self.pending),
+        )
@@ -0,0 +1,64 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+# Anzahl gecachter Seiten (Cursor/Limit/Filter-Kombinationen) je Version der Lobbyliste.
+LOBBY_LIST_CACHE_SIZE = int(os.getenv("LOBBY_LIST_CACHE_SIZE", 256))
+
+
+class LobbyListPage(NamedTuple):
+    body: str
+    etag: str
+    version: int
+
+
+class ListingStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    version: int
+
+
+class LobbyListingCache:
+    """Fertig serialisierte Seiten von GET /lobby/list samt ETag. Eine Seite gilt nur für die Version der
+    Registry, mit der sie gebaut wurde; neu gebaut wird erst nach einer Änderung an den Lobbys. Der ETag
+    hängt nur vom Inhalt ab und ist damit auf allen Workern gleich."""
+
+    def __init__(self, size: int = LOBBY_LIST_CACHE_SIZE):
+        self.size = size
+        self.pages: "OrderedDict[Tuple, LobbyListPage]" = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(body: str) -> str:
+        return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+
+    def get(self, key: Tuple, version: int) -> Optional[LobbyListPage]:
+        page = self.pages.get(key)
+        if page is None or page.version != version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.pages.move_to_end(key)
+        return page
+
+    def put(self, key: Tuple, version: int, body: str) -> LobbyListPage:
+        page = LobbyListPage(body, self.etag(body), version)
+        if version < self.version:
+            # Während des Bauens hat sich schon mehr geändert: ausliefern, aber nicht cachen.
+            return page
+        if version > self.version:
+            # Neue Version: alle Seiten der alten sind veraltet.
+            self.pages.clear()
+            self.version = version
+        self.pages[key] = page
+        self.pages.move_to_end(key)
+        while len(self.pages) > self.size:
+            self.pages.popitem(last=False)
+        return page
+
+    def stats(self) -> ListingStats:
+        return ListingStats(self.hits, self.misses, len(self.pages), self.version)
@@ -1,7 +1,19 @@
 from models.figure import Figure, FigureColor, Pawn, Rook, Knight, Bishop, Queen, King
 from models.chess_board import ChessBoard
 from models.chess_game import ChessGame
-from copy import deepcopy
+from models.bitboard_position import (
+    BitboardPosition, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+    piece_code, square_position, iter_squares
+)
+from services.attack_tables import (
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, DIRECTION_STEPS, ORTHOGONAL_DIRECTIONS,
+    rook_attacks, bishop_attacks, queen_attacks
+)
+from services.legal_move_cache import PositionAnalysis
+from typing import Optional
+
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
 
 class MoveValidationService:
 
@@ -123,80 +135,347 @@ class MoveValidationService:
 
     @staticmethod
     def is_king_in_check(game: ChessGame, board: ChessBoard) -> tuple[bool, list]:
-        king = None
-        for row in range(8):
-            for col in range(8):
-                figure = board.squares[row][col]
-                if isinstance(figure, King) and figure.color == game.current_turn:
-                    king = figure
-                    king_position = (row, col)
-                    break
-            if king:
-                break
+        king_position = MoveValidationService.get_king_position(game, board, game.current_turn)
 
-        if not king:
+        if not king_position:
             raise ValueError("Kein König für den aktuellen Spieler gefunden!")
 
-        attacking_figures = []
-
-        for row in range(8):
-            for col in range(8):
-                attacker = board.squares[row][col]
-                if attacker and attacker.color != game.current_turn:
-                    if MoveValidationService.is_move_valid(attacker, (row, col), king_position, board, game):
-                        attacking_figures.append((attacker, (row, col)))
+        attacker_color = FigureColor.BLACK if game.current_turn == FigureColor.WHITE else FigureColor.WHITE
+        attacking_figures = MoveValidationService.get_board_attackers(board, king_position, attacker_color)
 
         return len(attacking_figures) > 0, attacking_figures
 
     @staticmethod
-    def is_king_checkmate(game: ChessGame, board: ChessBoard) -> bool:
-        king_in_check, attacking_figures = MoveValidationService.is_king_in_check(game, board)
+    def get_king_position(game: ChessGame, board: ChessBoard, color: str) -> tuple[int, int] | None:
+        color_key = FigureColor.WHITE.value if color == FigureColor.WHITE else FigureColor.BLACK.value
+        king_positions = getattr(game, "king_positions", None)
 
-        if not king_in_check:
-            return False
+        if king_positions and color_key in king_positions:
+            row, col = king_positions[color_key]
+            figure = board.squares[row][col]
+            if isinstance(figure, King) and figure.color == color_key:
+                return row, col
 
-        king_pos = None
         for row in range(8):
             for col in range(8):
                 figure = board.squares[row][col]
-                if isinstance(figure, King) and figure.color == game.current_turn:
-                    king_pos = (row, col)
+                if isinstance(figure, King) and figure.color == color_key:
+                    if king_positions is not None and board is game.board:
+                        king_positions[color_key] = (row, col)
+                    return row, col
+
+        return None
+
+    @staticmethod
+    def get_board_attackers(board: ChessBoard, position: tuple[int, int], attacker_color: str) -> list:
+        squares = board.squares
+        square = position[0] * 8 + position[1]
+        attacker_index = 0 if attacker_color == FigureColor.WHITE else 1
+        attacking_figures = []
+
+        for candidates, names in ((KNIGHT_ATTACKS[square], ("knight",)),
+                                  (KING_ATTACKS[square], ("king",)),
+                                  (PAWN_ATTACKS[1 - attacker_index][square], ("pawn",))):
+            for attacker_square in iter_squares(candidates):
+                row, col = square_position(attacker_square)
+                figure = squares[row][col]
+                if figure and figure.color == attacker_color and figure.name in names:
+                    attacking_figures.append((figure, (row, col)))
+
+        for direction, (row_step, col_step) in enumerate(DIRECTION_STEPS):
+            names = ("rook", "queen") if direction in ORTHOGONAL_DIRECTIONS else ("bishop", "queen")
+            row, col = position[0] + row_step, position[1] + col_step
+            while 0 <= row < 8 and 0 <= col < 8:
+                figure = squares[row][col]
+                if figure:
+                    if figure.color == attacker_color and figure.name in names:
+                        attacking_figures.append((figure, (row, col)))
                     break
-            if king_pos:
-                break
+                row += row_step
+                col += col_step
+
+        return attacking_figures
+
+    @staticmethod
+    def is_king_in_check_position(position: BitboardPosition) -> bool:
+        king_square = position.king_square(position.side_to_move)
 
-        if not king_pos:
+        if king_square is None:
             raise ValueError("Kein König für den aktuellen Spieler gefunden!")
 
-        for end_row in range(max(0, king_pos[0] - 1), min(8, king_pos[0] + 2)):
-            for end_col in range(max(0, king_pos[1] - 1), min(8, king_pos[1] + 2)):
-                if (end_row, end_col) != king_pos:
-                    if MoveValidationService.is_move_valid(figure, king_pos, (end_row, end_col), board, game):
-                        if not MoveValidationService.simulate_move_and_check(game, board, king_pos, (end_row, end_col)):
-                            return False
+        return bool(MoveValidationService.get_attack_map(position, 1 - position.side_to_move) >> king_square & 1)
 
-        if len(attacking_figures) > 1:
-            return True
+    @staticmethod
+    def get_attack_map(position: BitboardPosition, color: int) -> int:
+        attack_map = position.attack_maps[color]
+        if attack_map is None:
+            attacks_from = MoveValidationService.update_attacks_from(position)
+            attack_map = 0
+            for square in iter_squares(position.occupancy(color)):
+                attack_map |= attacks_from[square]
+            position.attack_maps = (attack_map, position.attack_maps[1]) if color == WHITE else (position.attack_maps[0], attack_map)
+        return attack_map
 
-        attacker_pos = attacking_figures[0][1]
-        blocking_positions = MoveValidationService.get_positions_between(king_pos, attacker_pos)
+    @staticmethod
+    def update_attack_maps(position: BitboardPosition) -> tuple[int, int]:
+        """Nach jedem Zug auf der Stellung eines laufenden Spiels: zieht attacks_from für die geänderten
+        Felder nach und legt die Angriffe beider Seiten ab, Schach ist danach nur noch ein Nachschlagen."""
+        return (MoveValidationService.get_attack_map(position, WHITE),
+                MoveValidationService.get_attack_map(position, BLACK))
 
-        for row in range(8):
-            for col in range(8):
-                figure = board.squares[row][col]
-                if figure and figure.color == game.current_turn:
-                    start_pos = (row, col)
+    @staticmethod
+    def update_attacks_from(position: BitboardPosition) -> list[int]:
+        """Zieht die Angriffe je Feld nach den Zügen seit dem letzten Aufruf nach: neu berechnet werden nur
+        die geänderten Felder und die Läufer, Türme und Damen, deren Linien über eines davon laufen."""
+        attacks_from = position.attacks_from
+        occupied = position.occupied
+        if attacks_from is None:
+            attacks_from = [0] * 64
+            stale = occupied
+        elif not position.stale_squares:
+            return attacks_from
+        else:
+            attacks_from = attacks_from[:]
+            stale = position.stale_squares
+            bitboards = position.bitboards
+            sliders = (bitboards[BISHOP] | bitboards[ROOK] | bitboards[QUEEN] |
+                       bitboards[6 + BISHOP] | bitboards[6 + ROOK] | bitboards[6 + QUEEN])
+            for square in iter_squares(sliders & ~stale):
+                if attacks_from[square] & stale:
+                    stale |= 1 << square
+
+        for square in iter_squares(stale):
+            attacks_from[square] = MoveValidationService.piece_attacks(position, square, occupied) if occupied >> square & 1 else 0
+        position.attacks_from = attacks_from
+        position.stale_squares = 0
+        return attacks_from
 
-                    if MoveValidationService.is_move_valid(figure, start_pos, attacker_pos, board, game):
-                        if not MoveValidationService.simulate_move_and_check(game, board, start_pos, attacker_pos):
-                            return False
+    @staticmethod
+    def piece_attacks(position: BitboardPosition, square: int, occupied: int) -> int:
+        code = position.piece_at(square)
+        if code is None:
+            return 0
+        color, kind = divmod(code, 6)
+        if kind == PAWN:
+            return PAWN_ATTACKS[color][square]
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        if kind == BISHOP:
+            return bishop_attacks(square, occupied)
+        if kind == ROOK:
+            return rook_attacks(square, occupied)
+        if kind == QUEEN:
+            return queen_attacks(square, occupied)
+        return KING_ATTACKS[square]
 
-                    for block_pos in blocking_positions:
-                        if MoveValidationService.is_move_valid(figure, start_pos, block_pos, board, game):
-                            if not MoveValidationService.simulate_move_and_check(game, board, start_pos, block_pos):
-                                return False
+    @staticmethod
+    def get_king_danger(position: BitboardPosition, color: int) -> int:
+        """Felder, die der Gegner angreift, wenn der König von color nicht als Blocker zählt:
+        Linien, die am König enden, laufen hinter ihm weiter."""
+        king_mask = position.bitboards[piece_code(color, KING)]
+        attacks_from = MoveValidationService.update_attacks_from(position)
+        occupied = position.occupied ^ king_mask
+        bitboards = position.bitboards
+        base = (1 - color) * 6
+        sliders = bitboards[base + BISHOP] | bitboards[base + ROOK] | bitboards[base + QUEEN]
+        danger = 0
+        for square in iter_squares(position.occupancy(1 - color)):
+            attacks = attacks_from[square]
+            if attacks & king_mask and sliders >> square & 1:
+                attacks = MoveValidationService.piece_attacks(position, square, occupied)
+            danger |= attacks
+        return danger
 
-        return True
+    @staticmethod
+    def is_square_attacked(position: BitboardPosition, square: int, attacker_color: int) -> bool:
+        return MoveValidationService.get_attackers(position, square, attacker_color) != 0
+
+    @staticmethod
+    def get_attackers(position: BitboardPosition, square: int, attacker_color: int) -> int:
+        bitboards = position.bitboards
+        occupied = position.occupied
+        base = attacker_color * 6
+        queens = bitboards[base + QUEEN]
+
+        return (
+            (KNIGHT_ATTACKS[square] & bitboards[base + KNIGHT]) |
+            (KING_ATTACKS[square] & bitboards[base + KING]) |
+            (PAWN_ATTACKS[1 - attacker_color][square] & bitboards[base + PAWN]) |
+            (rook_attacks(square, occupied) & (bitboards[base + ROOK] | queens)) |
+            (bishop_attacks(square, occupied) & (bitboards[base + BISHOP] | queens))
+        )
+
+    @staticmethod
+    def game_position(game, board: Optional[ChessBoard] = None) -> BitboardPosition:
+        # Ein GameState führt seine Stellung samt Angriffen mit; neu aufgebaut wird nur für ein ChessGame
+        # oder ein abweichendes Brett.
+        position = getattr(game, "position", None)
+        if position is not None and board is None:
+            return position
+        return BitboardPosition.from_game(game, board)
+
+    @staticmethod
+    def generate_legal_moves(game: ChessGame, board: Optional[ChessBoard] = None) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        position = MoveValidationService.game_position(game, board)
+        return MoveValidationService.to_board_moves(MoveValidationService.generate_position_moves(position))
+
+    @staticmethod
+    def to_board_moves(moves: list[tuple[int, int, Optional[int]]]) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        # Umwandlungen in verschiedene Figuren ergeben auf dem Brett denselben Zug.
+        legal_moves = []
+        seen = set()
+        for from_square, to_square, _ in moves:
+            if (from_square, to_square) not in seen:
+                seen.add((from_square, to_square))
+                legal_moves.append((square_position(from_square), square_position(to_square)))
+
+        return legal_moves
+
+    @staticmethod
+    def evaluate_position(game: ChessGame, board: Optional[ChessBoard] = None) -> PositionAnalysis:
+        """Schach, Angreifer, legale Züge, Matt und Patt aus einer einzigen Zuggenerierung."""
+        return MoveValidationService.evaluate_bitboard_position(MoveValidationService.game_position(game, board))
+
+    @staticmethod
+    def evaluate_bitboard_position(position: BitboardPosition) -> PositionAnalysis:
+        us = position.side_to_move
+        king_square = position.king_square(us)
+
+        if king_square is None:
+            raise ValueError("Kein König für den aktuellen Spieler gefunden!")
+
+        # Schach über die Angriffskarte des Gegners; die Angreifer selbst werden nur im Schach gesucht.
+        in_check = MoveValidationService.is_king_in_check_position(position)
+        attackers = tuple(
+            square_position(square)
+            for square in iter_squares(MoveValidationService.get_attackers(position, king_square, 1 - us))
+        ) if in_check else ()
+        legal_moves = tuple(MoveValidationService.to_board_moves(MoveValidationService.generate_position_moves(position)))
+
+        return PositionAnalysis(
+            legal_moves=legal_moves,
+            in_check=in_check,
+            checkmate=in_check and not legal_moves,
+            stalemate=not in_check and not legal_moves,
+            attackers=attackers,
+        )
+
+    @staticmethod
+    def generate_position_moves(position: BitboardPosition) -> list[tuple[int, int, Optional[int]]]:
+        return list(MoveValidationService.iter_legal_position_moves(position))
+
+    @staticmethod
+    def has_legal_move(position: BitboardPosition) -> bool:
+        return next(MoveValidationService.iter_legal_position_moves(position), None) is not None
+
+    @staticmethod
+    def iter_legal_position_moves(position: BitboardPosition):
+        us = position.side_to_move
+        king_square = position.king_square(us)
+        king_danger = None
+
+        for move in MoveValidationService.generate_pseudo_legal_moves(position):
+            if move[0] != king_square:
+                if MoveValidationService.is_legal_position_move(position, move):
+                    yield move
+                continue
+
+            # Königszüge gegen die Angriffe des Gegners prüfen, ohne den König als Blocker mitzuzählen.
+            if king_danger is None:
+                king_danger = MoveValidationService.get_king_danger(position, us)
+            if not king_danger >> move[1] & 1:
+                yield move
+
+    @staticmethod
+    def is_legal_position_move(position: BitboardPosition, move: tuple[int, int, Optional[int]]) -> bool:
+        us = position.side_to_move
+        undo = position.make_move(move)
+
+        king_square = position.king_square(us)
+        is_legal = king_square is None or not MoveValidationService.is_square_attacked(position, king_square, 1 - us)
+
+        position.unmake_move(move, undo)
+        return is_legal
+
+    @staticmethod
+    def generate_pseudo_legal_moves(position: BitboardPosition) -> list[tuple[int, int, Optional[int]]]:
+        us = position.side_to_move
+        them = 1 - us
+        bitboards = position.bitboards
+        base = us * 6
+        own = position.occupancy(us)
+        enemy = position.occupancy(them)
+        occupied = own | enemy
+        not_own = ~own
+        moves = []
+
+        forward = -8 if us == WHITE else 8
+        double_step_row = 6 if us == WHITE else 1
+        promotion_row = 0 if us == WHITE else 7
+        en_passant = 1 << position.en_passant if position.en_passant is not None else 0
+
+        for square in iter_squares(bitboards[base + PAWN]):
+            targets = PAWN_ATTACKS[us][square] & (enemy | en_passant)
+            single = square + forward
+            if 0 <= single < 64 and not occupied >> single & 1:
+                targets |= 1 << single
+                double = single + forward
+                if square >> 3 == double_step_row and not occupied >> double & 1:
+                    targets |= 1 << double
+
+            for target in iter_squares(targets):
+                if target >> 3 == promotion_row:
+                    moves.extend((square, target, kind) for kind in PROMOTION_KINDS)
+                else:
+                    moves.append((square, target, None))
+
+        for kind, attacks in ((KNIGHT, None), (BISHOP, bishop_attacks), (ROOK, rook_attacks), (QUEEN, queen_attacks)):
+            for square in iter_squares(bitboards[base + kind]):
+                targets = KNIGHT_ATTACKS[square] if attacks is None else attacks(square, occupied)
+                moves.extend((square, target, None) for target in iter_squares(targets & not_own))
+
+        king_square = position.king_square(us)
+        if king_square is not None:
+            moves.extend((king_square, target, None) for target in iter_squares(KING_ATTACKS[king_square] & not_own))
+            moves.extend(MoveValidationService.generate_castling_moves(position, king_square, occupied))
+
+        return moves
+
+    @staticmethod
+    def generate_castling_moves(position: BitboardPosition, king_square: int, occupied: int) -> list[tuple[int, int, Optional[int]]]:
+        us = position.side_to_move
+        kingside, queenside = (WHITE_KINGSIDE, WHITE_QUEENSIDE) if us == WHITE else (BLACK_KINGSIDE, BLACK_QUEENSIDE)
+        home_square = 60 if us == WHITE else 4
+        rooks = position.bitboards[piece_code(us, ROOK)]
+
+        if king_square != home_square or not position.castling_rights & (kingside | queenside):
+            return []
+
+        attacked = MoveValidationService.get_attack_map(position, 1 - us)
+        if attacked >> king_square & 1:
+            return []
+
+        moves = []
+        if (position.castling_rights & kingside and rooks >> (king_square + 3) & 1
+                and not occupied & (0b11 << (king_square + 1))
+                and not attacked & (0b11 << (king_square + 1))):
+            moves.append((king_square, king_square + 2, None))
+
+        if (position.castling_rights & queenside and rooks >> (king_square - 4) & 1
+                and not occupied & (0b111 << (king_square - 3))
+                and not attacked & (0b11 << (king_square - 2))):
+            moves.append((king_square, king_square - 2, None))
+
+        return moves
+
+    @staticmethod
+    def is_king_checkmate(game: ChessGame, board: Optional[ChessBoard] = None) -> bool:
+        position = MoveValidationService.game_position(game, board)
+
+        if not MoveValidationService.is_king_in_check_position(position):
+            return False
+
+        return not MoveValidationService.has_legal_move(position)
 
     @staticmethod
     def get_positions_between(start_pos, end_pos):
@@ -221,33 +500,20 @@ class MoveValidationService:
     
     @staticmethod
     def simulate_move_and_check(game: ChessGame, board: ChessBoard, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> bool:
-        board_copy = deepcopy(board)
-
-        figure = board_copy.squares[start_pos[0]][start_pos[1]]
-        board_copy.squares[end_pos[0]][end_pos[1]] = figure
-        board_copy.squares[start_pos[0]][start_pos[1]] = None
-
-        return MoveValidationService.is_king_in_check(game, board_copy)[0]
+        undo = board.make_move(start_pos, end_pos)
+        try:
+            return MoveValidationService.is_king_in_check(game, board)[0]
+        finally:
+            board.unmake_move(undo)
 
     @staticmethod
-    def is_stalemate(game: ChessGame, board: ChessBoard) -> bool:
-        king_in_check, _ = MoveValidationService.is_king_in_check(game, board)
-        if king_in_check:
-            return False
+    def is_stalemate(game: ChessGame, board: Optional[ChessBoard] = None) -> bool:
+        position = MoveValidationService.game_position(game, board)
 
-        for row in range(8):
-            for col in range(8):
-                figure = board.squares[row][col]
-                if figure and figure.color == game.current_turn:
-                    start_pos = (row, col)
-                    for end_row in range(8):
-                        for end_col in range(8):
-                            end_pos = (end_row, end_col)
-                            if MoveValidationService.is_move_valid(figure, start_pos, end_pos, board, game):
-                                if not MoveValidationService.simulate_move_and_check(game, board, start_pos, end_pos):
-                                    return False
+        if MoveValidationService.is_king_in_check_position(position):
+            return False
 
-        return True
+        return not MoveValidationService.has_legal_move(position)
 
     @staticmethod
     def is_valid_castling(king: King, start_pos: tuple[int, int], end_pos: tuple[int, int], board: ChessBoard, game: ChessGame) -> bool:
@@ -291,8 +557,14 @@ class MoveValidationService:
         last_moved_figure = last_move["figure"]
         last_move_start, last_move_end = last_move["start"], last_move["end"]
 
+        # Aus der Datenbank geladen ist die zuletzt gezogene Figur ein dict.
+        if isinstance(last_moved_figure, dict):
+            last_moved_figure_is_pawn = last_moved_figure.get("name") == "pawn"
+        else:
+            last_moved_figure_is_pawn = isinstance(last_moved_figure, Pawn)
+
         if (
-            isinstance(last_moved_figure, Pawn)
+            last_moved_figure_is_pawn
             and last_move["two_square_pawn_move"]
             and abs(last_move_start[0] - last_move_end[0]) == 2
             and last_move_end[0] == start_pos[0]
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# "local": nur innerhalb des Prozesses (ein Worker, Tests), "redis": Nachrichten laufen über Redis an alle Worker.
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "local")
+PUBSUB_REDIS_URL = os.getenv("PUBSUB_REDIS_URL", "redis://localhost:6379/0")
+PUBSUB_CHANNEL_PREFIX = os.getenv("PUBSUB_CHANNEL_PREFIX", "chess")
+PUBSUB_RECONNECT_DELAY = float(os.getenv("PUBSUB_RECONNECT_DELAY", 1.0))
+
+# handler(key, text, remote): remote ist True, wenn die Nachricht von einem anderen Worker kommt.
+MessageHandler = Callable[[str, str, bool], None]
+
+
+class LocalBackplane:
+    """Verteilt Broadcasts innerhalb des Prozesses an die abonnierten Handler. Jeder Handler reicht
+    die Nachricht nur an die WebSockets weiter, die dieser Worker selbst hält."""
+
+    distributed = False
+
+    def __init__(self):
+        self.handlers: Dict[str, List[MessageHandler]] = {}
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: MessageHandler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, key: str, text: str):
+        self.published += 1
+        self.deliver(channel, key, text, remote=False)
+
+    def deliver(self, channel: str, key: str, text: str, remote: bool):
+        for handler in self.handlers.get(channel, []):
+            try:
+                handler(key, text, remote)
+            except Exception as e:
+                print(f"[PUBSUB] Fehler beim Zustellen auf {channel} für {key}: {e}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local", "published": self.published, "received": self.received}
+
+
+class RedisBackplane(LocalBackplane):
+    """Pub/Sub über Redis für mehrere Worker. Eigene Nachrichten werden sofort lokal zugestellt und beim
+    Empfang über Redis anhand der origin übersprungen. Solange start() nicht aufgerufen wurde (Tests,
+    Skripte), wird nur lokal verteilt."""
+
+    distributed = True
+
+    def __init__(self, url: str = PUBSUB_REDIS_URL, prefix: str = PUBSUB_CHANNEL_PREFIX, client=None):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.client = client
+        self.owns_client = client is None
+        self.origin = uuid.uuid4().hex
+        self.pubsub = None
+        self.listener_task: Optional[asyncio.Task] = None
+        self.publish_failures = 0
+
+    def channel_name(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    @staticmethod
+    def encode(origin: str, key: str, text: str) -> str:
+        # Rahmen ohne erneutes JSON-Kodieren: origin und key (UUIDs) enthalten keinen Zeilenumbruch.
+        return f"{origin}\n{key}\n{text}"
+
+    @staticmethod
+    def decode(data: bytes | str) -> tuple[str, str, str]:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        origin, key, text = data.split("\n", 2)
+        return origin, key, text
+
+    async def start(self):
+        if self.listener_task is not None:
+            return
+        if self.client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("PUBSUB_BACKEND=redis benötigt das Paket 'redis'.") from e
+            self.client = redis.from_url(self.url)
+
+        await self._subscribe()
+        self.listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self.listener_task is not None:
+            self.listener_task.cancel()
+            try:
+                await self.listener_task
+            except asyncio.CancelledError:
+                pass
+            self.listener_task = None
+        await self._close(self.pubsub)
+        self.pubsub = None
+        if self.owns_client:
+            await self._close(self.client)
+            self.client = None
+
+    async def publish(self, channel: str, key: str, text: str):
+        await super().publish(channel, key, text)
+        if self.listener_task is None:
+            return
+        try:
+            await self.client.publish(self.channel_name(channel), self.encode(self.origin, key, text))
+        except Exception as e:
+            # Die lokalen Clients haben die Nachricht schon, nur andere Worker verpassen sie.
+            self.publish_failures += 1
+            print(f"[PUBSUB] Veröffentlichen auf {channel} für {key} fehlgeschlagen: {e}")
+
+    async def _subscribe(self):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(*(self.channel_name(channel) for channel in self.handlers))
+
+    async def _listen(self):
+        channels = {self.channel_name(channel): channel for channel in self.handlers}
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message is None or message.get("type") != "message":
+                        continue
+                    channel = message["channel"]
+                    channel = channels.get(channel.decode("utf-8") if isinstance(channel, bytes) else channel)
+                    try:
+                        origin, key, text = self.decode(message["data"])
+                    except ValueError:
+                        continue
+                    if channel is None or origin == self.origin:
+                        continue
+                    self.received += 1
+                    self.deliver(channel, key, text, remote=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[PUBSUB] Verbindung zu Redis unterbrochen: {e}")
+
+            await asyncio.sleep(PUBSUB_RECONNECT_DELAY)
+            try:
+                await self._close(self.pubsub)
+                await self._subscribe()
+            except Exception as e:
+                print(f"[PUBSUB] Erneutes Abonnieren fehlgeschlagen: {e}")
+
+    @staticmethod
+    async def _close(resource):
+        if resource is None:
+            return
+        close = getattr(resource, "aclose", None) or getattr(resource, "close", None)
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "published": self.published, "received": self.received,
+                "publish_failures": self.publish_failures, "listening": self.listener_task is not None}
+
+
+def create_backplane(backend: str = PUBSUB_BACKEND) -> LocalBackplane:
+    if backend == "local":
+        return LocalBackplane()
+    if backend == "redis":
+        return RedisBackplane()
+    raise ValueError(f"Unbekanntes PUBSUB_BACKEND: {backend}")
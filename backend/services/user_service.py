@@ -1,5 +1,7 @@
 from models.user import UserCreate, UserResponse, UserDB
 from repositories.user_repo import UserRepository
+from repositories.async_repo import AsyncUserRepository
+from fastapi.concurrency import run_in_threadpool
 from services.auth_service import AuthService
 import uuid
 
@@ -7,45 +9,57 @@ class UserService:
     def __init__(self):
         self.user_repo = UserRepository()
 
-    def create_user(self, user_data: UserCreate) -> UserResponse | None:
-        existing_user = self.get_user_by_username(user_data.username)
+    @property
+    def user_repo(self):
+        return self._user_repo
+
+    @user_repo.setter
+    def user_repo(self, user_repo):
+        self._user_repo = user_repo
+        self.async_user_repo = AsyncUserRepository(user_repo)
+
+    async def create_user(self, user_data: UserCreate) -> UserResponse | None:
+        existing_user = await self.get_user_by_username(user_data.username)
         if existing_user:
             return None
-        hashed_password = AuthService.hash_password(user_data.password)
+        hashed_password = await run_in_threadpool(AuthService.hash_password, user_data.password)
         new_user = UserDB(
             user_id=str(uuid.uuid4()),
             username=user_data.username,
             password_hash=hashed_password
         )
-        self.user_repo.insert_user(new_user)
+        try:
+            await self.async_user_repo.insert_user(new_user)
+        except ValueError:
+            return None
         return UserResponse(user_id=new_user.user_id, username=new_user.username)
 
-    def get_user_by_username(self, username: str) -> UserResponse | None:
-        user_data = self.user_repo.find_user_by_username(username)
+    async def get_user_by_username(self, username: str) -> UserResponse | None:
+        user_data = await self.async_user_repo.find_user_by_username(username)
         if user_data:
             return UserResponse(user_id=user_data.user_id, username=user_data.username) 
         return None
     
-    def get_user_by_id(self, user_id: str) -> UserResponse | None:
-        user_data = self.user_repo.find_user_by_id(user_id)
+    async def get_user_by_id(self, user_id: str) -> UserResponse | None:
+        user_data = await self.async_user_repo.find_user_by_id(user_id)
         if user_data:
             return UserResponse(user_id=user_data.user_id, username=user_data.username)
         return None
     
-    def update_user(self, user_id: str, username: str = None, password: str = None) -> UserResponse | None:
+    async def update_user(self, user_id: str, username: str = None, password: str = None) -> UserResponse | None:
         update_data = {}
 
         if username:
             update_data["username"] = username
 
         if password:
-            update_data["password_hash"] = AuthService.hash_password(password)
+            update_data["password_hash"] = await run_in_threadpool(AuthService.hash_password, password)
 
-        updated_user = self.user_repo.update_user(user_id, update_data)
+        updated_user = await self.async_user_repo.update_user(user_id, update_data)
 
         if updated_user:
             return UserResponse(user_id=updated_user.user_id, username=updated_user.username)
         return None
 
-    def delete_user(self, user_id: str) -> bool:
-        return self.user_repo.delete_user(user_id)
\ No newline at end of file
+    async def delete_user(self, user_id: str) -> bool:
+        return await self.async_user_repo.delete_user(user_id)
@@ -0,0 +1,126 @@
+import random
+from models.bitboard_position import (
+    BitboardPosition, PositionUndo, BLACK, PAWN, KING, PIECE_KINDS, piece_code, color_index, iter_squares
+)
+from models.chess_board import ChessBoard, MoveUndo
+from models.figure import Figure, FigureColor
+from models.game_state import GameState
+from services.attack_tables import PAWN_ATTACKS
+from typing import Optional
+
+# Fester Seed, damit die Hashes über Neustarts hinweg gleich bleiben und gespeicherte Werte gültig sind.
+_key_generator = random.Random(0x5A0B7157)
+PIECE_KEYS = [[_key_generator.getrandbits(64) for _ in range(64)] for _ in range(12)]
+SIDE_KEY = _key_generator.getrandbits(64)
+CASTLING_KEYS = [_key_generator.getrandbits(64) for _ in range(16)]
+EN_PASSANT_KEYS = [_key_generator.getrandbits(64) for _ in range(8)]
+
+ROOK = PIECE_KINDS["rook"]
+
+
+class ZobristService:
+
+    @staticmethod
+    def hash_position(position: BitboardPosition) -> int:
+        value = 0
+        for code, bitboard in enumerate(position.bitboards):
+            keys = PIECE_KEYS[code]
+            for square in iter_squares(bitboard):
+                value ^= keys[square]
+
+        return value ^ ZobristService.position_state_key(position)
+
+    @staticmethod
+    def position_state_key(position: BitboardPosition) -> int:
+        """Anteil von Zugrecht, Rochaderechten und En-passant-Feld am Hash einer BitboardPosition."""
+        value = CASTLING_KEYS[position.castling_rights]
+        if position.side_to_move == BLACK:
+            value ^= SIDE_KEY
+
+        # Das En-passant-Feld zählt nur, wenn ein Bauer am Zug es auch schlagen kann.
+        square = position.en_passant
+        if square is not None:
+            us = position.side_to_move
+            if PAWN_ATTACKS[1 - us][square] & position.bitboards[piece_code(us, PAWN)]:
+                value ^= EN_PASSANT_KEYS[square & 7]
+
+        return value
+
+    @staticmethod
+    def hash_game(game) -> int:
+        if isinstance(game, GameState):
+            return ZobristService.hash_position(game.position)
+        return ZobristService.hash_position(BitboardPosition.from_game(game))
+
+    @staticmethod
+    def format_hash(value: int) -> str:
+        return f"{value:016x}"
+
+    @staticmethod
+    def parse_hash(position_hash: str) -> int:
+        return int(position_hash, 16)
+
+    @staticmethod
+    def piece_key(figure: Figure, position: tuple[int, int]) -> int:
+        code = piece_code(color_index(figure.color), PIECE_KINDS[figure.name])
+        return PIECE_KEYS[code][position[0] * 8 + position[1]]
+
+    @staticmethod
+    def state_key(board: ChessBoard, current_turn: str, last_move: Optional[dict]) -> int:
+        """Anteil von Zugrecht, Rochaderechten und En-passant-Feld am Hash."""
+        value = CASTLING_KEYS[BitboardPosition.castling_rights_from_board(board.squares)]
+        if current_turn == FigureColor.BLACK:
+            value ^= SIDE_KEY
+
+        square = BitboardPosition.en_passant_from_last_move(last_move)
+        if square is not None:
+            row, col = square >> 3, square & 7
+            pawn_row = row + 1 if current_turn == FigureColor.WHITE else row - 1
+            for pawn_col in (col - 1, col + 1):
+                figure = board.squares[pawn_row][pawn_col] if 0 <= pawn_col < 8 else None
+                if figure is not None and figure.name == "pawn" and figure.color == current_turn:
+                    value ^= EN_PASSANT_KEYS[col]
+                    break
+
+        return value
+
+    @staticmethod
+    def update_for_move(value: int, undo: MoveUndo) -> int:
+        """Verschiebt die Figuren aus dem Undo-Record im Hash; Zugrecht und Rechte laufen über state_key."""
+        value ^= ZobristService.piece_key(undo.figure, undo.start) ^ ZobristService.piece_key(undo.figure, undo.end)
+
+        if undo.captured is not None:
+            value ^= ZobristService.piece_key(undo.captured, undo.captured_position)
+
+        if undo.rook_start is not None:
+            keys = PIECE_KEYS[piece_code(color_index(undo.figure.color), ROOK)]
+            value ^= keys[undo.rook_start[0] * 8 + undo.rook_start[1]] ^ keys[undo.rook_end[0] * 8 + undo.rook_end[1]]
+
+        return value
+
+    @staticmethod
+    def update_for_promotion(value: int, pawn: Figure, promoted_figure: Figure, position: tuple[int, int]) -> int:
+        return value ^ ZobristService.piece_key(pawn, position) ^ ZobristService.piece_key(promoted_figure, position)
+
+    @staticmethod
+    def update_for_position_move(value: int, move: tuple[int, int, Optional[int]], undo: PositionUndo) -> int:
+        """Wie update_for_move, aber für einen Zug auf der BitboardPosition; Zugrecht und Rechte laufen über
+        position_state_key vor und nach dem Zug."""
+        from_square, to_square, promotion = move
+        moving = undo.moving
+        arriving = moving if promotion is None else moving - moving % 6 + promotion
+        value ^= PIECE_KEYS[moving][from_square] ^ PIECE_KEYS[arriving][to_square]
+
+        if undo.captured is not None:
+            value ^= PIECE_KEYS[undo.captured][undo.captured_square]
+
+        if moving % 6 == KING and abs(to_square - from_square) == 2:
+            keys = PIECE_KEYS[moving - KING + ROOK]
+            for square in iter_squares(BitboardPosition.castling_rook_mask(from_square, to_square)):
+                value ^= keys[square]
+
+        return value
+
+    @staticmethod
+    def update_for_piece_change(value: int, previous_code: int, code: int, square: int) -> int:
+        return value ^ PIECE_KEYS[previous_code][square] ^ PIECE_KEYS[code][square]
@@ -0,0 +1,19 @@
+from migrate_boards import main, measure_encoding, sample_game_document
+
+def test_compact_board_encoding_should_shrink_document_and_decode_faster(record_property):
+    result = measure_encoding(sample_game_document(), rounds=500)
+
+    record_property("squares_bytes", result.squares_bytes)
+    record_property("compact_bytes", result.compact_bytes)
+    record_property("bson_decode_speedup", round(result.decode_speedup, 2))
+    record_property("piece_board_speedup", round(result.board_speedup, 2))
+    print(f"squares={result.squares_bytes}B fen={result.compact_bytes}B "
+          f"bson={result.decode_speedup:.1f}x piece_board={result.board_speedup:.1f}x")
+
+    assert result.size_reduction > 0.5
+    assert result.decode_speedup > 1
+    assert result.board_speedup > 1
+
+def test_main_measure_should_not_need_database(capsys):
+    assert main(["--measure", "--rounds", "10"]) == 0
+    assert "Größe" in capsys.readouterr().out
@@ -0,0 +1,43 @@
+import time
+from bson import BSON
+from models.chess_game import ChessGame
+from repositories.chess_game_repo import ChessGameRepository
+from services.chess_game_service import ChessGameService
+from migrate_boards import sample_game_document
+
+ROUNDS = 300
+
+def previous_decode(game_data: dict) -> ChessGame:
+    # Alter Weg: ChessGame validieren, wieder dumpen, jede Figur einzeln umwandeln, erneut validieren.
+    game_dict = ChessGame(**game_data).model_dump()
+    for row in game_dict["board"]["squares"]:
+        for i, figure in enumerate(row):
+            if figure:
+                row[i] = ChessGameService.convert_figure(figure)
+    return ChessGame(**game_dict)
+
+def seconds_per_round(decode, raw_document: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        game_data = BSON(raw_document).decode()
+        game_data["game_id"] = game_data.pop("_id")
+        decode(game_data)
+    return (time.perf_counter() - start) / ROUNDS
+
+def test_decode_game_should_be_faster_than_previous_path(record_property):
+    squares_document = sample_game_document()
+    compact_document = dict(squares_document, board=ChessGameRepository.encode_board(squares_document["board"]))
+    squares_bson, compact_bson = BSON.encode(squares_document), BSON.encode(compact_document)
+
+    previous_seconds = seconds_per_round(previous_decode, squares_bson)
+    squares_seconds = seconds_per_round(ChessGameRepository.decode_game, squares_bson)
+    compact_seconds = seconds_per_round(ChessGameRepository.decode_game, compact_bson)
+
+    record_property("previous_decode_us", round(previous_seconds * 1e6, 1))
+    record_property("squares_decode_us", round(squares_seconds * 1e6, 1))
+    record_property("compact_decode_us", round(compact_seconds * 1e6, 1))
+    print(f"previous={previous_seconds * 1e6:.1f}µs squares={squares_seconds * 1e6:.1f}µs "
+          f"fen={compact_seconds * 1e6:.1f}µs")
+
+    assert squares_seconds < previous_seconds
+    assert compact_seconds < previous_seconds
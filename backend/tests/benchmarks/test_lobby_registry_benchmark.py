@@ -0,0 +1,63 @@
+import time
+import uuid
+from models.lobby import Lobby
+from models.user import UserLobby
+from repositories.lobby_registry import InMemoryLobbyRegistry, ALREADY_IN_LOBBY_ERROR
+
+OPEN_LOBBIES = 20_000
+ROUNDS = 1_000
+
+def previous_create(lobbies: dict, lobby: Lobby):
+    # Alter Weg aus ChessLobbyService.create_lobby: alle Lobbys und alle Spieler durchsuchen.
+    for existing in lobbies.values():
+        if any(player.user_id == lobby.players[0].user_id for player in existing.players):
+            raise ValueError(ALREADY_IN_LOBBY_ERROR)
+    lobbies[lobby.game_id] = lobby
+
+def new_lobbies(count: int, prefix: str):
+    return [Lobby(game_id=str(uuid.uuid4()), players=[UserLobby(user_id=f"{prefix}{i}", username=f"{prefix}{i}")])
+            for i in range(count)]
+
+def seconds_per_create(create, lobbies) -> float:
+    start = time.perf_counter()
+    for lobby in lobbies:
+        create(lobby)
+    return (time.perf_counter() - start) / len(lobbies)
+
+def test_create_should_not_slow_down_with_open_lobbies(record_property):
+    registry = InMemoryLobbyRegistry()
+    previous = {}
+    for lobby in new_lobbies(OPEN_LOBBIES, "host"):
+        registry.create(lobby)
+        previous[lobby.game_id] = lobby
+
+    def previous_with_existing(lobby):
+        previous_create(previous, lobby)
+
+    indexed_seconds = seconds_per_create(registry.create, new_lobbies(ROUNDS, "new"))
+    previous_seconds = seconds_per_create(previous_with_existing, new_lobbies(ROUNDS // 10, "old"))
+
+    record_property("indexed_create_us", round(indexed_seconds * 1e6, 2))
+    record_property("previous_create_us", round(previous_seconds * 1e6, 2))
+    print(f"{OPEN_LOBBIES} Lobbys: indexed={indexed_seconds * 1e6:.2f}µs previous={previous_seconds * 1e6:.1f}µs")
+
+    assert registry.count_open() == OPEN_LOBBIES + ROUNDS
+    assert indexed_seconds * 100 < previous_seconds
+
+def test_filtered_page_should_not_scan_full_lobbies(record_property):
+    registry = InMemoryLobbyRegistry()
+    for i, lobby in enumerate(new_lobbies(OPEN_LOBBIES, "host")):
+        registry.create(lobby)
+        if i < OPEN_LOBBIES - 10:
+            registry.join(lobby.game_id, UserLobby(user_id=f"guest{i}", username=f"guest{i}"))
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        page, _ = registry.find_page(None, 10, open_only=True)
+    seconds = (time.perf_counter() - start) / ROUNDS
+
+    record_property("open_page_us", round(seconds * 1e6, 2))
+    print(f"{OPEN_LOBBIES} Lobbys, 10 offen: open_page={seconds * 1e6:.2f}µs")
+    assert len(page) == 10
+    # Ein Durchlauf über alle vollen Lobbys bräuchte ein Vielfaches davon.
+    assert seconds < 0.001
@@ -0,0 +1,71 @@
+import os
+import pytest
+from perft import PERFT_POSITIONS, load_position, main, perft, run_perft
+
+# Standardtiefen bleiben unter ~100k Knoten, damit die Suite in CI schnell bleibt.
+# Mit PERFT_EXTRA_DEPTH=1 (oder mehr) laufen alle Stellungen entsprechend tiefer.
+EXTRA_DEPTH = int(os.getenv("PERFT_EXTRA_DEPTH", "0"))
+
+BENCHMARK_CASES = [
+    ("start", 3),
+    ("kiwipete", 2),
+    ("position3", 3),
+    ("position4", 3),
+    ("position5", 2),
+]
+
+@pytest.mark.parametrize("name, depth", [
+    (name, min(depth + EXTRA_DEPTH, len(PERFT_POSITIONS[name].expected_nodes)))
+    for name, depth in BENCHMARK_CASES
+])
+def test_perft_benchmark_should_match_published_node_counts(name, depth, record_property):
+    position = load_position(name)
+
+    result = run_perft(position, depth)
+
+    record_property("perft_depth", depth)
+    record_property("perft_nodes", result.nodes)
+    record_property("perft_nodes_per_second", round(result.nodes_per_second))
+
+    assert result.nodes == PERFT_POSITIONS[name].expected_nodes[depth - 1]
+
+def test_perft_should_leave_position_unchanged():
+    position = load_position("kiwipete")
+    original = position.copy()
+
+    perft(position, 2)
+
+    assert position == original
+
+def test_run_perft_divide_should_sum_to_total_nodes():
+    result = run_perft(load_position("start"), 2)
+
+    assert len(result.divide) == 20
+    assert result.divide["e2e4"] == 20
+    assert sum(result.divide.values()) == result.nodes == 400
+
+def test_run_perft_divide_should_name_promotions():
+    result = run_perft(load_position(fen="8/P7/8/8/8/8/8/k6K w - - 0 1"), 1)
+
+    assert {"a7a8q", "a7a8r", "a7a8b", "a7a8n"} <= set(result.divide)
+
+def test_perft_cli_should_report_nodes_and_return_zero(capsys):
+    assert main(["--position", "position3", "--depth", "2"]) == 0
+
+    output = capsys.readouterr().out
+    assert "position3 depth=2 nodes=191" in output
+    assert "nps=" in output
+    assert "OK" in output
+
+def test_perft_cli_should_print_divide_for_fen(capsys):
+    assert main(["--fen", "8/8/8/8/8/8/4P3/4K2k w - - 0 1", "--depth", "1", "--divide"]) == 0
+
+    output = capsys.readouterr().out
+    assert "e2e4: 1" in output
+    assert "fen depth=1" in output
+
+def test_load_position_should_reject_unknown_name():
+    with pytest.raises(ValueError) as e:
+        load_position("unknown")
+
+    assert str(e.value) == "Unbekannte Perft-Stellung: unknown"
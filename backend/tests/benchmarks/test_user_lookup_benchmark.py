@@ -0,0 +1,24 @@
+from user_lookup_benchmark import generate_users, latency_summary, winning_stage
+
+# Der eigentliche Lauf mit 1M Benutzern braucht eine echte Mongo-Instanz:
+# python user_lookup_benchmark.py --users 1000000
+
+def test_latency_summary_should_report_percentiles_in_ms():
+    summary = latency_summary([i / 1000 for i in range(1, 101)])
+
+    assert summary.samples == 100
+    assert summary.p50_ms == 51
+    assert summary.p99_ms == 100
+    assert round(summary.mean_ms, 1) == 50.5
+
+def test_generate_users_should_create_unique_usernames():
+    users = list(generate_users(999_998, 2))
+
+    assert [user["username"] for user in users] == ["user0999998", "user0999999"]
+    assert users[0]["_id"] != users[1]["_id"]
+
+def test_winning_stage_should_find_nested_scan_stage():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "username_unique"}}
+
+    assert winning_stage(plan) == "IXSCAN"
+    assert winning_stage({"stage": "COLLSCAN"}) == "COLLSCAN"
@@ -7,6 +7,7 @@ from services.chess_game_service import ChessGameService
 from services.chess_board_service import ChessBoardService
 from repositories.chess_game_repo import ChessGameRepository
 from models.chess_game import ChessGame
+from models.game_state import GameState
 from models.user import UserInGame
 from models.chess_game import GameStatus
 from jsonschema import validate
@@ -16,7 +17,7 @@ client = TestClient(app)
 @pytest.fixture
 def mock_db(mocker):
     mock_repo = mocker.patch("repositories.chess_game_repo.ChessGameRepository")
-    mock_repo.find_game_by_id = MagicMock()
+    mock_repo.find_game_state = MagicMock()
     mock_repo.insert_game = MagicMock()
     return mock_repo
 
@@ -48,8 +49,13 @@ def initialized_game(mocker):
 
     mocker.patch.object(
         ChessGameRepository,
-        "find_game_by_id",
-        return_value=game
+        "find_game_state",
+        side_effect=lambda game_id: GameState.from_document(game.model_dump())
+    )
+    mocker.patch.object(
+        ChessGameRepository,
+        "find_game_document",
+        side_effect=lambda game_id, **kwargs: game.model_dump()
     )
 
     return game
@@ -61,7 +67,7 @@ def test_websocket_connect_should_return_broadcast_initial_game_state_message(in
         data = websocket.receive_json()
         assert data["type"] == "game_state"
 
-def test_websocket_move_success_should_return_broadcast_new_game_state(initialized_game):
+def test_websocket_move_success_should_return_broadcast_move_delta(initialized_game):
     game_id = initialized_game.game_id
     user_id = "1234"
 
@@ -74,38 +80,69 @@ def test_websocket_move_success_should_return_broadcast_new_game_state(initializ
     }
 
     with client.websocket_connect(f"game/ws/{game_id}") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "game_state"
         websocket.send_json(move_data)
 
         for _ in range(5):
             data = websocket.receive_json()
 
-            if data["type"] == "game_state" and data["data"]["current_turn"] == "black":
+            if data["type"] == "game_delta":
                 break
         else:
             pytest.fail("Timeout!")
-            
-        assert data["type"] == "game_state"
-        assert "data" in data
 
-        game_state = data["data"]
+        assert data["seq"] == snapshot["seq"] + 1
+        assert "board" not in data["changes"]
+
+        changes = data["changes"]
 
-        assert game_state["current_turn"] == "black"
+        assert changes["current_turn"] == "black"
 
-        board = game_state["board"]["squares"]
+        squares = {tuple(square["position"]): square["figure"] for square in data["squares"]}
 
-        assert board[6][0] is None
+        assert squares[(6, 0)] is None
 
-        moved_figure = board[5][0]
+        moved_figure = squares[(5, 0)]
         assert moved_figure is not None
         assert moved_figure["name"] == "pawn"
         assert moved_figure["color"] == "white"
         assert moved_figure["position"] == [5, 0]
-        assert "last_move" in game_state
-        last_move = game_state["last_move"]
+        last_move = changes["last_move"]
         assert last_move["start"] == [6, 0]
         assert last_move["end"] == [5, 0]
+        assert data["move"]["start"] == [6, 0]
+
+        assert changes["status"] == "running"
+
+def test_websocket_sync_should_resend_snapshot_to_client(initialized_game):
+    with client.websocket_connect(f"game/ws/{initialized_game.game_id}") as websocket:
+        first = websocket.receive_json()
+        websocket.send_json({"action": "sync"})
+        second = websocket.receive_json()
+
+    assert second["type"] == "game_state"
+    assert second["seq"] == first["seq"]
+    assert second["data"] == first["data"]
+
+def test_websocket_invalid_move_should_queue_error_after_snapshot(initialized_game):
+    with client.websocket_connect(f"game/ws/{initialized_game.game_id}") as websocket:
+        snapshot = websocket.receive_json()
+        websocket.send_json({"action": "move", "game_id": initialized_game.game_id,
+                             "start_pos": [6, 0], "end_pos": [2, 0], "user_id": "1234"})
+        error = websocket.receive_json()
+
+    assert snapshot["type"] == "game_state"
+    assert error["type"] == "error"
+
+def test_websocket_wrong_game_id_should_send_error_before_closing(initialized_game):
+    with client.websocket_connect(f"game/ws/{initialized_game.game_id}") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"action": "move", "game_id": "andere-id", "start_pos": [6, 0], "end_pos": [5, 0],
+                             "user_id": "1234"})
+        error = websocket.receive_json()
 
-        assert game_state["status"] == "running"
+    assert error == {"type": "error", "message": "Ungültige game_id!"}
 
 def test_start_game_should_return_200_and_json_response_chess_game(mocker):
     lobby = {
@@ -116,7 +153,7 @@ def test_start_game_should_return_200_and_json_response_chess_game(mocker):
         ]
     }
 
-    mocker.patch.object(ChessGameService, "start_game", return_value=ChessGame(
+    mocker.patch.object(ChessGameService, "start_game", return_value=GameState.from_chess_game(ChessGame(
         game_id="1234",
         time_stamp_start="2024-01-01T12:00:00",
         player_white=UserInGame(
@@ -136,7 +173,7 @@ def test_start_game_should_return_200_and_json_response_chess_game(mocker):
         current_turn="white",
         board=ChessBoardService().initialize_board(),
         status=GameStatus.RUNNING
-    ))
+    )))
     
     game_schema = {
     "type": "object",
@@ -253,4 +290,35 @@ def test_start_game_should_return_200_and_json_response_chess_game(mocker):
                 assert isinstance(square["position"], list)
                 assert len(square["position"]) == 2
                 assert all(isinstance(pos, int) for pos in square["position"])
-    
\ No newline at end of file
+    
+def test_legal_moves_should_return_200_and_moves_of_current_player(initialized_game):
+    response = client.get(f"/game/legal_moves/{initialized_game.game_id}")
+
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["game_id"] == initialized_game.game_id
+    assert response_json["current_turn"] == "white"
+    assert len(response_json["legal_moves"]) == 20
+    assert {"start": [6, 4], "end": [4, 4]} in response_json["legal_moves"]
+
+def test_legal_moves_cache_stats_should_count_repeated_requests(initialized_game):
+    client.get(f"/game/legal_moves/{initialized_game.game_id}")
+    before = client.get("/game/legal_moves_cache/stats").json()
+
+    client.get(f"/game/legal_moves/{initialized_game.game_id}")
+    after = client.get("/game/legal_moves_cache/stats").json()
+
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert after["entries"] >= 1
+
+def test_connection_stats_should_count_sent_game_state_and_release_connection(initialized_game):
+    before = client.get("/game/connections/stats").json()
+
+    with client.websocket_connect(f"game/ws/{initialized_game.game_id}") as websocket:
+        assert websocket.receive_json()["type"] == "game_state"
+
+    after = client.get("/game/connections/stats").json()
+    assert after["sent_messages"] == before["sent_messages"] + 1
+    assert after["connections"] == 0
+    assert after["queue_size"] > 0
@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
@@ -7,6 +8,7 @@ from models.lobby import Lobby
 from repositories.chess_game_repo import ChessGameRepository
 from services.chess_lobby_service import ChessLobbyService
 from services.chess_game_service import ChessGameService
+from services.lobby_listing_cache import LobbyListingCache, LobbyListPage
 from jsonschema import validate
 
 client = TestClient(app)
@@ -46,6 +48,18 @@ def test_websocket_lobby_should_return_200():
         data = websocket.receive_json()
         assert data == {"message": "refresh_lobby"}
 
+def test_websocket_lobby_directory_should_send_snapshot_on_connect_and_sync():
+    client.post("lobby/create", json={"user_id": "1234", "username": "Max"})
+
+    with client.websocket_connect("/lobby/directory/ws") as websocket:
+        snapshot = websocket.receive_json()
+        websocket.send_json({"action": "sync"})
+        resync = websocket.receive_json()
+
+    assert snapshot["type"] == "lobby_snapshot"
+    assert [lobby["players"][0]["username"] for lobby in snapshot["lobbies"]] == ["Max"]
+    assert resync["lobbies"] == snapshot["lobbies"]
+
 def test_create_lobby_should_return_200_and_json_response(mock_lobby_service):
     user = UserLobby(user_id="1234", username="Max", color=None, status="not_ready")
 
@@ -124,7 +138,8 @@ def test_list_lobbies_should_return_200_and_json_response(mock_lobby_service):
         }
     ]
 
-    mock_lobby_service.list_lobbies.return_value = {"lobbies": set_lobby_list}
+    body = json.dumps({"lobbies": set_lobby_list})
+    mock_lobby_service.list_lobbies_page.return_value = LobbyListPage(body, LobbyListingCache.etag(body), 1)
 
     response = client.get("/lobby/list")
 
@@ -161,7 +176,42 @@ def test_list_lobbies_should_return_200_and_json_response(mock_lobby_service):
     validate(response.json(), lobby_schema)
 
     assert response.json() == {"lobbies": set_lobby_list}
-    
+    mock_lobby_service.list_lobbies_page.assert_called_once_with(None, 50, False, None)
+
+def test_list_lobbies_should_pass_cursor_and_filters(mock_lobby_service):
+    mock_lobby_service.list_lobbies_page.return_value = LobbyListPage('{"lobbies":[]}', '"abc"', 1)
+
+    response = client.get("/lobby/list?cursor=17&limit=10&open=true&color=white")
+
+    assert response.status_code == 200
+    mock_lobby_service.list_lobbies_page.assert_called_once_with("17", 10, True, "white")
+
+def test_list_lobbies_should_return_422_for_invalid_limit_or_color():
+    assert client.get("/lobby/list?limit=0").status_code == 422
+    assert client.get("/lobby/list?color=green").status_code == 422
+
+def test_list_lobbies_should_return_400_for_invalid_cursor():
+    response = client.get("/lobby/list?cursor=abc")
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Ungültiger Cursor."}
+
+def test_list_lobbies_should_return_304_until_lobbies_change():
+    first = client.get("/lobby/list")
+    etag = first.headers["ETag"]
+
+    cached = client.get("/lobby/list", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+
+    client.post("lobby/create", json={"user_id": "1234", "username": "Max"})
+
+    changed = client.get("/lobby/list", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["lobbies"][0]["players"][0]["username"] == "Max"
+
 def test_join_lobby_should_return_200_and_json_response(mock_lobby_service):
     user = {
         "user_id": "1234",
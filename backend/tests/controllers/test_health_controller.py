@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from app import app
+
+client = TestClient(app)
+
+def test_health_should_return_200_and_latency(mocker):
+    mocker.patch("controllers.health_controller.mongodb.ping", return_value=1.234)
+
+    response = client.get("/health/")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "database_latency_ms": 1.23}
+
+def test_health_should_return_503_if_database_unreachable(mocker):
+    mocker.patch("controllers.health_controller.mongodb.ping", side_effect=Exception("timeout"))
+
+    response = client.get("/health/")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+
+def test_db_pool_stats_should_return_pool_stats(mocker):
+    mocker.patch("controllers.health_controller.mongodb.pool_stats", return_value={"connected": True, "checked_out": 3})
+
+    response = client.get("/health/db/pool")
+
+    assert response.status_code == 200
+    assert response.json()["checked_out"] == 3
+
+def test_db_index_usage_should_return_usage_per_collection(mocker):
+    mocker.patch("controllers.health_controller.indexes.index_usage",
+                 return_value={"users": {"username_unique": {"ops": 7, "since": "2024-03-06T12:00:00"}}})
+
+    response = client.get("/health/db/indexes")
+
+    assert response.status_code == 200
+    assert response.json()["users"]["username_unique"]["ops"] == 7
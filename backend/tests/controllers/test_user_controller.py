@@ -118,6 +118,15 @@ def test_update_user_username_should_return_200_and_updated_user(mock_user_servi
     assert response.json()["username"] == "testuser_edited"
 
 
+def test_update_user_to_existing_username_should_return_400_and_error_message(mock_user_service):
+    user_id = "123e4567-e89b-12d3-a456-426614174000"
+    mock_user_service.update_user.side_effect = ValueError("Username existiert bereits")
+
+    response = client.put(f"/users/update/{user_id}", json={"username": "taken"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username existiert bereits"
+
 def test_update_user_password_should_return_200_and_new_hashed_password(mock_user_service, mock_auth_service):
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     new_password = "newpassword"
@@ -129,7 +138,7 @@ def test_update_user_password_should_return_200_and_new_hashed_password(mock_use
 
     assert response.status_code == 200
     assert response.json()["username"] == "testuser"
-    mock_user_service.update_user.assert_called_once()
+    mock_user_service.update_user.assert_called_once_with(user_id, username=None, password=new_password)
 
     
 def test_delete_user_success_should_return_200_and_success_message(mock_user_service):
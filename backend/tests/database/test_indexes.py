@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+from pymongo.errors import OperationFailure
+from database.indexes import ensure_indexes, index_usage, USER_INDEXES, GAME_INDEXES, LOBBY_INDEXES
+
+def test_user_indexes_should_make_username_unique():
+    document = USER_INDEXES[0].document
+
+    assert document["key"] == {"username": 1}
+    assert document["unique"] is True
+
+def test_game_indexes_should_cover_players_status_and_start():
+    keys = [list(index.document["key"]) for index in GAME_INDEXES]
+
+    assert ["player_white.user_id", "time_stamp_start"] in keys
+    assert ["player_black.user_id", "time_stamp_start"] in keys
+    assert ["status", "time_stamp_start"] in keys
+    assert ["time_stamp_start"] in keys
+
+def test_ensure_indexes_should_create_indexes_per_collection():
+    db = {"users": MagicMock(), "games": MagicMock(), "lobbies": MagicMock()}
+    db["users"].create_indexes.return_value = ["username_unique"]
+
+    created = ensure_indexes(db)
+
+    db["users"].create_indexes.assert_called_once_with(USER_INDEXES)
+    db["games"].create_indexes.assert_called_once_with(GAME_INDEXES)
+    db["lobbies"].create_indexes.assert_called_once_with(LOBBY_INDEXES)
+    assert created["users"] == ["username_unique"]
+
+def test_ensure_indexes_should_continue_if_index_cannot_be_created():
+    users, games = MagicMock(), MagicMock()
+    users.create_indexes.side_effect = OperationFailure("E11000 duplicate key")
+    db = {"users": users, "games": games, "lobbies": MagicMock()}
+
+    created = ensure_indexes(db)
+
+    assert created["users"] == []
+    games.create_indexes.assert_called_once()
+
+def test_index_usage_should_report_ops_per_index():
+    db = {"users": MagicMock(), "games": MagicMock(), "lobbies": MagicMock()}
+    db["users"].aggregate.return_value = [{"name": "username_unique", "accesses": {"ops": 42, "since": "2024-03-06"}}]
+    db["games"].aggregate.return_value = []
+    db["lobbies"].aggregate.return_value = []
+
+    usage = index_usage(db)
+
+    db["users"].aggregate.assert_called_once_with([{"$indexStats": {}}])
+    assert usage["users"]["username_unique"]["ops"] == 42
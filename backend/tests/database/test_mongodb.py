@@ -0,0 +1,80 @@
+import pytest
+import subprocess
+import sys
+from unittest.mock import MagicMock
+from database import mongodb
+
+@pytest.fixture(autouse=True)
+def reset_client():
+    mongodb.close()
+    yield
+    mongodb.close()
+
+def test_import_should_not_create_client():
+    code = "import repositories.chess_game_repo, repositories.user_repo; from database import mongodb; print(mongodb.client)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "None"
+
+def test_load_settings_should_read_pool_and_concern_settings(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "2")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN_W", "majority")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN_J", "true")
+    monkeypatch.setenv("MONGO_READ_CONCERN", "majority")
+
+    settings = mongodb.load_settings()
+
+    assert settings.max_pool_size == 20
+    assert settings.min_pool_size == 2
+    assert settings.write_concern_w == "majority"
+    assert settings.write_concern_journal is True
+    assert settings.read_concern == "majority"
+    assert settings.socket_timeout_ms is None
+
+def test_get_client_should_pass_settings_to_mongo_client(monkeypatch, mocker):
+    monkeypatch.setenv("MONGO_URI", "mongodb://db:27017")
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "10")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN_W", "2")
+    mongo_client = mocker.patch("database.mongodb.MongoClient")
+
+    assert mongodb.get_client() is mongodb.get_client()
+
+    mongo_client.assert_called_once()
+    args, kwargs = mongo_client.call_args
+    assert args == ("mongodb://db:27017",)
+    assert kwargs["maxPoolSize"] == 10
+    assert kwargs["w"] == 2
+    assert "socketTimeoutMS" not in kwargs
+    assert isinstance(kwargs["event_listeners"][0], mongodb.PoolStatsListener)
+
+def test_lazy_collection_should_connect_on_first_use(mocker):
+    mongo_client = mocker.patch("database.mongodb.MongoClient")
+    collection = mongodb.LazyCollection("games")
+    assert mongodb.client is None
+
+    collection.find_one({"_id": "1234"})
+
+    mongo_client.return_value.__getitem__.return_value.__getitem__.return_value.find_one.assert_called_once_with({"_id": "1234"})
+
+def test_close_should_reset_client(mocker):
+    mongo_client = mocker.patch("database.mongodb.MongoClient")
+    mongodb.connect()
+
+    mongodb.close()
+
+    mongo_client.return_value.close.assert_called_once()
+    assert mongodb.client is None
+    assert mongodb.pool_stats() == {"connected": False}
+
+def test_pool_listener_should_count_connections():
+    listener = mongodb.PoolStatsListener()
+
+    listener.connection_created(MagicMock())
+    listener.connection_created(MagicMock())
+    listener.connection_checked_out(MagicMock())
+    listener.connection_checked_in(MagicMock())
+    listener.connection_checked_out(MagicMock())
+    listener.connection_closed(MagicMock())
+
+    assert listener.snapshot() == {"open_connections": 1, "checked_out": 1, "created": 2, "closed": 1, "checkout_failures": 0}
@@ -0,0 +1,71 @@
+import pytest
+import asyncio
+import threading
+from repositories.async_repo import AsyncChessGameRepository, AsyncUserRepository
+from repositories.memory_repo import InMemoryChessGameRepository, InMemoryUserRepository
+from services.chess_board_service import ChessBoardService
+from models.chess_game import ChessGame, GameStatus
+from models.user import UserDB, UserInGame, PlayerColor
+
+def create_game(game_id="1234"):
+    return ChessGame(
+        game_id=game_id,
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    )
+
+async def test_async_game_repo_should_roundtrip_game():
+    repo = AsyncChessGameRepository(InMemoryChessGameRepository())
+
+    await repo.insert_game(create_game())
+
+    game = await repo.find_game_by_id("1234")
+    assert game.game_id == "1234"
+    assert game.board.squares[7][4].name == "king"
+    assert (await repo.find_game_document("1234"))["current_turn"] == "white"
+    assert await repo.find_game_by_id("unknown") is None
+
+async def test_async_game_repo_should_run_blocking_calls_outside_event_loop():
+    loop_thread = threading.get_ident()
+    calls = []
+
+    class BlockingRepo(InMemoryChessGameRepository):
+        def find_game_document(self, game_id, decode_board=True):
+            calls.append(threading.get_ident())
+            return super().find_game_document(game_id, decode_board)
+
+    repo = AsyncChessGameRepository(BlockingRepo())
+    await asyncio.gather(*(repo.find_game_document(str(i)) for i in range(3)))
+
+    assert len(calls) == 3
+    assert loop_thread not in calls
+
+async def test_in_memory_game_repo_should_not_share_documents():
+    repo = InMemoryChessGameRepository()
+    repo.insert_game(create_game())
+
+    document = repo.find_game_document("1234")
+    document["current_turn"] = "black"
+
+    assert repo.find_game_document("1234")["current_turn"] == "white"
+
+async def test_async_user_repo_should_insert_update_and_delete_user():
+    repo = AsyncUserRepository(InMemoryUserRepository())
+    await repo.insert_user(UserDB(user_id="1", username="Max", password_hash="hash"))
+
+    assert (await repo.find_user_by_username("Max")).user_id == "1"
+    assert (await repo.update_user("1", {"username": "Moritz"})).username == "Moritz"
+    assert await repo.find_user_by_username("Max") is None
+    assert await repo.delete_user("1") is True
+    assert await repo.find_user_by_id("1") is None
+
+async def test_in_memory_user_repo_should_reject_duplicate_username():
+    repo = InMemoryUserRepository()
+    repo.insert_user(UserDB(user_id="1", username="Max", password_hash="hash"))
+
+    with pytest.raises(ValueError):
+        repo.insert_user(UserDB(user_id="2", username="Max", password_hash="hash"))
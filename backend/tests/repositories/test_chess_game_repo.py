@@ -0,0 +1,215 @@
+import pytest
+from bson import BSON
+from repositories.chess_game_repo import ChessGameRepository
+from models.figure import FigureColor, King, Queen
+from models.piece_board import PieceBoard
+from services.chess_board_service import ChessBoardService
+from models.chess_game import ChessGame, GameStatus
+from models.user import UserInGame, PlayerColor
+
+@pytest.fixture
+def games_collection(mocker):
+    return mocker.patch("repositories.chess_game_repo.games_collection")
+
+def create_game(game_id="1234"):
+    return ChessGame(
+        game_id=game_id,
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    )
+
+def play_move(game, start_pos, end_pos, notation):
+    game.board.make_move(start_pos, end_pos)
+    game.player_white.move_history.append(notation)
+    game.current_turn = "black"
+
+def test_insert_game_should_write_full_snapshot_first(games_collection):
+    repo = ChessGameRepository()
+
+    repo.insert_game(create_game())
+
+    games_collection.replace_one.assert_called_once()
+    games_collection.update_one.assert_not_called()
+    assert games_collection.replace_one.call_args[0][1]["_id"] == "1234"
+
+def test_insert_game_should_write_only_changed_fields_after_snapshot(games_collection):
+    repo = ChessGameRepository(board_encoding="squares")
+    game = create_game()
+    repo.insert_game(game)
+
+    play_move(game, (6, 4), (4, 4), "e2e4")
+    repo.insert_game(game)
+
+    games_collection.replace_one.assert_called_once()
+    query, update = games_collection.update_one.call_args[0]
+    assert query == {"_id": "1234", "seq": 0}
+    assert update["$push"] == {"player_white.move_history": {"$each": ["e2e4"]}}
+    assert update["$set"]["current_turn"] == "black"
+    assert update["$set"]["board.squares.6.4"] is None
+    assert update["$set"]["board.squares.4.4"]["position"] == (4, 4)
+    assert set(update["$set"]) == {"current_turn", "board.squares.6.4", "board.squares.4.4"}
+
+def test_insert_game_should_store_compact_board(games_collection):
+    repo = ChessGameRepository()
+
+    repo.insert_game(create_game())
+
+    board = games_collection.replace_one.call_args[0][1]["board"]
+    assert board["fen"] == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+    assert board["ids"]["60"] == "white-king-e1"
+    assert board["moved"] == []
+    assert "squares" not in board
+
+def test_insert_game_should_write_changed_squares_of_compact_board(games_collection):
+    repo = ChessGameRepository()
+    game = create_game()
+    repo.insert_game(game)
+
+    play_move(game, (6, 4), (4, 4), "e2e4")
+    repo.insert_game(game)
+
+    update = games_collection.update_one.call_args[0][1]
+    assert update["$set"]["board.fen"] == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR"
+    assert update["$set"]["board.ids.36"] == "white-pawn-e2"
+    assert update["$unset"] == {"board.ids.52": ""}
+    assert set(update["$set"]) == {"current_turn", "board.fen", "board.ids.36"}
+
+def test_find_game_document_should_decode_compact_and_legacy_boards(games_collection):
+    repo = ChessGameRepository()
+    legacy_squares = ChessBoardService.start_position_document()
+    compact_board = ChessGameRepository.encode_board({"squares": ChessBoardService.start_position_document()})
+
+    games_collection.find_one.return_value = {"_id": "1234", "board": compact_board}
+    compact = repo.find_game_document("1234")
+    games_collection.find_one.return_value = {"_id": "1234", "board": {"squares": legacy_squares}}
+    legacy = repo.find_game_document("1234")
+
+    assert compact["board"]["squares"] == legacy["board"]["squares"] == ChessBoardService.start_position_document()
+    assert compact["game_id"] == "1234"
+
+def test_find_game_document_should_keep_compact_board_if_requested(games_collection):
+    repo = ChessGameRepository()
+    compact_board = ChessGameRepository.encode_board({"squares": ChessBoardService.start_position_document()})
+    games_collection.find_one.return_value = {"_id": "1234", "board": dict(compact_board)}
+
+    assert repo.find_game_document("1234", decode_board=False)["board"] == compact_board
+
+def test_migrate_boards_should_rewrite_legacy_documents_in_batches(games_collection):
+    repo = ChessGameRepository()
+    games_collection.find.return_value = [
+        {"_id": str(game_id), "board": {"squares": ChessBoardService.start_position_document()}} for game_id in range(3)
+    ]
+    games_collection.bulk_write.return_value.modified_count = 2
+
+    assert repo.migrate_boards(batch_size=2) == 4
+
+    assert games_collection.bulk_write.call_count == 2
+    operation = games_collection.bulk_write.call_args_list[0][0][0][0]
+    assert operation._filter == {"_id": "0", "board.squares": {"$exists": True}}
+    assert operation._doc["$set"]["board"]["fen"] == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+
+def test_insert_game_should_take_periodic_snapshots(games_collection):
+    repo = ChessGameRepository(snapshot_interval=3)
+    game = create_game()
+
+    for turn in range(6):
+        game.current_turn = "black" if turn % 2 == 0 else "white"
+        repo.insert_game(game)
+
+    assert games_collection.replace_one.call_count == 2
+    assert games_collection.update_one.call_count == 4
+
+def test_insert_game_should_rewrite_snapshot_after_failed_update(games_collection):
+    repo = ChessGameRepository()
+    game = create_game()
+    repo.insert_game(game)
+
+    games_collection.update_one.side_effect = Exception("Mongo nicht erreichbar")
+    game.current_turn = "black"
+    with pytest.raises(Exception):
+        repo.insert_game(game)
+
+    repo.insert_game(game)
+    assert games_collection.replace_one.call_count == 2
+
+def test_insert_game_should_replace_document_if_stored_seq_moved_on(games_collection):
+    repo = ChessGameRepository()
+    game = create_game()
+    repo.insert_game(game)
+
+    # Ein anderer Worker hat das Spiel inzwischen geschrieben: das Delta trifft kein Dokument.
+    games_collection.update_one.return_value.matched_count = 0
+    play_move(game, (6, 4), (4, 4), "e2e4")
+    game.seq = 1
+    repo.insert_game(game)
+
+    assert games_collection.update_one.call_args[0][0] == {"_id": "1234", "seq": 0}
+    assert games_collection.replace_one.call_count == 2
+    replaced = games_collection.replace_one.call_args[0][1]
+    assert replaced["player_white"]["move_history"] == ["e2e4"] and replaced["seq"] == 1
+    assert repo.writes_since_snapshot["1234"] == 0
+
+def test_insert_game_should_forget_finished_games(games_collection):
+    repo = ChessGameRepository()
+    game = create_game()
+    repo.insert_game(game)
+
+    game.status = GameStatus.ENDED
+    repo.insert_game(game)
+
+    assert games_collection.update_one.call_args[0][1] == {"$set": {"status": GameStatus.ENDED}}
+    assert "1234" not in repo.persisted_games
+
+def test_build_update_should_set_list_that_is_not_appended():
+    previous = {"_id": "1", "player_white": {"move_history": ["a", "b"]}, "winner": "white"}
+    current = {"_id": "1", "player_white": {"move_history": ["c"]}}
+
+    assert ChessGameRepository.build_update(previous, current) == {
+        "$set": {"player_white.move_history": ["c"]},
+        "$unset": {"winner": ""},
+    }
+
+def stored_document(game, board_encoding="fen"):
+    # Wie das Dokument nach dem Lesen aus Mongo aussieht: Tupel als Listen, Enums als Strings.
+    game_dict = game.model_dump()
+    game_dict["_id"] = game_dict.pop("game_id")
+    pieces = PieceBoard.from_chess_board(game.board)
+    game_dict["board"] = pieces.to_compact() if board_encoding == "fen" else {"squares": pieces.to_document()}
+    document = BSON(BSON.encode(game_dict)).decode()
+    document["game_id"] = document.pop("_id")
+    return document
+
+@pytest.mark.parametrize("board_encoding", ["fen", "squares"])
+def test_decode_game_should_build_typed_figures_in_one_pass(board_encoding):
+    game = create_game()
+    game.board.squares[7][7].has_moved = True
+
+    decoded = ChessGameRepository.decode_game(stored_document(game, board_encoding))
+
+    assert decoded == game
+    assert isinstance(decoded.board.squares[7][4], King)
+    assert decoded.board.squares[7][7].has_moved is True
+    assert decoded.board.squares[6][0].position == (6, 0)
+    assert decoded.board.squares[6][0].color == FigureColor.WHITE
+
+def test_decode_figure_should_dispatch_on_name_without_type():
+    figure = ChessGameRepository.decode_figure({"id": "q", "name": "queen", "color": "black", "position": [0, 3]})
+
+    assert isinstance(figure, Queen)
+    assert figure.position == (0, 3)
+
+def test_decode_figure_should_reject_unknown_figure():
+    with pytest.raises(ValueError, match="Unbekannte Figur"):
+        ChessGameRepository.decode_figure({"name": "dragon", "color": "white", "position": [0, 0]})
+
+def test_find_game_by_id_should_decode_stored_document(games_collection):
+    game = create_game()
+    document = stored_document(game)
+    document["_id"] = document.pop("game_id")
+    games_collection.find_one.return_value = document
+
+    assert ChessGameRepository().find_game_by_id("1234") == game
@@ -0,0 +1,324 @@
+import pytest
+import threading
+from bson import ObjectId
+from unittest.mock import MagicMock
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from repositories.lobby_registry import (InMemoryLobbyRegistry, MongoLobbyRegistry, LobbyRegistryView,
+                                         create_lobby_registry, ALREADY_IN_LOBBY_ERROR, INVALID_CURSOR_ERROR)
+from models.lobby import Lobby
+from models.user import UserLobby
+
+def host():
+    return UserLobby(user_id="1234", username="Max", color=None, status="not_ready")
+
+def guest():
+    return UserLobby(user_id="5678", username="Anna", color=None, status="not_ready")
+
+def lobby_document(*players):
+    document = {"_id": "game-1", "players": [player.model_dump(mode="json") for player in players],
+                "open_slots": 2 - len(players)}
+    if players:
+        document["host_id"] = players[0].user_id
+    return document
+
+def test_in_memory_create_should_reject_user_already_in_a_lobby():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+
+    with pytest.raises(ValueError, match=ALREADY_IN_LOBBY_ERROR):
+        registry.create(Lobby(game_id="game-2", players=[host()]))
+    assert registry.ids() == ["game-1"]
+
+def test_in_memory_leave_should_delete_empty_lobby():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+    registry.join("game-1", guest())
+
+    assert [player.user_id for player in registry.leave("game-1", "1234").players] == ["5678"]
+    assert registry.leave("game-1", "5678") is None
+    assert registry.get("game-1") is None
+
+def test_in_memory_set_color_and_status_should_validate_player():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host(), guest()]))
+
+    registry.set_color("game-1", "1234", "white")
+    with pytest.raises(ValueError, match="Farbe bereits vergeben."):
+        registry.set_color("game-1", "5678", "white")
+    with pytest.raises(ValueError, match="Wähle zuerst eine Farbe."):
+        registry.set_status("game-1", "5678", "ready")
+
+    assert registry.set_status("game-1", "1234", "ready").players[0].status == "ready"
+
+def test_in_memory_concurrent_joins_should_fill_lobby_only_once():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+    errors = []
+
+    def join(user_id):
+        try:
+            registry.join("game-1", UserLobby(user_id=user_id, username=user_id))
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=join, args=(str(i),)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(registry.get("game-1").players) == 2
+    assert errors == ["Lobby ist bereits voll."] * 7
+
+def test_mongo_join_should_push_player_with_single_conditional_update():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = lobby_document(host(), guest())
+    registry = MongoLobbyRegistry(collection)
+
+    lobby = registry.join("game-1", guest())
+
+    assert [player.user_id for player in lobby.players] == ["1234", "5678"]
+    collection.find_one_and_update.assert_called_once_with(
+        {"_id": "game-1", "players.user_id": {"$ne": "5678"}, "open_slots": {"$gt": 0}},
+        {"$push": {"players": guest().model_dump(mode="json")}, "$inc": {"open_slots": -1}},
+        array_filters=None, return_document=ReturnDocument.AFTER
+    )
+
+def test_mongo_join_failed_condition_should_raise_reason_from_current_document():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = None
+    collection.find_one.return_value = lobby_document(host(), guest())
+    registry = MongoLobbyRegistry(collection)
+
+    with pytest.raises(ValueError, match="Lobby ist bereits voll."):
+        registry.join("game-1", UserLobby(user_id="9012", username="Fritz"))
+
+    collection.find_one.return_value = None
+    with pytest.raises(ValueError, match="Lobby existiert nicht."):
+        registry.join("game-1", UserLobby(user_id="9012", username="Fritz"))
+
+def test_mongo_update_should_retry_when_lobby_changed_in_between():
+    collection = MagicMock()
+    collection.find_one_and_update.side_effect = [None, lobby_document(host(), guest())]
+    # Beim ersten Versuch war die Lobby noch frei: die Bedingung scheiterte an einer gleichzeitigen Änderung.
+    collection.find_one.return_value = lobby_document(host())
+    registry = MongoLobbyRegistry(collection)
+
+    lobby = registry.join("game-1", guest())
+
+    assert len(lobby.players) == 2
+    assert collection.find_one_and_update.call_count == 2
+
+def test_mongo_leave_last_player_should_delete_only_empty_lobby():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = {"_id": "game-1", "players": [], "open_slots": 2}
+    registry = MongoLobbyRegistry(collection)
+
+    assert registry.leave("game-1", "1234") is None
+    collection.delete_one.assert_called_once_with({"_id": "game-1", "players": {"$size": 0}})
+
+def test_mongo_set_color_should_only_match_if_color_is_free():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = lobby_document(UserLobby(user_id="1234", username="Max", color="white"))
+    registry = MongoLobbyRegistry(collection)
+
+    registry.set_color("game-1", "1234", "white")
+
+    query, update = collection.find_one_and_update.call_args.args
+    assert query["$and"][1] == {"players": {"$not": {"$elemMatch": {"user_id": {"$ne": "1234"}, "color": "white"}}}}
+    assert update == {"$set": {"players.$[player].color": "white"}}
+    assert collection.find_one_and_update.call_args.kwargs["array_filters"] == [{"player.user_id": "1234"}]
+
+def test_mongo_create_should_reject_user_already_in_a_lobby():
+    collection = MagicMock()
+    collection.find_one.return_value = lobby_document(host())
+    registry = MongoLobbyRegistry(collection)
+
+    with pytest.raises(ValueError, match=ALREADY_IN_LOBBY_ERROR):
+        registry.create(Lobby(game_id="game-2", players=[host()]))
+    collection.find_one.assert_called_once_with({"players.user_id": "1234"})
+    collection.insert_one.assert_not_called()
+
+def test_mongo_concurrent_create_should_fail_on_unique_host_index():
+    collection = MagicMock()
+    # Die Abfrage sah noch keine Lobby, ein anderer Worker hat aber gleichzeitig eingefügt.
+    collection.find_one.return_value = None
+    collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key error, index: lobby_host")
+    registry = MongoLobbyRegistry(collection)
+
+    with pytest.raises(ValueError, match=ALREADY_IN_LOBBY_ERROR):
+        registry.create(Lobby(game_id="game-2", players=[host()]))
+    assert collection.insert_one.call_args.args[0]["host_id"] == "1234"
+    assert registry.version == 0
+
+def test_mongo_leave_of_host_should_release_host_claim():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = {**lobby_document(guest()), "host_id": "1234"}
+    registry = MongoLobbyRegistry(collection)
+
+    lobby = registry.leave("game-1", "1234")
+
+    assert [player.user_id for player in lobby.players] == ["5678"]
+    collection.update_one.assert_called_once_with({"_id": "game-1", "host_id": "1234"}, {"$unset": {"host_id": ""}})
+
+def test_registry_view_should_behave_like_dict():
+    registry = InMemoryLobbyRegistry()
+    view = LobbyRegistryView(registry)
+    lobby = Lobby(game_id="game-1", players=[host()])
+
+    view["game-1"] = lobby
+
+    assert "game-1" in view
+    assert view["game-1"] is lobby
+    assert view.get("game-2") is None
+    assert list(view) == ["game-1"] and len(view) == 1
+    del view["game-1"]
+    assert registry.count() == 0
+
+def test_create_lobby_registry_should_reject_unknown_backend():
+    assert isinstance(create_lobby_registry("memory"), InMemoryLobbyRegistry)
+    assert isinstance(create_lobby_registry("mongo"), MongoLobbyRegistry)
+    with pytest.raises(ValueError, match="Unbekannte LOBBY_REGISTRY"):
+        create_lobby_registry("redis")
+
+def test_in_memory_indexes_should_follow_every_mutation():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+    registry.create(Lobby(game_id="game-2", players=[UserLobby(user_id="9012", username="Fritz")]))
+    assert registry.user_lobbies == {"1234": {"game-1"}, "9012": {"game-2"}}
+    assert list(registry.open_lobbies) == ["game-1", "game-2"]
+
+    registry.join("game-1", guest())
+    assert registry.find_by_user("5678").game_id == "game-1"
+    assert [lobby.game_id for lobby in registry.find_open()] == ["game-2"]
+
+    registry.leave("game-1", "1234")
+    assert "1234" not in registry.user_lobbies
+    assert list(registry.open_lobbies) == ["game-1", "game-2"]
+
+    registry.put(Lobby(game_id="game-1", players=[host(), guest()]))
+    assert registry.find_by_user("1234").game_id == "game-1"
+    assert registry.count_open() == 1
+
+    registry.delete("game-1")
+    registry.leave("game-2", "9012")
+    assert registry.user_lobbies == {} and len(registry.open_lobbies) == 0 and registry.count() == 0
+
+def test_in_memory_user_may_join_other_lobby_but_not_create_one():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+    registry.create(Lobby(game_id="game-2", players=[UserLobby(user_id="9012", username="Fritz")]))
+
+    registry.join("game-2", host())
+    registry.leave("game-1", "1234")
+
+    assert registry.user_lobbies["1234"] == {"game-2"}
+    with pytest.raises(ValueError, match=ALREADY_IN_LOBBY_ERROR):
+        registry.create(Lobby(game_id="game-3", players=[host()]))
+
+def test_mongo_find_open_should_use_open_slots():
+    collection = MagicMock()
+    collection.find.return_value.limit.return_value = [lobby_document(host())]
+    registry = MongoLobbyRegistry(collection)
+
+    lobbies = registry.find_open(limit=10)
+
+    collection.find.assert_called_once_with({"open_slots": {"$gt": 0}})
+    assert [lobby.game_id for lobby in lobbies] == ["game-1"]
+
+def test_in_memory_find_page_should_skip_removed_lobbies_and_keep_cursor():
+    registry = InMemoryLobbyRegistry()
+    for i in range(4):
+        registry.create(Lobby(game_id=f"game-{i}", players=[UserLobby(user_id=f"user-{i}", username=f"Spieler {i}")]))
+
+    page, cursor = registry.find_page(None, 2)
+    registry.delete("game-1")
+    registry.delete("game-2")
+    registry.create(Lobby(game_id="game-4", players=[UserLobby(user_id="user-4", username="Spieler 4")]))
+    rest, last_cursor = registry.find_page(cursor, 2)
+
+    assert [lobby.game_id for lobby in page] == ["game-0", "game-1"]
+    assert [lobby.game_id for lobby in rest] == ["game-3", "game-4"]
+    assert last_cursor is None
+
+def test_in_memory_filtered_pages_should_come_from_their_indexes():
+    registry = InMemoryLobbyRegistry()
+    for i in range(6):
+        registry.create(Lobby(game_id=f"game-{i}", players=[UserLobby(user_id=f"user-{i}", username=f"Spieler {i}")]))
+    for i in (0, 2, 4):
+        registry.join(f"game-{i}", UserLobby(user_id=f"guest-{i}", username=f"Gast {i}"))
+    registry.set_color("game-3", "user-3", "white")
+
+    open_page, cursor = registry.find_page(None, 2, open_only=True)
+    open_rest, _ = registry.find_page(cursor, 2, open_only=True)
+    black_free, _ = registry.find_page(None, 10, color="black")
+    white_free, _ = registry.find_page(None, 10, color="white")
+
+    assert [lobby.game_id for lobby in open_page] == ["game-1", "game-3"]
+    assert [lobby.game_id for lobby in open_rest] == ["game-5"]
+    assert [lobby.game_id for lobby in black_free] == ["game-1", "game-3", "game-5"]
+    assert [lobby.game_id for lobby in white_free] == ["game-1", "game-5"]
+    assert list(registry.free_colors["white"]) == ["game-1", "game-5"]
+
+    registry.leave("game-0", "guest-0")
+    assert list(registry.open_lobbies) == ["game-0", "game-1", "game-3", "game-5"]
+
+def test_in_memory_find_page_should_reject_invalid_cursor():
+    with pytest.raises(ValueError, match=INVALID_CURSOR_ERROR):
+        InMemoryLobbyRegistry().find_page("abc", 10)
+
+def test_in_memory_version_should_change_on_every_mutation():
+    registry = InMemoryLobbyRegistry()
+    registry.create(Lobby(game_id="game-1", players=[host()]))
+    version = registry.version
+
+    registry.join("game-1", guest())
+    registry.set_color("game-1", "5678", "white")
+    registry.set_status("game-1", "5678", "ready")
+    registry.leave("game-1", "5678")
+
+    assert registry.version == version + 4
+
+def test_mongo_find_page_should_page_by_creation_with_open_filter():
+    collection = MagicMock()
+    cursor = collection.find.return_value.sort.return_value.limit
+    first_created, second_created = ObjectId(), ObjectId()
+    cursor.return_value = [{**lobby_document(host()), "created": first_created},
+                           {**lobby_document(host()), "_id": "game-2", "created": second_created}]
+    registry = MongoLobbyRegistry(collection)
+    after = ObjectId()
+
+    page, next_cursor = registry.find_page(str(after), 1, color="white")
+
+    collection.find.assert_called_once_with({
+        "created": {"$gt": after}, "open_slots": {"$in": [1, 2]}, "players.color": {"$ne": "white"},
+    })
+    collection.find.return_value.sort.assert_called_once_with("created", 1)
+    cursor.assert_called_once_with(2)
+    assert [lobby.game_id for lobby in page] == ["game-1"]
+    assert next_cursor == str(first_created)
+
+def test_mongo_find_page_should_reject_invalid_cursor():
+    with pytest.raises(ValueError, match="Ungültiger Cursor"):
+        MongoLobbyRegistry(MagicMock()).find_page("game-1", 10)
+
+def test_mongo_create_should_stamp_creation_order():
+    collection = MagicMock()
+    collection.find_one.return_value = None
+
+    MongoLobbyRegistry(collection).create(Lobby(game_id="game-1", players=[host()]))
+
+    assert isinstance(collection.insert_one.call_args.args[0]["created"], ObjectId)
+
+def test_mongo_put_should_keep_creation_order_of_existing_lobby():
+    collection = MagicMock()
+
+    MongoLobbyRegistry(collection).put(Lobby(game_id="game-1", players=[]))
+
+    query, update = collection.update_one.call_args.args
+    assert query == {"_id": "game-1"}
+    assert "created" not in update["$set"]
+    assert isinstance(update["$setOnInsert"]["created"], ObjectId)
+    assert update["$unset"] == {"host_id": ""}
+    assert collection.update_one.call_args.kwargs["upsert"] is True
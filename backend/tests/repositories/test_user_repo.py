@@ -0,0 +1,18 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+from repositories.user_repo import UserRepository
+from models.user import UserDB
+
+def test_insert_user_duplicate_username_should_raise_value_error(mocker):
+    users_collection = mocker.patch("repositories.user_repo.users_collection")
+    users_collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key error index: username_unique")
+
+    with pytest.raises(ValueError, match="Username existiert bereits"):
+        UserRepository().insert_user(UserDB(user_id="1", username="Max", password_hash="hash"))
+
+def test_update_user_to_existing_username_should_raise_value_error(mocker):
+    users_collection = mocker.patch("repositories.user_repo.users_collection")
+    users_collection.find_one_and_update.side_effect = DuplicateKeyError("E11000 duplicate key error index: username_unique")
+
+    with pytest.raises(ValueError, match="Username existiert bereits"):
+        UserRepository().update_user("1", {"username": "Anna"})
@@ -43,7 +43,7 @@ def test_verify_password_invalid_should_return_false():
     hashed_password = AuthService.hash_password(password)
     assert not AuthService.verify_password("invalidpassword", hashed_password)
 
-def test_authenticate_user_should_return_user(user_repo_mock):
+async def test_authenticate_user_should_return_user(user_repo_mock):
     mock_user = UserDB(
         user_id="123e4567-e89b-12d3-a456-426614174000",
         username="testuser",
@@ -52,7 +52,7 @@ def test_authenticate_user_should_return_user(user_repo_mock):
 
     user_repo_mock.find_user_by_username.return_value = mock_user
     auth_service = AuthService(user_repo_mock)
-    user = auth_service.authenticate_user("testuser", "password123")
+    user = await auth_service.authenticate_user("testuser", "password123")
 
     assert user is not None
     assert isinstance(user, UserResponse)
@@ -60,7 +60,7 @@ def test_authenticate_user_should_return_user(user_repo_mock):
     assert user.user_id == "123e4567-e89b-12d3-a456-426614174000"
 
 
-def test_authenticate_user_invalid_password_should_return_none(user_repo_mock):
+async def test_authenticate_user_invalid_password_should_return_none(user_repo_mock):
     mock_user = UserDB(
         user_id="123e4567-e89b-12d3-a456-426614174000",
         username="testuser",
@@ -69,14 +69,14 @@ def test_authenticate_user_invalid_password_should_return_none(user_repo_mock):
 
     user_repo_mock.find_user_by_username.return_value = mock_user
     auth_service = AuthService(user_repo_mock)
-    user = auth_service.authenticate_user("testuser", "wrongpassword")
+    user = await auth_service.authenticate_user("testuser", "wrongpassword")
     
     assert user is None
 
-def test_authenticate_user_nonexistent_user_should_return_none(user_repo_mock):
+async def test_authenticate_user_nonexistent_user_should_return_none(user_repo_mock):
     user_repo_mock.find_user_by_username.return_value = None
     auth_service = AuthService(user_repo_mock)
-    user = auth_service.authenticate_user("nonexistentuser", "password123")
+    user = await auth_service.authenticate_user("nonexistentuser", "password123")
     
     assert user is None
 
@@ -1,7 +1,10 @@
 import pytest
-from services.chess_board_service import ChessBoardService
+import tracemalloc
+from services.chess_board_service import ChessBoardService, START_POSITION_TEMPLATE
 from models.chess_board import ChessBoard
 from models.figure import FigureColor, Pawn, Rook, Knight, Bishop, Queen, King
+from models.piece_board import PieceBoard
+from models.bitboard_position import BitboardPosition
 
 @pytest.fixture
 def empty_board():
@@ -24,4 +27,98 @@ def test_create_start_position_success_should_return_created_board():
 
     for col in range(8):
         assert isinstance(result[1][col], Pawn) and result[1][col].color == FigureColor.BLACK
-        assert isinstance(result[6][col], Pawn) and result[6][col].color == FigureColor.WHITE
\ No newline at end of file
+        assert isinstance(result[6][col], Pawn) and result[6][col].color == FigureColor.WHITE
+
+def test_piece_board_should_round_trip_chess_board():
+    board = ChessBoardService().initialize_board()
+    board.squares[7][7].has_moved = True
+
+    result = PieceBoard.from_chess_board(board).to_chess_board()
+
+    assert result == board
+
+def test_piece_board_should_read_stored_figure_documents():
+    board = ChessBoardService().initialize_board()
+    document = PieceBoard.from_chess_board(board).to_document()
+
+    assert document[0][4]["type"] == "King"
+    assert document[7][0] == {**board.squares[7][0].model_dump(), "color": "white", "type": "Rook"}
+    assert PieceBoard.from_squares(document).codes == PieceBoard.from_chess_board(board).codes
+
+def test_piece_board_should_round_trip_compact_encoding():
+    board = ChessBoardService().initialize_board()
+    board.make_move((6, 4), (4, 4))
+    board.make_move((7, 4), (6, 4))
+    board.squares[6][4].has_moved = True
+
+    compact = PieceBoard.from_chess_board(board).to_compact()
+
+    assert compact["fen"] == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPPKPPP/RNBQ1BNR"
+    assert compact["ids"]["36"] == "white-pawn-e2"
+    assert compact["moved"] == [52]
+    assert PieceBoard.from_compact(compact).to_chess_board() == board
+
+def test_piece_board_from_compact_should_reject_incomplete_placement():
+    with pytest.raises(ValueError):
+        PieceBoard.from_compact({"fen": "rnbqkbnr/8/8", "ids": {}, "moved": []})
+
+def test_piece_board_to_position_should_match_bitboard_position():
+    board = ChessBoardService().initialize_board()
+    board.squares[0][0].has_moved = True
+    last_move = {"start": (6, 4), "end": (4, 4), "two_square_pawn_move": True}
+
+    position = PieceBoard.from_chess_board(board).to_position(FigureColor.BLACK, last_move)
+
+    assert position == BitboardPosition.from_chess_board(board, FigureColor.BLACK, last_move)
+
+def test_piece_board_should_use_a_fraction_of_the_memory_of_chess_board():
+    board = ChessBoardService().initialize_board()
+
+    tracemalloc.start()
+    chess_boards = [ChessBoardService().initialize_board() for _ in range(20)]
+    chess_board_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    piece_boards = [PieceBoard.from_chess_board(board) for _ in range(20)]
+    piece_board_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(chess_boards) == len(piece_boards)
+    assert piece_board_memory * 10 < chess_board_memory
+
+def test_create_start_position_should_use_deterministic_unique_ids():
+    first = ChessBoardService.create_start_position()
+    second = ChessBoardService.create_start_position()
+
+    ids = [figure.id for row in first for figure in row if figure]
+    assert len(set(ids)) == 32
+    assert first[7][0].id == "white-rook-a1"
+    assert first[0][4].id == "black-king-e8"
+    assert ids == [figure.id for row in second for figure in row if figure]
+
+def test_create_start_position_should_not_share_figures_with_template():
+    board = ChessBoardService().initialize_board()
+    board.make_move((7, 6), (5, 5))
+
+    fresh_board = ChessBoardService().initialize_board()
+
+    assert fresh_board.squares[7][6].position == (7, 6)
+    assert fresh_board.squares[5][5] is None
+    assert START_POSITION_TEMPLATE[7][6].position == (7, 6)
+
+def test_start_position_document_should_match_stored_board_format():
+    board = ChessBoardService().initialize_board()
+    document = ChessBoardService.start_position_document()
+
+    assert document == PieceBoard.from_chess_board(board).to_document()
+    document[7][0]["has_moved"] = True
+    assert ChessBoardService.start_position_document()[7][0]["has_moved"] is False
+
+def test_start_board_document_should_be_compact_unless_squares_requested():
+    compact = ChessBoardService.start_board_document("fen")
+
+    assert compact == PieceBoard.from_squares(ChessBoardService.start_position_document()).to_compact()
+    assert ChessBoardService.start_board_document("squares") == {"squares": ChessBoardService.start_position_document()}
+    compact["ids"]["60"] = "changed"
+    assert ChessBoardService.start_board_document("fen")["ids"]["60"] == "white-king-e1"
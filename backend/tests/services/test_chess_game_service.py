@@ -1,16 +1,27 @@
 import pytest
 import uuid
+import asyncio
+import json
 import copy
+import tracemalloc
 from unittest.mock import MagicMock
+from repositories.game_store import GameStore
 from services.chess_game_service import ChessGameService, ChessGameException
-from services.chess_board_service import ChessBoardService
+from services.chess_board_service import ChessBoardService, START_POSITION_PIECES
 from services.chess_lobby_service import ChessLobbyService
+from services.game_snapshot_cache import GameSnapshotCache
+from services.connection_manager import ConnectionManager
 from repositories.chess_game_repo import ChessGameRepository
 from models.chess_game import ChessGame, GameStatus
 from models.user import UserLobby, UserInGame, PlayerColor, PlayerStatus
-from models.chess_board import ChessBoard
+from models.chess_board import ChessBoard, MoveUndo
+from models.piece_board import PieceBoard
+from models.game_state import GameState
+from models.bitboard_position import BitboardPosition
 from models.figure import King, Queen, Knight, Rook, Pawn, FigureColor, Bishop
 from models.lobby import Lobby, UserLobby
+from services.zobrist_service import ZobristService
+from services.move_validation_service import MoveValidationService
 
 @pytest.fixture
 def game_service(scope="function"):
@@ -22,7 +33,7 @@ def game_service(scope="function"):
 def lobby_service(scope="function"):
     l_service = ChessLobbyService()
     l_service.game_lobbies = {}
-    l_service.active_lobby_connections = {}
+    l_service.lobby_connections = ConnectionManager("lobby")
     return l_service
 
 user_lobby_w = UserLobby(user_id="1234", username="Max", color=PlayerColor.WHITE.value, player_status=PlayerStatus.READY.value)
@@ -41,10 +52,14 @@ def reset_game_repo():
     global initialized_board
     initialized_board = chess_board_service.initialize_board()
 
+def stored_game(game_service) -> ChessGame:
+    # Geschrieben wird das Dokument des GameState; zum Vergleichen wieder als ChessGame.
+    return GameState.from_document(game_service.game_repo.insert_game.call_args[0][0]).to_chess_game()
+
 def test_get_game_state_success_should_return_valid_game(game_service):
     game_id = str(uuid.uuid4())
     
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -52,7 +67,7 @@ def test_get_game_state_success_should_return_valid_game(game_service):
         current_turn="white",
         board=initialized_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     game = game_service.get_game_state(game_id)
     
@@ -62,12 +77,12 @@ def test_get_game_state_success_should_return_valid_game(game_service):
     assert game.current_turn == "white"
     assert game.status == GameStatus.RUNNING
     assert game.board == initialized_board
-    game_service.game_repo.find_game_by_id.assert_called_once_with(game_id)
+    game_service.game_repo.find_game_state.assert_called_once_with(game_id)
     
 def test_get_game_state_fail_should_raise_error(game_service):
     game_id = str(uuid.uuid4())
     
-    game_service.game_repo.find_game_by_id.return_value = None
+    game_service.game_repo.find_game_state.return_value = None
     
     with pytest.raises(ValueError) as e:
         game_service.get_game_state(game_id)
@@ -145,7 +160,7 @@ async def test_move_figure_should_raise_error_for_empty_square():
     start_pos = (4, 4)
     end_pos = (5, 0)
     
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -153,7 +168,7 @@ async def test_move_figure_should_raise_error_for_empty_square():
         current_turn="white",
         board=initialized_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
@@ -169,7 +184,7 @@ async def test_move_figure_should_raise_error_for_game_already_ended():
     start_pos = (6, 0)
     end_pos = (5, 0)
     
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -177,7 +192,7 @@ async def test_move_figure_should_raise_error_for_game_already_ended():
         current_turn="black",
         board=initialized_board,
         status=GameStatus.ENDED
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
@@ -193,7 +208,7 @@ async def test_move_figure_should_raise_error_for_wrong_turn():
     start_pos = (6, 0)
     end_pos = (5, 0)
     
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -201,7 +216,7 @@ async def test_move_figure_should_raise_error_for_wrong_turn():
         current_turn="black",
         board=initialized_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
@@ -217,7 +232,7 @@ async def test_move_figure_should_raise_error_for_non_legal_move():
     start_pos = (6, 0)
     end_pos = (5, 1)
     
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -225,7 +240,7 @@ async def test_move_figure_should_raise_error_for_non_legal_move():
         current_turn="white",
         board=initialized_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
@@ -251,7 +266,7 @@ async def test_move_figure_should_raise_message_leave_king_in_check(empty_board)
     start_pos = (6, 0)
     end_pos = (5, 0)
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -259,7 +274,7 @@ async def test_move_figure_should_raise_message_leave_king_in_check(empty_board)
         current_turn="white",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
@@ -285,7 +300,7 @@ async def test_move_figure_should_raise_message_for_unblock_check(empty_board):
     start_pos = (6, 4)
     end_pos = (6, 1)
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -293,7 +308,7 @@ async def test_move_figure_should_raise_message_for_unblock_check(empty_board):
         current_turn="white",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
@@ -319,7 +334,7 @@ async def test_move_figure_should_raise_message_for_moving_king_in_check(empty_b
     start_pos = (7, 4)
     end_pos = (7, 3)
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -327,7 +342,7 @@ async def test_move_figure_should_raise_message_for_moving_king_in_check(empty_b
         current_turn="white",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
@@ -362,7 +377,7 @@ async def test_move_figure_should_raise_message_for_check_for_next_current_playe
     moved_figure.position = end_pos
     moved_figure.has_moved = True
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -370,14 +385,14 @@ async def test_move_figure_should_raise_message_for_check_for_next_current_playe
         current_turn="black",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
 
     game_service.game_repo.insert_game.assert_called_once()
     
-    inserted_game = game_service.game_repo.insert_game.call_args[0][0]
+    inserted_game = stored_game(game_service)
     assert inserted_game.board.squares == expected_board.squares
     assert str(e.value) == "Schach! white ist im Schach!"
     
@@ -410,7 +425,7 @@ async def test_move_figure_should_raise_message_for_stalemate_number_one(empty_b
     expected_board.squares[start_pos[0]][start_pos[1]] = None
     moved_figure.position = end_pos
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -418,14 +433,14 @@ async def test_move_figure_should_raise_message_for_stalemate_number_one(empty_b
         current_turn="black",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
 
     game_service.game_repo.insert_game.assert_called_once()
     
-    inserted_game = game_service.game_repo.insert_game.call_args[0][0]
+    inserted_game = stored_game(game_service)
     
     assert inserted_game.board.squares == expected_board.squares
     assert inserted_game.status == GameStatus.ENDED
@@ -457,7 +472,7 @@ async def test_move_figure_should_raise_message_for_stalemate_number_two(empty_b
     expected_board.squares[start_pos[0]][start_pos[1]] = None
     moved_figure.position = end_pos
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -465,14 +480,14 @@ async def test_move_figure_should_raise_message_for_stalemate_number_two(empty_b
         current_turn="black",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
 
     game_service.game_repo.insert_game.assert_called_once()
     
-    inserted_game = game_service.game_repo.insert_game.call_args[0][0]
+    inserted_game = stored_game(game_service)
     
     assert inserted_game.board.squares == expected_board.squares
     assert inserted_game.status == GameStatus.ENDED
@@ -508,7 +523,7 @@ async def test_move_figure_should_raise_message_for_checkmate(empty_board):
     expected_board.squares[start_pos[0]][start_pos[1]] = None
     moved_figure.position = end_pos
         
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -516,14 +531,14 @@ async def test_move_figure_should_raise_message_for_checkmate(empty_board):
         current_turn="black",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
     
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
 
     game_service.game_repo.insert_game.assert_called_once()
     
-    inserted_game = game_service.game_repo.insert_game.call_args[0][0]
+    inserted_game = stored_game(game_service)
     
     assert inserted_game.board.squares == expected_board.squares
     assert inserted_game.status == GameStatus.ENDED
@@ -539,7 +554,7 @@ async def test_pawn_promotion_to_queen(game_service, empty_board):
 
     test_board.squares[0][3] = white_pawn
 
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(
@@ -559,15 +574,16 @@ async def test_pawn_promotion_to_queen(game_service, empty_board):
         current_turn="white",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
 
     updated_game = await game_service.promote_pawn(game_id, (0, 3), "queen")
+    board = updated_game.to_chess_game().board
 
-    assert isinstance(updated_game.board.squares[0][3], Queen)
+    assert isinstance(board.squares[0][3], Queen)
     
-    assert updated_game.board.squares[0][3].id == white_pawn.id
+    assert board.squares[0][3].id == white_pawn.id
 
-    game_service.game_repo.insert_game.assert_called_once_with(updated_game)
+    game_service.game_repo.insert_game.assert_called_once_with(updated_game.to_document())
 
 @pytest.mark.asyncio
 async def test_move_figure_should_update_move_history(game_service):
@@ -585,7 +601,7 @@ async def test_move_figure_should_update_move_history(game_service):
 
     expected_notation = f"{moved_figure.position}{start_pos[1]}{start_pos[0]}{end_pos[1]}{end_pos[0]}"
 
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
@@ -593,7 +609,7 @@ async def test_move_figure_should_update_move_history(game_service):
         current_turn="white",
         board=initial_board,
         status=GameStatus.RUNNING
-    )
+    ))
 
     updated_player_white = UserInGame(
         user_id=user_lobby_w.user_id,
@@ -621,7 +637,7 @@ async def test_move_figure_should_update_move_history(game_service):
         status=GameStatus.RUNNING
     )
 
-    game = await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)
+    game = (await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_w.user_id)).to_chess_game()
 
     assert game.game_id == game_id
     assert game.current_turn == "black"
@@ -663,7 +679,7 @@ async def test_move_figure_should_raise_message_for_check_for_next_current_playe
     moved_figure.position = end_pos
     moved_figure.has_moved = True
 
-    game_service.game_repo.find_game_by_id.return_value = ChessGame(
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
         game_id=game_id,
         time_stamp_start=MagicMock(),
         player_white=UserInGame(
@@ -683,26 +699,24 @@ async def test_move_figure_should_raise_message_for_check_for_next_current_playe
         current_turn="black",
         board=test_board,
         status=GameStatus.RUNNING
-    )
+    ))
 
     with pytest.raises(ValueError) as e:
         await game_service.move_figure(start_pos, end_pos, game_id, user_lobby_b.user_id)
 
     game_service.game_repo.insert_game.assert_called_once()
 
-    inserted_game = game_service.game_repo.insert_game.call_args[0][0]
+    inserted_game = stored_game(game_service)
     assert inserted_game.board.squares == expected_board.squares
     assert str(e.value) == "Schach! white ist im Schach!"
 
     assert len(inserted_game.player_black.captured_figures) == 1
-    assert inserted_game.player_black.captured_figures[0].id == captured_figure.id
-    assert inserted_game.player_black.captured_figures[0].color == captured_figure.color
-    assert inserted_game.player_black.captured_figures[0].position == captured_figure.position
+    assert inserted_game.player_black.captured_figures[0] == captured_figure.model_dump(mode="json")
 
     assert inserted_game.player_white.captured_figures == [] 
 
 @pytest.mark.asyncio    
-async def test_start_game_success_should_return_chess_game(game_service, lobby_service, mocker):
+async def test_start_game_success_should_return_game_state(game_service, lobby_service, mocker):
     lobby = Lobby(
         game_id="1234",
         players=[
@@ -727,7 +741,7 @@ async def test_start_game_success_should_return_chess_game(game_service, lobby_s
 
     game = await game_service.start_game("1234", "1234")
 
-    assert isinstance(game, ChessGame)
+    assert isinstance(game, GameState)
     assert game.game_id == "1234"
     assert game.player_white.user_id == "1234"
     assert game.player_black.user_id == "5678"
@@ -735,7 +749,7 @@ async def test_start_game_success_should_return_chess_game(game_service, lobby_s
     assert game.player_black.color == PlayerColor.BLACK.value
     assert game.status == GameStatus.RUNNING
     assert game.current_turn == PlayerColor.WHITE.value
-    assert game.board is not None
+    assert game.pieces.to_compact() == START_POSITION_PIECES.to_compact()
 
 @pytest.mark.asyncio
 async def test_start_game_fail_not_found(lobby_service, game_service):
@@ -846,4 +860,470 @@ async def test_start_game_fail_not_all_ready(lobby_service, game_service):
     with pytest.raises(ChessGameException) as e:
         await game_service.start_game("1234", "1234")
     
-    assert str(e.value) == "Beide Spieler müssen bereit sein."
\ No newline at end of file
+    assert str(e.value) == "Beide Spieler müssen bereit sein."
+
+async def test_get_legal_moves_should_return_moves_of_current_player(game_service):
+    game_id = str(uuid.uuid4())
+
+    game_service.game_repo.find_game_document.return_value = ChessGame(
+        game_id=game_id,
+        time_stamp_start=MagicMock(),
+        player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id=user_lobby_b.user_id, username=user_lobby_b.username, color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=initialized_board,
+        status=GameStatus.RUNNING
+    ).model_dump()
+
+    result = await game_service.get_legal_moves(game_id)
+
+    assert result["game_id"] == game_id
+    assert result["current_turn"] == "white"
+    assert len(result["legal_moves"]) == 20
+    assert {"start": (6, 0), "end": (4, 0)} in result["legal_moves"]
+
+async def test_get_legal_moves_should_return_empty_list_for_ended_game(game_service):
+    game_id = str(uuid.uuid4())
+
+    game_service.game_repo.find_game_document.return_value = ChessGame(
+        game_id=game_id,
+        time_stamp_start=MagicMock(),
+        player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id=user_lobby_b.user_id, username=user_lobby_b.username, color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=initialized_board,
+        status=GameStatus.ENDED
+    ).model_dump()
+
+    assert (await game_service.get_legal_moves(game_id))["legal_moves"] == []
+
+@pytest.mark.asyncio
+async def test_move_figure_should_update_king_positions(empty_board):
+    game_service = ChessGameService()
+    game_service.game_repo = MagicMock()
+
+    game_id = str(uuid.uuid4())
+    test_board = empty_board
+    test_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    test_board.squares[0][0] = King(color=FigureColor.BLACK, position=(0, 0))
+    test_board.squares[1][7] = Pawn(color=FigureColor.BLACK, position=(1, 7))
+
+    game_service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
+        game_id=game_id,
+        time_stamp_start=MagicMock(),
+        player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id=user_lobby_b.user_id, username=user_lobby_b.username, color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=test_board,
+        status=GameStatus.RUNNING,
+        king_positions={"white": (7, 4), "black": (0, 0)}
+    ))
+
+    game = await game_service.move_figure((7, 4), (6, 4), game_id, user_lobby_w.user_id)
+
+    assert game.king_positions == {"white": (6, 4), "black": (0, 0)}
+
+def create_running_game(game_id, board):
+    return GameState.from_chess_game(ChessGame(
+        game_id=game_id,
+        time_stamp_start=MagicMock(),
+        player_white=UserInGame(user_id=user_lobby_w.user_id, username=user_lobby_w.username, color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id=user_lobby_b.user_id, username=user_lobby_b.username, color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=board,
+        status=GameStatus.RUNNING
+    ))
+
+async def play_moves(game_service, game, moves):
+    for start_pos, end_pos in moves:
+        game_service.game_repo.find_game_state.return_value = game
+        user_id = user_lobby_w.user_id if game.current_turn == PlayerColor.WHITE else user_lobby_b.user_id
+        game = await game_service.move_figure(start_pos, end_pos, game.game_id, user_id)
+        assert game.position_hash == ZobristService.format_hash(ZobristService.hash_game(game))
+    return game
+
+@pytest.mark.asyncio
+async def test_move_figure_should_update_position_hash_incrementally(game_service):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+
+    game = await play_moves(game_service, game, [
+        ((6, 4), (4, 4)), ((0, 6), (2, 5)),
+        ((7, 6), (5, 5)), ((1, 4), (2, 4)),
+        ((7, 5), (6, 4)), ((0, 5), (1, 4)),
+        ((7, 4), (7, 6)), ((0, 4), (0, 6)),
+    ])
+
+    assert game.pieces.figure_json(63 - 2)["name"] == "rook"
+    assert game.pieces.figure_json(5)["name"] == "rook"
+    assert game.repetition_counts == {game.position_hash: 1}
+
+@pytest.mark.asyncio
+async def test_move_figure_should_update_position_hash_for_en_passant(game_service):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+
+    game = await play_moves(game_service, game, [
+        ((6, 4), (4, 4)), ((0, 6), (2, 5)),
+        ((4, 4), (3, 4)), ((1, 3), (3, 3)),
+        ((3, 4), (2, 3)),
+    ])
+
+    assert game.pieces.figure_json(3 * 8 + 3) is None
+    assert game.repetition_counts == {game.position_hash: 1}
+
+@pytest.mark.asyncio
+async def test_move_figure_should_end_game_on_threefold_repetition(game_service):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    knight_moves = [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))]
+
+    game = await play_moves(game_service, game, knight_moves + knight_moves[:3])
+    start_hash = ZobristService.format_hash(ZobristService.hash_game(create_running_game(game.game_id, ChessBoardService().initialize_board())))
+    assert game.repetition_counts[start_hash] == 2
+
+    game_service.game_repo.find_game_state.return_value = game
+    with pytest.raises(ValueError, match="Remis durch dreifache Stellungswiederholung!"):
+        await game_service.move_figure((2, 5), (0, 6), game.game_id, user_lobby_b.user_id)
+
+    saved_game = stored_game(game_service)
+    assert saved_game.status == GameStatus.ENDED
+    assert saved_game.repetition_counts[start_hash] == 3
+
+@pytest.mark.asyncio
+async def test_move_figure_should_promote_pawn_on_the_moved_game(game_service, empty_board):
+    empty_board.squares[1][0] = Pawn(color=FigureColor.WHITE, position=(1, 0))
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[2][7] = King(color=FigureColor.BLACK, position=(2, 7))
+    game = create_running_game(str(uuid.uuid4()), empty_board)
+
+    game = await play_moves(game_service, game, [((1, 0), (0, 0))])
+
+    assert isinstance(game.to_chess_game().board.squares[0][0], Queen)
+    game_service.game_repo.find_game_state.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_pawn_promotion_should_update_position_hash(game_service, empty_board):
+    empty_board.squares[0][3] = Pawn(color=FigureColor.WHITE, position=(0, 3))
+    game = create_running_game(str(uuid.uuid4()), empty_board)
+    pawn_hash = ZobristService.format_hash(ZobristService.hash_game(game))
+    game.position_hash = pawn_hash
+    game.repetition_counts = {pawn_hash: 1}
+    game_service.game_repo.find_game_state.return_value = game
+
+    updated_game = await game_service.promote_pawn(game.game_id, (0, 3), "knight")
+
+    assert updated_game.position_hash == ZobristService.format_hash(ZobristService.hash_game(updated_game))
+    assert updated_game.repetition_counts == {updated_game.position_hash: 1}
+
+async def test_get_legal_moves_should_use_legal_move_cache(game_service):
+    game_id = str(uuid.uuid4())
+    game_service.game_repo.find_game_document.return_value = create_running_game(game_id, initialized_board).to_document()
+
+    first = await game_service.get_legal_moves(game_id)
+    second = await game_service.get_legal_moves(game_id)
+
+    assert first == second
+    assert game_service.legal_move_cache.stats().hits == 1
+    assert game_service.legal_move_cache.stats().misses == 1
+
+@pytest.mark.asyncio
+async def test_move_figure_should_allow_move_out_of_check(game_service, empty_board):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[0][4] = Rook(color=FigureColor.BLACK, position=(0, 4))
+    empty_board.squares[0][0] = King(color=FigureColor.BLACK, position=(0, 0))
+    game = create_running_game(str(uuid.uuid4()), empty_board)
+
+    game = await play_moves(game_service, game, [((7, 4), (7, 3))])
+
+    assert isinstance(game.to_chess_game().board.squares[7][3], King)
+
+@pytest.mark.asyncio
+async def test_move_figure_should_evaluate_new_position_once(game_service, mocker):
+    evaluate_position = mocker.spy(MoveValidationService, "evaluate_bitboard_position")
+    is_stalemate = mocker.spy(MoveValidationService, "is_stalemate")
+    is_king_checkmate = mocker.spy(MoveValidationService, "is_king_checkmate")
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+
+    await play_moves(game_service, game, [((6, 4), (4, 4))])
+
+    assert evaluate_position.call_count == 2
+    is_stalemate.assert_not_called()
+    is_king_checkmate.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_start_game_should_insert_pre_serialized_start_position(game_service, lobby_service, mocker):
+    mocker.patch("services.chess_game_service.asyncio.sleep", new=mocker.AsyncMock())
+    lobby_service.game_lobbies["4321"] = Lobby(
+        game_id="4321",
+        players=[
+            UserLobby(user_id="1234", username="Max", color=PlayerColor.WHITE, status=PlayerStatus.READY),
+            UserLobby(user_id="5678", username="Anna", color=PlayerColor.BLACK, status=PlayerStatus.READY)
+        ]
+    )
+
+    game_service.game_repo.board_encoding = "squares"
+
+    game = await game_service.start_game("4321", "1234")
+
+    inserted_document = game_service.game_repo.insert_game.call_args[0][0]
+    assert inserted_document["board"]["squares"] == ChessBoardService.start_position_document()
+    assert inserted_document["position_hash"] == ZobristService.format_hash(ZobristService.hash_game(game))
+    assert game.pieces.figure_json(7 * 8 + 4)["id"] == "white-king-e1"
+
+@pytest.mark.asyncio
+async def test_start_game_should_insert_compact_start_position_without_encoding(game_service, lobby_service, mocker):
+    mocker.patch("services.chess_game_service.asyncio.sleep", new=mocker.AsyncMock())
+    encode_board = mocker.spy(ChessGameRepository, "encode_board")
+    game_service.game_repo = ChessGameRepository(board_encoding="fen")
+    games_collection = mocker.patch("repositories.chess_game_repo.games_collection")
+    lobby_service.game_lobbies["4321"] = Lobby(
+        game_id="4321",
+        players=[
+            UserLobby(user_id="1234", username="Max", color=PlayerColor.WHITE, status=PlayerStatus.READY),
+            UserLobby(user_id="5678", username="Anna", color=PlayerColor.BLACK, status=PlayerStatus.READY)
+        ]
+    )
+
+    game = await game_service.start_game("4321", "1234")
+
+    stored_board = games_collection.replace_one.call_args[0][1]["board"]
+    assert stored_board == game.pieces.to_compact()
+    # Schon im Speicherformat: encode_board reicht das Brett nur durch.
+    assert encode_board.spy_return is stored_board
+
+@pytest.mark.asyncio
+async def test_move_figure_should_serve_running_game_from_game_store(game_service):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    game_service.game_store.flush_interval = 3600
+    await game_service.game_store.start()
+
+    game = await play_moves(game_service, game, [((6, 4), (4, 4)), ((1, 4), (3, 4))])
+
+    game_service.game_repo.find_game_state.assert_called_once()
+    game_service.game_repo.insert_game.assert_not_called()
+    assert (await game_service.get_legal_moves(game.game_id))["current_turn"] == PlayerColor.WHITE
+    game_service.game_repo.find_game_document.assert_not_called()
+
+    await game_service.game_store.stop()
+    game_service.game_repo.insert_game.assert_called_once()
+    assert game_service.game_repo.insert_game.call_args[0][0]["game_id"] == game.game_id
+
+
+@pytest.mark.asyncio
+async def test_move_figure_should_journal_moves_for_recovery(game_service, tmp_path):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    stored_document = game.to_chess_game().model_dump(mode="json")
+    game_service.game_store.flush_interval = 3600
+    game_service.game_store.journal_path = str(tmp_path / "games.journal")
+    await game_service.game_store.start()
+
+    game = await play_moves(game_service, game, [((6, 4), (4, 4)), ((1, 4), (3, 4))])
+    await game_service.game_store.journal_task
+    game_service.game_store.flush_task.cancel()
+
+    game_service.game_repo.find_game_document.return_value = stored_document
+    assert await GameStore(game_service.game_repo, journal_path=str(tmp_path / "games.journal")).recover() == 1
+
+    recovered_game = game_service.game_repo.insert_game.call_args[0][0]
+    assert recovered_game["seq"] == 2
+    assert recovered_game["board"]["squares"][3][4]["name"] == "pawn"
+    assert recovered_game["player_black"]["move_history"] == game.player_black.move_history
+    assert recovered_game["position_hash"] == game.position_hash
+
+async def test_move_figure_should_serialize_concurrent_moves_of_same_game(game_service):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    game_service.game_repo.find_game_state.return_value = game
+
+    results = await asyncio.gather(
+        game_service.move_figure((6, 4), (4, 4), game.game_id, "1234"),
+        game_service.move_figure((6, 4), (4, 4), game.game_id, "1234"),
+        return_exceptions=True
+    )
+
+    assert isinstance(results[0], GameState)
+    assert isinstance(results[1], ValueError)
+    assert len(results[0].player_white.move_history) == 1
+    game_service.game_repo.find_game_state.assert_called_once()
+
+async def test_broadcast_game_state_should_serialize_once_for_all_spectators(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    sockets = [mocker.AsyncMock() for _ in range(20)]
+    for websocket in sockets:
+        await game_service.connect(websocket, game.game_id)
+    serialize = mocker.spy(GameSnapshotCache, "serialize")
+
+    await game_service.broadcast_game_state(game)
+    await game_service.broadcast_game_state(game)
+    await game_service.game_connections.drain(game.game_id)
+
+    assert serialize.call_count == 1
+    sent = [websocket.send_text.call_args_list[0][0][0] for websocket in sockets]
+    assert all(text is sent[0] for text in sent)
+    assert json.loads(sent[0])["data"]["current_turn"] == "white"
+
+async def test_move_figure_should_broadcast_one_delta_to_all_spectators(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    sockets = [mocker.AsyncMock() for _ in range(20)]
+    for websocket in sockets:
+        await game_service.connect(websocket, game.game_id)
+    serialize_delta = mocker.spy(GameSnapshotCache, "serialize_delta")
+
+    await play_moves(game_service, game, [((6, 4), (4, 4))])
+    await game_service.game_connections.drain(game.game_id)
+
+    assert serialize_delta.call_count == 1
+    sent = [websocket.send_text.call_args_list[0][0][0] for websocket in sockets]
+    assert all(text is sent[0] for text in sent)
+    delta = json.loads(sent[0])
+    assert delta["type"] == "game_delta"
+    assert delta["seq"] == 1
+    assert delta["move"]["notation"] == game_service.game_store.get(game.game_id).player_white.move_history[-1]
+    assert delta["changes"]["current_turn"] == "black"
+    assert [square["position"] for square in delta["squares"]] == [[6, 4], [4, 4]]
+    assert delta["squares"][0]["figure"] is None
+    assert delta["squares"][1]["figure"]["name"] == "pawn"
+
+async def test_move_figure_delta_size_should_not_grow_with_game_length(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    websocket = mocker.AsyncMock()
+    await game_service.connect(websocket, game.game_id)
+
+    # Springer hin und zurück: gleiche Art von Zug, aber immer längere Zughistorie.
+    knight_moves = [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))]
+    await play_moves(game_service, game, knight_moves + knight_moves[:2])
+    await game_service.game_connections.drain(game.game_id)
+
+    deltas = [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+    assert [delta["seq"] for delta in deltas] == [1, 2, 3, 4, 5, 6]
+    first, fifth = websocket.send_text.await_args_list[0].args[0], websocket.send_text.await_args_list[4].args[0]
+    assert len(fifth) == len(first)
+    assert len(game_service.snapshot_cache.get(game_service.game_store.get(game.game_id))) > 2 * len(fifth)
+
+async def test_move_figure_delta_should_include_castling_rook_and_capture_squares(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    websocket = mocker.AsyncMock()
+    await game_service.connect(websocket, game.game_id)
+
+    await play_moves(game_service, game, [
+        ((6, 4), (4, 4)), ((1, 0), (2, 0)),
+        ((4, 4), (3, 4)), ((1, 3), (3, 3)),
+        ((3, 4), (2, 3)), ((2, 0), (3, 0)),
+        ((7, 6), (5, 5)), ((3, 0), (4, 0)),
+        ((7, 5), (6, 4)), ((4, 0), (5, 0)),
+        ((7, 4), (7, 6)),
+    ])
+    await game_service.game_connections.drain(game.game_id)
+
+    deltas = [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+    assert [square["position"] for square in deltas[4]["squares"]] == [[3, 4], [2, 3], [3, 3]]
+    assert deltas[4]["move"]["captured"]["name"] == "pawn"
+    assert [square["position"] for square in deltas[10]["squares"]] == [[7, 4], [7, 6], [7, 7], [7, 5]]
+
+async def test_checkmate_delta_should_carry_ended_status(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    websocket = mocker.AsyncMock()
+    await game_service.connect(websocket, game.game_id)
+
+    with pytest.raises(ValueError, match="Schachmatt"):
+        await play_moves(game_service, game, [((6, 5), (5, 5)), ((1, 4), (3, 4)), ((6, 6), (4, 6)), ((0, 3), (4, 7))])
+    await game_service.game_connections.drain(game.game_id)
+
+    messages = [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+    assert messages[3]["type"] == "game_delta"
+    assert messages[3]["changes"]["status"] == "ended"
+    assert messages[4]["type"] == "notification"
+
+async def test_send_game_state_should_only_reach_requesting_connection(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    requesting, other = mocker.AsyncMock(), mocker.AsyncMock()
+    await game_service.connect(requesting, game.game_id)
+    await game_service.connect(other, game.game_id)
+    await play_moves(game_service, game, [((6, 4), (4, 4))])
+
+    await game_service.send_game_state(requesting, game_service.game_store.get(game.game_id))
+    await game_service.game_connections.drain(game.game_id)
+
+    snapshot = json.loads(requesting.send_text.await_args.args[0])
+    assert snapshot["type"] == "game_state"
+    assert snapshot["seq"] == 1
+    assert snapshot["data"]["current_turn"] == "black"
+    assert other.send_text.await_count == 1
+
+async def test_broadcast_should_send_same_text_to_all_connections(game_service, mocker):
+    sockets = [mocker.AsyncMock() for _ in range(3)]
+    for websocket in sockets:
+        await game_service.connect(websocket, "1234")
+
+    await game_service.broadcast("1234", {"type": "notification", "message": "Schach!"})
+    await game_service.game_connections.drain("1234")
+
+    for websocket in sockets:
+        websocket.send_text.assert_awaited_once_with('{"type":"notification","message":"Schach!"}')
+
+@pytest.mark.asyncio
+async def test_running_game_should_not_build_pydantic_figures_per_move(game_service, mocker):
+    game = create_running_game(str(uuid.uuid4()), initialized_board)
+    to_squares = mocker.spy(PieceBoard, "to_squares")
+
+    game = await play_moves(game_service, game, [
+        ((6, 4), (4, 4)), ((1, 3), (3, 3)),
+        ((4, 4), (3, 3)), ((0, 3), (3, 3)),
+    ])
+
+    assert isinstance(game, GameState)
+    assert to_squares.call_count == 0
+
+@pytest.mark.asyncio
+async def test_running_game_should_use_a_fraction_of_the_memory_of_chess_game(game_service):
+    game = await play_moves(game_service, create_running_game(str(uuid.uuid4()), initialized_board), [
+        ((6, 4), (4, 4)), ((1, 3), (3, 3)),
+        ((4, 4), (3, 3)), ((0, 3), (3, 3)),
+    ])
+    document = game.to_chess_game().model_dump(mode="json")
+    document.pop("time_stamp_start")
+    documents = [{**copy.deepcopy(document), "time_stamp_start": "2024-03-06T12:00:00"} for _ in range(40)]
+
+    tracemalloc.start()
+    chess_games = [ChessGameRepository.decode_game(document) for document in documents[:20]]
+    chess_game_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    game_states = [GameState.from_document(document) for document in documents[20:]]
+    game_state_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(chess_games) == len(game_states)
+    assert game_state_memory * 3 < chess_game_memory
+
+@pytest.mark.asyncio
+async def test_move_figure_should_update_attack_maps_instead_of_rebuilding_them(game_service, mocker):
+    game = await play_moves(game_service, create_running_game(str(uuid.uuid4()), initialized_board), [((6, 4), (4, 4))])
+    assert None not in game.position.attack_maps
+
+    piece_attacks = mocker.spy(MoveValidationService, "piece_attacks")
+    to_position = mocker.spy(PieceBoard, "to_position")
+    from_game = mocker.spy(BitboardPosition, "from_game")
+    game = await play_moves(game_service, game, [((1, 3), (3, 3))])
+
+    # Nachgezogen werden nur die Felder des Zugs und die Linien darüber, nicht alle 32 Figuren.
+    assert 0 < piece_attacks.call_count < 8
+    assert to_position.call_count == 0
+    assert from_game.call_count == 0
+
+    rebuilt = game.pieces.to_position(game.current_turn, game.last_move)
+    assert game.position.attack_maps == MoveValidationService.update_attack_maps(rebuilt)
+    assert MoveValidationService.evaluate_position(game).legal_moves == \
+        MoveValidationService.evaluate_bitboard_position(rebuilt).legal_moves
+
+@pytest.mark.asyncio
+async def test_promote_pawn_should_update_attack_maps(game_service, empty_board):
+    empty_board.squares[0][0] = Pawn(color=FigureColor.WHITE, position=(0, 0))
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[2][7] = King(color=FigureColor.BLACK, position=(2, 7))
+    game = create_running_game(str(uuid.uuid4()), empty_board)
+    game_service.game_repo.find_game_state.return_value = game
+
+    game = await game_service.promote_pawn(game.game_id, (0, 0), "rook")
+
+    assert game.position.attack_maps[0] & (1 << 7)
+    rebuilt = game.pieces.to_position(game.current_turn, game.last_move)
+    assert game.position.attack_maps == MoveValidationService.update_attack_maps(rebuilt)
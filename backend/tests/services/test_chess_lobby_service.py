@@ -1,6 +1,11 @@
+import asyncio
 import pytest
+import json
+from unittest.mock import AsyncMock, MagicMock
 from services.chess_lobby_service import ChessLobbyService
+from services.lobby_directory import LobbyDirectory
 from models.user import UserLobby
+from models.lobby import Lobby
 
 @pytest.fixture
 def lobby_service():
@@ -14,8 +19,8 @@ user_create_1 = UserLobby(user_id="1234", username="Max", color=None, status="no
 user_create_2 = UserLobby(user_id="5678", username="Anna", color=None, status="not_ready")
 user_create_3 = UserLobby(user_id="9012", username="Fritz", color=None, status="not_ready")
 
-def test_create_lobby_success_should_return_lobby_with_user(lobby_service):
-    response = lobby_service.create_lobby(user_create_1)
+async def test_create_lobby_success_should_return_lobby_with_user(lobby_service):
+    response = await lobby_service.create_lobby(user_create_1)
 
     assert response.game_id in lobby_service.game_lobbies
     assert response.players[0].user_id == "1234"
@@ -23,27 +28,27 @@ def test_create_lobby_success_should_return_lobby_with_user(lobby_service):
     assert response.players[0].color is None
     assert response.players[0].status.value == "not_ready"
 
-def test_create_lobby_fail_already_created_a_lobby(lobby_service):
-    lobby_service.create_lobby(user_create_1)
+async def test_create_lobby_fail_already_created_a_lobby(lobby_service):
+    await lobby_service.create_lobby(user_create_1)
     
     try:
-        response = lobby_service.create_lobby(user_create_1)
+        response = await lobby_service.create_lobby(user_create_1)
     except ValueError as e:
         response = str(e)
     
     assert response == "Du hast bereits eine Lobby erstellt. Du darfst aber gerne einer anderen beitreten."
         
-def test_list_lobbies_empty_should_return_empty_dict(lobby_service):
-    response = lobby_service.list_lobbies()
+async def test_list_lobbies_empty_should_return_empty_dict(lobby_service):
+    response = await lobby_service.list_lobbies()
 
     assert "lobbies" in response
     assert len(response["lobbies"]) == 0
 
-def test_list_lobbies_with_lobbies_should_return_lobbies_with_users(lobby_service):
-    lobby_service.create_lobby(user_create_1)
-    lobby_service.create_lobby(user_create_2)
+async def test_list_lobbies_with_lobbies_should_return_lobbies_with_users(lobby_service):
+    await lobby_service.create_lobby(user_create_1)
+    await lobby_service.create_lobby(user_create_2)
 
-    response = lobby_service.list_lobbies()
+    response = await lobby_service.list_lobbies()
 
     assert "lobbies" in response
     assert len(response["lobbies"]) == 2
@@ -58,7 +63,7 @@ def test_list_lobbies_with_lobbies_should_return_lobbies_with_users(lobby_servic
 
 @pytest.mark.asyncio
 async def test_join_lobby_success_should_return_existing_lobby_with_joined_player(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     response = await lobby_service.join_lobby(game_id, user_create_2)
 
@@ -75,7 +80,7 @@ async def test_join_lobby_success_should_return_existing_lobby_with_joined_playe
     
 @pytest.mark.asyncio
 async def test_join_lobby_fail_not_found(lobby_service):
-    lobby_service.create_lobby(user_create_1)
+    await lobby_service.create_lobby(user_create_1)
     
     try:
         response = await lobby_service.join_lobby("1234", user_create_2)
@@ -86,7 +91,7 @@ async def test_join_lobby_fail_not_found(lobby_service):
     
 @pytest.mark.asyncio
 async def test_join_lobby_fail_already_in_lobby(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     try:
         response = await lobby_service.join_lobby(game_id, user_create_1)
@@ -97,7 +102,7 @@ async def test_join_lobby_fail_already_in_lobby(lobby_service):
     
 @pytest.mark.asyncio
 async def test_join_lobby_fail_lobby_full(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     await lobby_service.join_lobby(game_id, user_create_2)
     try:
@@ -109,7 +114,7 @@ async def test_join_lobby_fail_lobby_full(lobby_service):
     
 @pytest.mark.asyncio
 async def test_leave_lobby_success_should_return_lobby_for_other_player_in_lobby(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     await lobby_service.join_lobby(game_id, user_create_2)
     
@@ -128,7 +133,7 @@ async def test_leave_lobby_success_should_return_lobby_for_other_player_in_lobby
     
 @pytest.mark.asyncio
 async def test_leave_lobby_success_should_return_none_for_empty_lobby(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     
     assert len(lobby_service.game_lobbies[game_id].players) == 1
@@ -150,7 +155,7 @@ async def test_leave_lobby_fail_not_found(lobby_service):
     
 @pytest.mark.asyncio
 async def test_leave_lobby_fail_not_in_lobby(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     
     try:
         response = await lobby_service.leave_lobby(lobby.game_id, user_create_2.user_id)
@@ -161,7 +166,7 @@ async def test_leave_lobby_fail_not_in_lobby(lobby_service):
     
 @pytest.mark.asyncio
 async def test_set_player_color_success_should_return_lobby_with_updated_player(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     user_id = lobby.players[0].user_id
     
@@ -182,7 +187,7 @@ async def test_set_player_color_fail_lobby_not_found(lobby_service):
     
 @pytest.mark.asyncio
 async def test_set_player_color_fail_player_not_found(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     
     try:
@@ -194,7 +199,7 @@ async def test_set_player_color_fail_player_not_found(lobby_service):
     
 @pytest.mark.asyncio
 async def test_set_player_color_fail_color_already_taken(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     lobby.players.append(user_create_2)
     
@@ -208,7 +213,7 @@ async def test_set_player_color_fail_color_already_taken(lobby_service):
     
 @pytest.mark.asyncio
 async def test_set_player_status_success_should_return_new_status(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     user_id = lobby.players[0].user_id
     await lobby_service.set_player_color(game_id, user_create_1.user_id, "white")
@@ -231,7 +236,7 @@ async def test_set_player_status_fail_lobby_not_found(lobby_service):
     
 @pytest.mark.asyncio
 async def test_set_player_status_fail_player_not_found(lobby_service):
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     
     try:
@@ -244,7 +249,7 @@ async def test_set_player_status_fail_player_not_found(lobby_service):
 @pytest.mark.asyncio
 async def test_set_player_status_fail_color_not_set(lobby_service):
     user_create_1 = UserLobby(user_id="1234", username="Max", color=None, status="not_ready")
-    lobby = lobby_service.create_lobby(user_create_1)
+    lobby = await lobby_service.create_lobby(user_create_1)
     game_id = lobby.game_id
     
     try:
@@ -252,4 +257,103 @@ async def test_set_player_status_fail_color_not_set(lobby_service):
     except ValueError as e:
         response = str(e)
     
-    assert response == "Wähle zuerst eine Farbe."
\ No newline at end of file
+    assert response == "Wähle zuerst eine Farbe."
+@pytest.mark.asyncio
+async def test_notify_lobby_update_should_reach_remaining_clients_when_one_fails(lobby_service, mocker):
+    lobby = await lobby_service.create_lobby(user_create_1)
+    dead, alive = mocker.AsyncMock(), mocker.AsyncMock()
+    dead.send_text.side_effect = RuntimeError("Verbindung geschlossen")
+    await lobby_service.connect(dead, lobby.game_id)
+    await lobby_service.connect(alive, lobby.game_id)
+
+    await lobby_service.join_lobby(lobby.game_id, user_create_2)
+    await lobby_service.lobby_connections.drain(lobby.game_id)
+
+    message = json.loads(alive.send_text.await_args.args[0])
+    assert message["type"] == "lobby_update"
+    assert [player["user_id"] for player in message["players"]] == ["1234", "5678"]
+    assert lobby_service.lobby_connections.get(lobby.game_id) == [alive]
+    lobby_service.disconnect(alive, lobby.game_id)
+
+async def test_list_lobbies_should_page_with_cursor(lobby_service):
+    for i in range(5):
+        await lobby_service.create_lobby(UserLobby(user_id=f"user-{i}", username=f"Spieler {i}"))
+
+    first = await lobby_service.list_lobbies(limit=2)
+    second = await lobby_service.list_lobbies(cursor=first["next_cursor"], limit=2)
+    last = await lobby_service.list_lobbies(cursor=second["next_cursor"], limit=2)
+
+    usernames = [lobby["players"][0]["username"] for page in (first, second, last) for lobby in page["lobbies"]]
+    assert usernames == [f"Spieler {i}" for i in range(5)]
+    assert last["next_cursor"] is None
+
+async def test_list_lobbies_should_filter_open_slots_and_color(lobby_service):
+    full = await lobby_service.create_lobby(user_create_1)
+    await lobby_service.join_lobby(full.game_id, user_create_2)
+    white_taken = await lobby_service.create_lobby(user_create_3)
+    await lobby_service.set_player_color(white_taken.game_id, "9012", "white")
+
+    open_lobbies = await lobby_service.list_lobbies(open_only=True)
+    black_free = await lobby_service.list_lobbies(color="black")
+    white_free = await lobby_service.list_lobbies(color="white")
+
+    assert [lobby["game_id"] for lobby in open_lobbies["lobbies"]] == [white_taken.game_id]
+    assert [lobby["game_id"] for lobby in black_free["lobbies"]] == [white_taken.game_id]
+    assert white_free["lobbies"] == []
+
+async def test_list_lobbies_page_should_be_cached_until_lobbies_change(lobby_service):
+    await lobby_service.create_lobby(user_create_1)
+
+    first = await lobby_service.list_lobbies_page()
+    cached = await lobby_service.list_lobbies_page()
+    assert cached is first
+
+    await lobby_service.create_lobby(user_create_2)
+    changed = await lobby_service.list_lobbies_page()
+
+    assert changed.version > first.version
+    assert changed.etag != first.etag
+    assert len(json.loads(changed.body)["lobbies"]) == 2
+
+async def test_list_lobbies_page_should_not_cache_shared_registry_without_distributed_backplane(lobby_service, monkeypatch):
+    registry = MagicMock(shared=True, blocking=False, version=7)
+    registry.find_page.side_effect = [([], None), ([Lobby(game_id="game-1", players=[])], None)]
+    monkeypatch.setattr(lobby_service, "registry", registry)
+
+    first = await lobby_service.list_lobbies_page()
+    second = await lobby_service.list_lobbies_page()
+
+    # Die zweite Lobby hat ein anderer Worker angelegt, ohne dass version sich hier geändert hat.
+    assert json.loads(second.body)["lobbies"][0]["game_id"] == "game-1"
+    assert second.etag != first.etag
+    assert registry.find_page.call_count == 2
+
+async def test_remote_directory_change_should_invalidate_listing(lobby_service):
+    first = await lobby_service.list_lobbies_page()
+
+    lobby_service.deliver_directory_message("game-1", "", remote=True)
+
+    assert (await lobby_service.list_lobbies_page()).version == first.version + 1
+
+async def test_lobby_changes_should_reach_directory_subscribers(lobby_service, monkeypatch):
+    monkeypatch.setattr(lobby_service, "directory", LobbyDirectory(coalesce_delay=0.01))
+    existing = await lobby_service.create_lobby(UserLobby(user_id="1234", username="Max"))
+    websocket = AsyncMock()
+    await lobby_service.connect_directory(websocket)
+
+    created = await lobby_service.create_lobby(UserLobby(user_id="5678", username="Anna"))
+    await lobby_service.join_lobby(existing.game_id, UserLobby(user_id="9012", username="Fritz"))
+    await lobby_service.leave_lobby(created.game_id, "5678")
+    await asyncio.sleep(0.05)
+    await lobby_service.directory.connections.drain()
+
+    snapshot, batch = [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+    assert [lobby["game_id"] for lobby in snapshot["lobbies"]] == [existing.game_id]
+    assert batch["events"] == [
+        {"event": "removed", "game_id": created.game_id},
+        {"event": "updated", "game_id": existing.game_id, "players": [
+            {"user_id": "1234", "username": "Max", "color": None, "status": "not_ready"},
+            {"user_id": "9012", "username": "Fritz", "color": None, "status": "not_ready"},
+        ]},
+    ]
+    await lobby_service.directory.close()
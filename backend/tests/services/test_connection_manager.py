@@ -0,0 +1,144 @@
+import asyncio
+from unittest.mock import AsyncMock
+from services.connection_manager import ConnectionManager
+
+async def test_broadcast_text_should_queue_message_for_every_connection():
+    manager = ConnectionManager("game")
+    sockets = [AsyncMock() for _ in range(3)]
+    for websocket in sockets:
+        manager.connect(websocket, "1234")
+
+    assert manager.broadcast_text("1234", "hallo") == 3
+    await manager.drain()
+
+    for websocket in sockets:
+        websocket.send_text.assert_awaited_once_with("hallo")
+    assert manager.stats().sent_messages == 3
+    await manager.close()
+
+async def test_broadcast_text_without_connections_should_return_zero():
+    manager = ConnectionManager("game")
+
+    assert manager.broadcast_text("1234", "hallo") == 0
+    assert "1234" not in manager
+
+async def test_slow_client_should_not_delay_other_clients():
+    manager = ConnectionManager("game", send_timeout=10)
+    blocked = asyncio.Event()
+    slow = AsyncMock()
+    async def send_blocked(text):
+        await blocked.wait()
+    slow.send_text.side_effect = send_blocked
+    fast = AsyncMock()
+    manager.connect(slow, "1234")
+    manager.connect(fast, "1234")
+
+    manager.broadcast_text("1234", "zug")
+    await asyncio.wait_for(manager.connections["1234"][fast].queue.join(), 1)
+
+    fast.send_text.assert_awaited_once_with("zug")
+    assert manager.stats().max_queue_depth == 0
+    blocked.set()
+    await manager.close()
+
+async def test_send_timeout_should_drop_slow_client():
+    manager = ConnectionManager("game", send_timeout=0.01)
+    slow = AsyncMock()
+    async def send_slowly(text):
+        await asyncio.sleep(1)
+    slow.send_text.side_effect = send_slowly
+    manager.connect(slow, "1234")
+
+    manager.broadcast_text("1234", "zug")
+    await manager.drain()
+
+    assert "1234" not in manager
+    assert manager.stats().dropped_connections == 1
+    await asyncio.sleep(0)
+    slow.close.assert_awaited_once_with(code=1013)
+
+async def test_failing_client_should_be_dropped_without_affecting_others():
+    manager = ConnectionManager("lobby")
+    dead = AsyncMock()
+    dead.send_text.side_effect = RuntimeError("Verbindung geschlossen")
+    alive = AsyncMock()
+    manager.connect(dead, "1234")
+    manager.connect(alive, "1234")
+
+    manager.broadcast_text("1234", "erste")
+    await manager.drain()
+    manager.broadcast_text("1234", "zweite")
+    await manager.drain()
+
+    assert manager.get("1234") == [alive]
+    assert [call.args[0] for call in alive.send_text.await_args_list] == ["erste", "zweite"]
+    assert dead.send_text.await_count == 1
+    await manager.close()
+
+async def test_full_queue_should_disconnect_client_with_disconnect_policy():
+    manager = ConnectionManager("game", queue_size=2, overflow_policy="disconnect")
+    websocket = AsyncMock()
+    manager.connect(websocket, "1234")
+
+    # Ohne await kommt der Writer-Task nicht zum Zug, die Warteschlange läuft voll.
+    results = [manager.broadcast_text("1234", f"nachricht {i}") for i in range(3)]
+
+    assert results == [1, 1, 0]
+    assert "1234" not in manager
+    stats = manager.stats()
+    assert stats.dropped_connections == 1
+    assert stats.dropped_messages == 3
+
+async def test_full_queue_should_drop_oldest_message_with_drop_oldest_policy():
+    manager = ConnectionManager("game", queue_size=2, overflow_policy="drop_oldest")
+    websocket = AsyncMock()
+    manager.connect(websocket, "1234")
+
+    for i in range(4):
+        manager.broadcast_text("1234", f"nachricht {i}")
+    assert manager.stats().queued_messages == 2
+    await manager.drain()
+
+    assert [call.args[0] for call in websocket.send_text.await_args_list] == ["nachricht 2", "nachricht 3"]
+    assert manager.stats().dropped_messages == 2
+    await manager.close()
+
+async def test_disconnect_should_report_last_connection_and_stop_writer():
+    manager = ConnectionManager("game")
+    first, second = AsyncMock(), AsyncMock()
+    first_connection = manager.connect(first, "1234")
+    manager.connect(second, "1234")
+
+    assert manager.disconnect(first, "1234") is False
+    assert manager.disconnect(second, "1234") is True
+    assert manager.disconnect(second, "1234") is False
+    await asyncio.sleep(0)
+    assert first_connection.writer_task.cancelled()
+
+async def test_stats_should_report_queue_depth():
+    manager = ConnectionManager("game", queue_size=8)
+    first, second = AsyncMock(), AsyncMock()
+    manager.connect(first, "1234")
+    manager.connect(second, "5678")
+
+    manager.broadcast_text("1234", "a")
+    manager.broadcast_text("1234", "b")
+    manager.broadcast_text("5678", "c")
+    stats = manager.stats()
+
+    assert stats.connections == 2
+    assert stats.queued_messages == 3
+    assert stats.max_queue_depth == 2
+    assert stats.queue_size == 8
+    await manager.close()
+
+async def test_flush_should_wait_for_queued_messages_of_one_connection():
+    manager = ConnectionManager("game")
+    websocket = AsyncMock()
+    manager.connect(websocket, "1234")
+
+    manager.send_text(websocket, "1234", "fehler")
+    await asyncio.wait_for(manager.flush(websocket, "1234"), 1)
+
+    websocket.send_text.assert_awaited_once_with("fehler")
+    await manager.close()
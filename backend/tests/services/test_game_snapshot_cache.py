@@ -0,0 +1,100 @@
+import json
+from services.game_snapshot_cache import GameSnapshotCache, GAME_STATE_PROTOCOL_VERSION
+from services.chess_board_service import ChessBoardService
+from models.chess_game import ChessGame, GameStatus
+from models.game_state import GameState
+from models.user import UserInGame, PlayerColor
+
+def create_game(game_id="1234"):
+    return GameState.from_chess_game(ChessGame(
+        game_id=game_id,
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    ))
+
+def test_serialize_should_match_previous_game_state_message():
+    game = create_game()
+
+    game.seq = 7
+    message = json.loads(GameSnapshotCache.serialize(game))
+
+    assert message["type"] == "game_state"
+    assert message["v"] == GAME_STATE_PROTOCOL_VERSION
+    assert message["seq"] == 7
+    assert message["data"] == json.loads(json.dumps(game.to_chess_game().model_dump()))
+
+def test_get_should_serialize_each_state_once():
+    cache = GameSnapshotCache()
+    game = create_game()
+
+    first = cache.get(game)
+    second = cache.get(game)
+
+    assert first is second
+    assert cache.stats() == (1, 1, 1)
+
+def test_get_should_rebuild_after_next_move():
+    cache = GameSnapshotCache()
+    game = create_game()
+    first = cache.get(game)
+
+    game.pieces.make_move(6 * 8 + 4, 4 * 8 + 4)
+    game.player_white.move_history.append("e2e4")
+    game.current_turn = PlayerColor.BLACK
+
+    assert json.loads(cache.get(game))["data"]["current_turn"] == "black"
+    assert cache.misses == 2
+    assert first != cache.get(game)
+
+def test_get_should_rebuild_for_reloaded_game_object():
+    cache = GameSnapshotCache()
+    cache.get(create_game())
+
+    cache.get(create_game())
+
+    assert cache.misses == 2
+
+def test_get_should_rebuild_after_game_end():
+    cache = GameSnapshotCache()
+    game = create_game()
+    cache.get(game)
+
+    game.status = GameStatus.ENDED
+
+    assert json.loads(cache.get(game))["data"]["status"] == "ended"
+
+
+def test_get_should_rebuild_after_sequence_advanced():
+    cache = GameSnapshotCache()
+    game = create_game()
+    cache.get(game)
+
+    game.seq += 1
+
+    assert json.loads(cache.get(game))["seq"] == 1
+    assert cache.misses == 2
+
+def test_serialize_delta_should_only_contain_changed_squares():
+    game = create_game()
+    squares = game.pieces.make_move(6 * 8 + 4, 4 * 8 + 4)
+    game.current_turn = PlayerColor.BLACK
+    game.seq = 3
+
+    delta = json.loads(GameSnapshotCache.serialize_delta(game, squares + squares[:1], {"notation": "pawn6444"}))
+
+    assert delta["type"] == "game_delta"
+    assert delta["seq"] == 3
+    assert delta["move"] == {"notation": "pawn6444"}
+    assert delta["squares"] == [
+        {"position": [6, 4], "figure": None},
+        {"position": [4, 4], "figure": game.to_chess_game().board.squares[4][4].model_dump(mode="json")},
+    ]
+    assert delta["changes"] == {key: value for key, value in game.to_chess_game().model_dump(mode="json").items()
+                                if key in ("current_turn", "status", "last_move", "king_positions", "position_hash")}
+    assert delta["changes"]["current_turn"] == "black"
+    assert delta["changes"]["status"] == "running"
+    assert "board" not in delta["changes"] and "player_white" not in delta["changes"]
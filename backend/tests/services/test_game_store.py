@@ -0,0 +1,214 @@
+import pytest
+from unittest.mock import MagicMock
+from repositories.game_store import GameStore
+from services.chess_board_service import ChessBoardService
+from services.game_snapshot_cache import GameSnapshotCache
+from models.chess_game import ChessGame, GameStatus
+from models.game_state import GameState
+from models.user import UserInGame, PlayerColor
+
+def create_game(game_id="1234", status=GameStatus.RUNNING):
+    return GameState.from_chess_game(ChessGame(
+        game_id=game_id,
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value, captured_figures=[], move_history=[]),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value, captured_figures=[], move_history=[]),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=status
+    ))
+
+@pytest.fixture
+def game_repo():
+    return MagicMock()
+
+async def test_save_should_write_through_without_flush_task(game_repo):
+    store = GameStore(game_repo)
+    game = create_game()
+
+    await store.save(game)
+
+    game_repo.insert_game.assert_called_once_with(game.to_document())
+    assert store.get("1234") is game
+    assert store.dirty == {}
+
+async def test_save_should_evict_finished_games(game_repo):
+    store = GameStore(game_repo)
+
+    await store.save(create_game(status=GameStatus.ENDED))
+
+    assert store.get("1234") is None
+
+@pytest.mark.asyncio
+async def test_save_should_defer_write_until_flush(game_repo):
+    store = GameStore(game_repo, flush_interval=3600)
+    await store.start()
+    game = create_game()
+
+    await store.save(game)
+    await store.save(game)
+    game_repo.insert_game.assert_not_called()
+    assert "1234" in store.dirty
+
+    assert await store.flush() == 1
+    game_repo.insert_game.assert_called_once()
+    assert game_repo.insert_game.call_args[0][0]["game_id"] == "1234"
+    assert store.dirty == {}
+
+    await store.stop()
+
+@pytest.mark.asyncio
+async def test_stop_should_flush_dirty_games(game_repo):
+    store = GameStore(game_repo, flush_interval=3600)
+    await store.start()
+    game = create_game()
+
+    await store.save(game)
+    await store.stop()
+
+    game_repo.insert_game.assert_called_once()
+    assert game_repo.insert_game.call_args[0][0]["game_id"] == "1234"
+    assert not store.write_behind
+
+@pytest.mark.asyncio
+async def test_flush_should_keep_game_dirty_if_write_fails(game_repo):
+    store = GameStore(game_repo, flush_interval=3600)
+    await store.start()
+    game_repo.insert_game.side_effect = [Exception("Mongo nicht erreichbar"), None]
+
+    await store.save(create_game())
+
+    assert await store.flush() == 0
+    assert "1234" in store.dirty
+    assert await store.flush() == 1
+    assert store.dirty == {}
+
+    await store.stop()
+
+def play_pawn_move(game):
+    squares = game.pieces.make_move(6 * 8 + 4, 4 * 8 + 4)
+    game.current_turn = PlayerColor.BLACK
+    game.seq += 1
+    game.repetition_counts = {"abc": 1}
+    move = {"start": [6, 4], "end": [4, 4], "color": "white", "notation": "P4644", "captured": None, "promotion": None}
+    return GameSnapshotCache.serialize_delta(game, squares, move)
+
+@pytest.mark.asyncio
+async def test_recover_should_replay_unflushed_journal_entries(game_repo, tmp_path):
+    journal_path = str(tmp_path / "games.journal")
+    store = GameStore(game_repo, flush_interval=3600, journal_path=journal_path)
+    await store.start()
+    game = create_game()
+    game_repo.find_game_document.return_value = game.to_chess_game().model_dump(mode="json")
+
+    await store.save(game, delta=play_pawn_move(game))
+    await store.journal_task
+    store.flush_task.cancel()
+    store.journal_file.close()
+
+    with open(journal_path, "a") as journal:
+        journal.write('{"repetition_counts": {}, "delta": {"game_id": "12')
+
+    recovered_store = GameStore(game_repo, journal_path=journal_path)
+    assert await recovered_store.recover() == 1
+
+    recovered_game = game_repo.insert_game.call_args[0][0]
+    assert recovered_game["game_id"] == "1234"
+    assert recovered_game["seq"] == 1
+    assert recovered_game["current_turn"] == "black"
+    assert recovered_game["board"]["squares"][6][4] is None
+    assert recovered_game["board"]["squares"][4][4]["name"] == "pawn"
+    assert recovered_game["player_white"]["move_history"] == ["P4644"]
+    assert recovered_game["repetition_counts"] == {"abc": 1}
+    with open(journal_path) as journal:
+        assert journal.read() == ""
+
+async def test_recover_should_skip_moves_already_in_mongo(game_repo, tmp_path):
+    journal_path = str(tmp_path / "games.journal")
+    game = create_game()
+    delta = play_pawn_move(game)
+    game_repo.find_game_document.return_value = game.to_chess_game().model_dump(mode="json")
+    with open(journal_path, "w") as journal:
+        journal.write(f'{{"repetition_counts":{{}},"delta":{delta}}}\n')
+
+    assert await GameStore(game_repo, journal_path=journal_path).recover() == 0
+    game_repo.insert_game.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_flush_should_truncate_journal_once_games_are_written(game_repo, tmp_path):
+    journal_path = str(tmp_path / "games.journal")
+    store = GameStore(game_repo, flush_interval=3600, journal_path=journal_path, journal_fsync=True)
+    await store.start()
+    game = create_game()
+
+    await store.save(game, delta=play_pawn_move(game))
+    await store.journal_task
+    with open(journal_path) as journal:
+        assert '"seq":1' in journal.read()
+
+    await store.flush()
+    with open(journal_path) as journal:
+        assert journal.read() == ""
+
+    await store.stop()
+
+async def test_flush_should_evict_idle_games(game_repo, mocker):
+    store = GameStore(game_repo, idle_timeout=60)
+    store.put(create_game())
+
+    mocker.patch("repositories.game_store.time.monotonic", return_value=10 ** 9)
+    await store.flush()
+
+    assert store.get("1234") is None
+    game_repo.forget_game.assert_called_once_with("1234")
+
+async def test_release_should_drop_delta_base_of_clean_game(game_repo):
+    store = GameStore(game_repo)
+    store.put(create_game())
+
+    store.release("1234")
+
+    assert store.get("1234") is None
+    game_repo.forget_game.assert_called_once_with("1234")
+
+@pytest.mark.asyncio
+async def test_flush_should_write_snapshot_taken_before_later_changes(game_repo):
+    store = GameStore(game_repo, flush_interval=3600)
+    await store.start()
+    game = create_game()
+
+    await store.save(game)
+    await store.flush()
+    game.current_turn = PlayerColor.BLACK
+
+    assert game_repo.insert_game.call_args[0][0]["current_turn"] == "white"
+
+    await store.stop()
+
+@pytest.mark.asyncio
+async def test_save_with_write_through_should_write_immediately_despite_flush_task(game_repo):
+    store = GameStore(game_repo, flush_interval=3600)
+    await store.start()
+    game = create_game()
+
+    await store.save(game)
+    await store.save(game, write_through=True)
+
+    game_repo.insert_game.assert_called_once_with(game.to_document())
+    assert store.dirty == {}
+
+    await store.stop()
+
+async def test_release_should_remember_remote_seq_until_game_catches_up(game_repo):
+    store = GameStore(game_repo)
+    store.release("1234", seq=3)
+    assert store.expected_seq("1234") == 3
+
+    stale_game = create_game()
+    stale_game.seq = 2
+    store.put(stale_game)
+    assert store.expected_seq("1234") == 3
+
+    stale_game.seq = 3
+    store.put(stale_game)
+    assert store.expected_seq("1234") == 0
@@ -0,0 +1,62 @@
+from services.legal_move_cache import LegalMoveCache, PositionAnalysis, ENTRY_BASE_BYTES, MOVE_BYTES
+
+def create_analysis(move_count=0):
+    return PositionAnalysis(legal_moves=tuple(((6, i % 8), (5, i % 8)) for i in range(move_count)),
+                            in_check=False, checkmate=False, stalemate=move_count == 0)
+
+def test_get_should_count_hits_and_misses():
+    cache = LegalMoveCache(max_entries=10)
+    analysis = create_analysis(3)
+
+    assert cache.get((1, "white")) is None
+    cache.put((1, "white"), analysis)
+
+    assert cache.get((1, "white")) == analysis
+    assert cache.get((1, "black")) is None
+    assert (cache.stats().hits, cache.stats().misses) == (1, 2)
+
+def test_put_should_evict_least_recently_used_entry():
+    cache = LegalMoveCache(max_entries=2)
+    cache.put((1, "white"), create_analysis())
+    cache.put((2, "black"), create_analysis())
+
+    cache.get((1, "white"))
+    cache.put((3, "white"), create_analysis())
+
+    assert cache.get((2, "black")) is None
+    assert cache.get((1, "white")) is not None
+    assert cache.stats().evictions == 1
+    assert cache.stats().entries == 2
+
+def test_put_should_respect_memory_cap():
+    entry_size = ENTRY_BASE_BYTES + MOVE_BYTES * 20
+    cache = LegalMoveCache(max_entries=100, max_bytes=entry_size * 3)
+
+    for key in range(5):
+        cache.put((key, "white"), create_analysis(20))
+
+    stats = cache.stats()
+    assert stats.entries == 3
+    assert stats.size_bytes == entry_size * 3
+    assert stats.evictions == 2
+
+def test_put_should_skip_entries_larger_than_memory_cap():
+    cache = LegalMoveCache(max_entries=100, max_bytes=ENTRY_BASE_BYTES)
+
+    cache.put((1, "white"), create_analysis(1))
+
+    assert cache.stats().entries == 0
+
+def test_get_or_compute_should_compute_only_once():
+    cache = LegalMoveCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return create_analysis(2)
+
+    first = cache.get_or_compute((1, "white"), compute)
+    second = cache.get_or_compute((1, "white"), compute)
+
+    assert first is second
+    assert len(calls) == 1
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+from services.lobby_directory import LobbyDirectory
+
+def sent(websocket):
+    return [json.loads(call.args[0]) for call in websocket.send_text.await_args_list]
+
+async def snapshot_of(*game_ids):
+    return json.dumps({"lobbies": [{"game_id": game_id, "players": []} for game_id in game_ids], "next_cursor": None})
+
+async def test_subscribe_should_send_snapshot_first():
+    directory = LobbyDirectory(coalesce_delay=0)
+    websocket = AsyncMock()
+
+    await directory.subscribe(websocket, lambda: snapshot_of("game-1"))
+    await directory.connections.drain()
+
+    assert sent(websocket) == [{"type": "lobby_snapshot", "seq": 0,
+                                "lobbies": [{"game_id": "game-1", "players": []}], "next_cursor": None}]
+    await directory.close()
+
+async def test_push_should_coalesce_changes_of_the_same_lobby():
+    directory = LobbyDirectory(coalesce_delay=0.01)
+    websocket = AsyncMock()
+    await directory.subscribe(websocket, snapshot_of)
+
+    directory.push({"event": "created", "game_id": "game-1", "players": [{"user_id": "1"}]})
+    directory.push({"event": "updated", "game_id": "game-1", "players": [{"user_id": "1"}, {"user_id": "2"}]})
+    directory.push({"event": "updated", "game_id": "game-2", "players": []})
+    directory.push({"event": "removed", "game_id": "game-2"})
+    await asyncio.sleep(0.05)
+    await directory.connections.drain()
+
+    batches = sent(websocket)[1:]
+    assert batches == [{"type": "lobby_events", "seq": 1, "events": [
+        {"event": "created", "game_id": "game-1", "players": [{"user_id": "1"}, {"user_id": "2"}]},
+        {"event": "removed", "game_id": "game-2"},
+    ]}]
+    assert directory.stats().coalesced_events == 2
+    assert directory.stats().batches == 1
+    await directory.close()
+
+async def test_push_without_connections_should_be_ignored():
+    directory = LobbyDirectory(coalesce_delay=0)
+
+    directory.push({"event": "created", "game_id": "game-1", "players": []})
+
+    assert directory.pending == {} and directory.flush_task is None
+
+async def test_batches_during_snapshot_should_follow_the_snapshot():
+    directory = LobbyDirectory(coalesce_delay=0)
+    listener = AsyncMock()
+    await directory.subscribe(listener, snapshot_of)
+    joining = AsyncMock()
+
+    async def slow_snapshot():
+        directory.push({"event": "created", "game_id": "game-2", "players": []})
+        directory.flush()
+        return await snapshot_of("game-1")
+
+    await directory.subscribe(joining, slow_snapshot)
+    await directory.connections.drain()
+
+    messages = sent(joining)
+    assert [message["type"] for message in messages] == ["lobby_snapshot", "lobby_events"]
+    assert messages[0]["seq"] == 0 and messages[1]["seq"] == 1
+    await directory.close()
@@ -4,6 +4,10 @@ from models.chess_game import ChessGame
 from models.user import UserInGame, PlayerColor
 from models.chess_board import ChessBoard
 from models.figure import FigureColor, Pawn, Rook, Bishop, King, Queen, Knight
+from models.bitboard_position import (
+    BitboardPosition, WHITE, BLACK, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, square_index
+)
+from services.chess_board_service import ChessBoardService
 
 @pytest.fixture
 def empty_board():
@@ -650,3 +654,341 @@ def test_is_valid_en_passant_should_return_false_for_invalid_en_passant(empty_bo
     }
 
     assert MoveValidationService.is_valid_en_passant(white_pawn, (4, 3), (5, 2), empty_board, test_game) is False
+
+def test_bitboard_position_from_chess_board_should_round_trip_start_position():
+    board = ChessBoardService().initialize_board()
+
+    position = BitboardPosition.from_chess_board(board, FigureColor.WHITE.value)
+
+    assert position.side_to_move == WHITE
+    assert position.castling_rights == WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+    assert position.en_passant is None
+    assert bin(position.occupied).count("1") == 32
+    assert position.king_square(WHITE) == square_index((7, 4))
+    assert position.king_square(BLACK) == square_index((0, 4))
+
+    round_trip = position.to_chess_board()
+    for row in range(8):
+        for col in range(8):
+            original, converted = board.squares[row][col], round_trip.squares[row][col]
+            assert (original is None) == (converted is None)
+            if original:
+                assert type(original) is type(converted)
+                assert original.color == converted.color
+                assert converted.position == (row, col)
+
+def test_bitboard_position_should_read_castling_rights_and_en_passant(empty_board):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[7][7] = Rook(color=FigureColor.WHITE, position=(7, 7), has_moved=True)
+    empty_board.squares[7][0] = Rook(color=FigureColor.WHITE, position=(7, 0))
+    empty_board.squares[0][4] = King(color=FigureColor.BLACK, position=(0, 4), has_moved=True)
+    empty_board.squares[0][0] = Rook(color=FigureColor.BLACK, position=(0, 0))
+    black_pawn = Pawn(color=FigureColor.BLACK, position=(3, 2))
+    empty_board.squares[3][2] = black_pawn
+
+    last_move = {"figure": black_pawn, "start": (1, 2), "end": (3, 2), "two_square_pawn_move": True}
+    position = BitboardPosition.from_chess_board(empty_board, FigureColor.WHITE.value, last_move)
+
+    assert position.castling_rights == WHITE_QUEENSIDE
+    assert position.en_passant == square_index((2, 2))
+    assert position.to_chess_board().squares[7][7].has_moved is True
+    assert position.to_chess_board().squares[7][0].has_moved is False
+
+def test_get_attackers_should_return_bitboard_of_all_attackers(empty_board):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[6][3] = Pawn(color=FigureColor.BLACK, position=(6, 3))
+    empty_board.squares[5][5] = Knight(color=FigureColor.BLACK, position=(5, 5))
+    empty_board.squares[2][4] = Rook(color=FigureColor.BLACK, position=(2, 4))
+    empty_board.squares[1][4] = Queen(color=FigureColor.BLACK, position=(1, 4))
+
+    position = BitboardPosition.from_chess_board(empty_board, FigureColor.WHITE.value)
+    attackers = MoveValidationService.get_attackers(position, square_index((7, 4)), BLACK)
+
+    assert attackers == (1 << square_index((6, 3))) | (1 << square_index((5, 5))) | (1 << square_index((2, 4)))
+    assert MoveValidationService.is_king_in_check_position(position) is True
+
+def test_is_king_in_check_position_should_raise_error_without_king(empty_board):
+    position = BitboardPosition.from_chess_board(empty_board, FigureColor.WHITE.value)
+
+    with pytest.raises(ValueError) as e:
+        MoveValidationService.is_king_in_check_position(position)
+
+    assert str(e.value) == "Kein König für den aktuellen Spieler gefunden!"
+
+def test_generate_legal_moves_should_return_twenty_moves_for_start_position():
+    game = ChessGame(
+        game_id="1234",
+        time_stamp_start="2021-08-01T12:00:00",
+        player_white=UserInGame(user_id="test_user1", username="test_user1", color=PlayerColor.WHITE.value),
+        player_black=UserInGame(user_id="test_user2", username="test_user2", color=PlayerColor.BLACK.value),
+        current_turn=FigureColor.WHITE.value,
+        board=ChessBoardService().initialize_board(),
+    )
+
+    legal_moves = MoveValidationService.generate_legal_moves(game)
+
+    assert len(legal_moves) == 20
+    assert ((6, 4), (4, 4)) in legal_moves
+    assert ((7, 1), (5, 2)) in legal_moves
+    assert ((7, 0), (6, 0)) not in legal_moves
+
+def test_generate_legal_moves_should_exclude_moves_leaving_king_in_check(empty_board, test_game):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[6][4] = Rook(color=FigureColor.WHITE, position=(6, 4))
+    empty_board.squares[0][4] = Rook(color=FigureColor.BLACK, position=(0, 4))
+
+    legal_moves = MoveValidationService.generate_legal_moves(test_game, empty_board)
+
+    assert ((6, 4), (6, 0)) not in legal_moves
+    assert ((6, 4), (0, 4)) in legal_moves
+    assert ((7, 4), (7, 3)) in legal_moves
+
+def test_generate_legal_moves_should_include_castling_en_passant_and_promotion(empty_board, test_game):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[7][7] = Rook(color=FigureColor.WHITE, position=(7, 7))
+    empty_board.squares[7][0] = Rook(color=FigureColor.WHITE, position=(7, 0))
+    empty_board.squares[0][2] = King(color=FigureColor.BLACK, position=(0, 2))
+    empty_board.squares[3][3] = Pawn(color=FigureColor.WHITE, position=(3, 3))
+    empty_board.squares[1][7] = Pawn(color=FigureColor.WHITE, position=(1, 7))
+    black_pawn = Pawn(color=FigureColor.BLACK, position=(3, 4))
+    empty_board.squares[3][4] = black_pawn
+    test_game.last_move = {"figure": black_pawn, "start": (1, 4), "end": (3, 4), "two_square_pawn_move": True}
+
+    legal_moves = MoveValidationService.generate_legal_moves(test_game, empty_board)
+
+    assert ((7, 4), (7, 6)) in legal_moves
+    assert ((7, 4), (7, 2)) in legal_moves
+    assert ((3, 3), (2, 4)) in legal_moves
+    assert legal_moves.count(((1, 7), (0, 7))) == 1
+
+    position = BitboardPosition.from_game(test_game, empty_board)
+    promotions = [move for move in MoveValidationService.generate_position_moves(position) if move[2] is not None]
+    assert len(promotions) == 4
+
+def test_make_move_and_unmake_move_should_restore_board_after_capture(empty_board):
+    white_rook = Rook(color=FigureColor.WHITE, position=(7, 0))
+    black_knight = Knight(color=FigureColor.BLACK, position=(2, 0))
+    empty_board.squares[7][0] = white_rook
+    empty_board.squares[2][0] = black_knight
+
+    undo = empty_board.make_move((7, 0), (2, 0))
+
+    assert empty_board.squares[2][0] is white_rook
+    assert empty_board.squares[7][0] is None
+    assert white_rook.position == (2, 0)
+    assert white_rook.has_moved is True
+    assert undo.captured is black_knight
+
+    empty_board.unmake_move(undo)
+
+    assert empty_board.squares[7][0] is white_rook
+    assert empty_board.squares[2][0] is black_knight
+    assert white_rook.position == (7, 0)
+    assert white_rook.has_moved is False
+
+def test_make_move_should_move_rook_when_castling_and_unmake_move_should_restore_it(empty_board):
+    white_king = King(color=FigureColor.WHITE, position=(7, 4))
+    white_rook = Rook(color=FigureColor.WHITE, position=(7, 7))
+    empty_board.squares[7][4] = white_king
+    empty_board.squares[7][7] = white_rook
+
+    undo = empty_board.make_move((7, 4), (7, 6))
+
+    assert empty_board.squares[7][6] is white_king
+    assert empty_board.squares[7][5] is white_rook
+    assert empty_board.squares[7][7] is None
+    assert white_rook.has_moved is True
+
+    empty_board.unmake_move(undo)
+
+    assert empty_board.squares[7][4] is white_king
+    assert empty_board.squares[7][7] is white_rook
+    assert empty_board.squares[7][5] is None
+    assert white_king.has_moved is False
+    assert white_rook.has_moved is False
+
+def test_make_move_should_remove_pawn_captured_en_passant(empty_board):
+    white_pawn = Pawn(color=FigureColor.WHITE, position=(3, 3))
+    black_pawn = Pawn(color=FigureColor.BLACK, position=(3, 4))
+    empty_board.squares[3][3] = white_pawn
+    empty_board.squares[3][4] = black_pawn
+
+    undo = empty_board.make_move((3, 3), (2, 4))
+
+    assert empty_board.squares[3][4] is None
+    assert undo.captured is black_pawn
+    assert undo.captured_position == (3, 4)
+
+    empty_board.unmake_move(undo)
+
+    assert empty_board.squares[3][4] is black_pawn
+    assert empty_board.squares[3][3] is white_pawn
+    assert empty_board.squares[2][4] is None
+
+def test_simulate_move_and_check_should_leave_board_unchanged(empty_board, test_game):
+    white_king = King(color=FigureColor.WHITE, position=(7, 4))
+    white_rook = Rook(color=FigureColor.WHITE, position=(6, 4))
+    black_rook = Rook(color=FigureColor.BLACK, position=(0, 4))
+    empty_board.squares[7][4] = white_king
+    empty_board.squares[6][4] = white_rook
+    empty_board.squares[0][4] = black_rook
+    squares_before = [row[:] for row in empty_board.squares]
+
+    assert MoveValidationService.simulate_move_and_check(test_game, empty_board, (6, 4), (6, 0)) is True
+
+    assert empty_board.squares == squares_before
+    assert white_rook.position == (6, 4)
+    assert white_rook.has_moved is False
+
+def test_bitboard_make_move_and_unmake_move_should_restore_position():
+    board = ChessBoardService().initialize_board()
+    position = BitboardPosition.from_chess_board(board, FigureColor.WHITE.value)
+    original = position.copy()
+
+    for move in MoveValidationService.generate_position_moves(position):
+        undo = position.make_move(move)
+        for reply in MoveValidationService.generate_position_moves(position):
+            reply_undo = position.make_move(reply)
+            position.unmake_move(reply, reply_undo)
+        position.unmake_move(move, undo)
+        assert position == original
+
+def test_bitboard_make_move_should_store_captured_piece_castling_rights_and_en_passant(empty_board):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[7][7] = Rook(color=FigureColor.WHITE, position=(7, 7))
+    empty_board.squares[0][7] = Rook(color=FigureColor.BLACK, position=(0, 7))
+    empty_board.squares[0][4] = King(color=FigureColor.BLACK, position=(0, 4))
+    position = BitboardPosition.from_chess_board(empty_board, FigureColor.WHITE.value)
+    move = (square_index((7, 7)), square_index((0, 7)), None)
+
+    undo = position.make_move(move)
+
+    assert undo.captured is not None
+    assert undo.captured_square == square_index((0, 7))
+    assert undo.castling_rights == WHITE_KINGSIDE | BLACK_KINGSIDE
+    assert position.castling_rights == 0
+
+    position.unmake_move(move, undo)
+
+    assert position.castling_rights == WHITE_KINGSIDE | BLACK_KINGSIDE
+    assert position.side_to_move == WHITE
+
+def test_get_king_position_should_use_tracked_king_positions(empty_board, test_game):
+    white_king = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[7][4] = white_king
+    test_game.board = empty_board
+    test_game.king_positions = {"white": (7, 4)}
+
+    assert MoveValidationService.get_king_position(test_game, empty_board, FigureColor.WHITE.value) == (7, 4)
+
+def test_get_king_position_should_rescan_and_update_stale_king_positions(empty_board, test_game):
+    empty_board.squares[6][5] = King(color=FigureColor.WHITE, position=(6, 5))
+    test_game.board = empty_board
+    test_game.king_positions = {"white": (7, 4)}
+
+    assert MoveValidationService.get_king_position(test_game, empty_board, FigureColor.WHITE.value) == (6, 5)
+    assert test_game.king_positions["white"] == (6, 5)
+
+def test_get_attack_map_should_be_cached_and_restored_by_unmake_move():
+    board = ChessBoardService().initialize_board()
+    position = BitboardPosition.from_chess_board(board, FigureColor.WHITE.value)
+
+    black_attacks = MoveValidationService.get_attack_map(position, BLACK)
+    assert position.attack_maps[BLACK] == black_attacks
+    assert black_attacks >> square_index((2, 0)) & 1
+    assert not black_attacks >> square_index((4, 0)) & 1
+
+    move = (square_index((6, 4)), square_index((4, 4)), None)
+    undo = position.make_move(move)
+    assert position.attack_maps == (None, None)
+
+    position.unmake_move(move, undo)
+    assert position.attack_maps[BLACK] == black_attacks
+
+def test_attack_maps_should_be_updated_incrementally_along_moves():
+    # Kiwipete: Rochaden, En passant, Schläge und Umwandlungen in zwei Halbzügen.
+    position = BitboardPosition.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -")
+    MoveValidationService.get_attack_map(position, WHITE)
+
+    for move in MoveValidationService.generate_position_moves(position):
+        undo = position.make_move(move)
+        for reply in MoveValidationService.generate_position_moves(position):
+            reply_undo = position.make_move(reply)
+            rebuilt = BitboardPosition(position.bitboards[:], position.side_to_move,
+                                       position.castling_rights, position.en_passant)
+            for color in (WHITE, BLACK):
+                assert MoveValidationService.get_attack_map(position, color) == \
+                    MoveValidationService.get_attack_map(rebuilt, color)
+            assert position.stale_squares == 0
+            position.unmake_move(reply, reply_undo)
+        position.unmake_move(move, undo)
+
+def test_update_attacks_from_should_only_recompute_affected_squares(mocker):
+    board = ChessBoardService().initialize_board()
+    position = BitboardPosition.from_chess_board(board, FigureColor.WHITE.value)
+    MoveValidationService.update_attacks_from(position)
+
+    position.make_move((square_index((6, 4)), square_index((4, 4)), None))
+    piece_attacks = mocker.spy(MoveValidationService, "piece_attacks")
+    MoveValidationService.update_attacks_from(position)
+
+    # Nur der Bauer auf e4 sowie Dame und Läufer, deren Linien über e2 laufen.
+    assert sorted(call.args[1] for call in piece_attacks.call_args_list) == \
+        sorted(square_index(square) for square in ((4, 4), (7, 3), (7, 5)))
+
+def test_is_king_in_check_position_should_use_attack_map(empty_board):
+    empty_board.squares[7][4] = King(color=FigureColor.WHITE, position=(7, 4))
+    empty_board.squares[3][0] = Bishop(color=FigureColor.BLACK, position=(3, 0))
+    position = BitboardPosition.from_chess_board(empty_board, FigureColor.WHITE.value)
+
+    assert MoveValidationService.is_king_in_check_position(position) is True
+    assert position.attack_maps[BLACK] is not None
+
+def test_bitboard_position_from_fen_should_match_chess_board_start_position():
+    board = ChessBoardService().initialize_board()
+    fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -"
+
+    assert BitboardPosition.from_fen(fen) == BitboardPosition.from_chess_board(board, FigureColor.WHITE.value)
+    assert BitboardPosition.from_fen(fen).to_fen() == fen
+
+def test_bitboard_position_from_fen_should_raise_error_for_invalid_fen():
+    with pytest.raises(ValueError) as e:
+        BitboardPosition.from_fen("rnbqkbnr/pppppppp/8/8 w KQkq -")
+
+    assert str(e.value) == "Ungültiger FEN-String: rnbqkbnr/pppppppp/8/8 w KQkq -"
+
+def test_evaluate_position_should_return_all_verdicts_for_start_position(test_game):
+    test_game.board = ChessBoardService().initialize_board()
+
+    evaluation = MoveValidationService.evaluate_position(test_game)
+
+    assert evaluation.legal_move_count == 20
+    assert evaluation.in_check is False
+    assert evaluation.attackers == ()
+    assert evaluation.checkmate is False
+    assert evaluation.stalemate is False
+
+def test_evaluate_position_should_detect_checkmate_with_attackers(empty_board, test_game):
+    empty_board.squares[7][7] = King(color=FigureColor.WHITE, position=(7, 7))
+    empty_board.squares[7][0] = Rook(color=FigureColor.BLACK, position=(7, 0))
+    empty_board.squares[6][0] = Rook(color=FigureColor.BLACK, position=(6, 0))
+    empty_board.squares[0][0] = King(color=FigureColor.BLACK, position=(0, 0))
+
+    evaluation = MoveValidationService.evaluate_position(test_game)
+
+    assert evaluation.in_check is True
+    assert evaluation.attackers == ((7, 0),)
+    assert evaluation.legal_move_count == 0
+    assert evaluation.checkmate is True
+    assert evaluation.stalemate is False
+
+def test_evaluate_position_should_detect_stalemate(empty_board, test_game):
+    empty_board.squares[0][0] = King(color=FigureColor.WHITE, position=(0, 0))
+    empty_board.squares[2][1] = Queen(color=FigureColor.BLACK, position=(2, 1))
+    empty_board.squares[7][7] = King(color=FigureColor.BLACK, position=(7, 7))
+
+    evaluation = MoveValidationService.evaluate_position(test_game)
+
+    assert evaluation.in_check is False
+    assert evaluation.stalemate is True
+    assert evaluation.checkmate is False
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+from services.pubsub_backplane import LocalBackplane, RedisBackplane, create_backplane
+from services.chess_game_service import ChessGameService
+from services.chess_board_service import ChessBoardService
+from models.chess_game import ChessGame, GameStatus
+from models.game_state import GameState
+from models.user import UserInGame, PlayerColor
+
+class FakeRedisBus:
+    """Minimaler Ersatz für den Redis-Server: verteilt publish an alle abonnierten PubSub-Objekte."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def client(self):
+        return FakeRedis(self)
+
+class FakeRedis:
+    def __init__(self, bus):
+        self.bus = bus
+
+    async def publish(self, channel, data):
+        receivers = [pubsub for pubsub in self.bus.subscribers if channel in pubsub.channels]
+        for pubsub in receivers:
+            pubsub.queue.put_nowait({"type": "message", "channel": channel.encode(), "data": data.encode()})
+        return len(receivers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self.bus)
+
+class FakePubSub:
+    def __init__(self, bus):
+        self.bus = bus
+        self.channels = set()
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+        self.bus.subscribers.append(self)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        self.bus.subscribers.remove(self)
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def start_worker(bus, channel="game"):
+    received = []
+    backplane = RedisBackplane(client=bus.client())
+    backplane.subscribe(channel, lambda key, text, remote: received.append((key, text, remote)))
+    await backplane.start()
+    return backplane, received
+
+async def test_local_backplane_should_deliver_to_all_handlers_of_channel():
+    backplane = LocalBackplane()
+    received = []
+    backplane.subscribe("game", lambda key, text, remote: 1 / 0)
+    backplane.subscribe("game", lambda key, text, remote: received.append((key, text, remote)))
+    backplane.subscribe("lobby", lambda key, text, remote: received.append(("lobby", text, remote)))
+
+    await backplane.publish("game", "1234", "zug")
+
+    assert received == [("1234", "zug", False)]
+    assert backplane.stats()["published"] == 1
+
+async def test_redis_backplane_should_fan_out_to_other_workers_once():
+    bus = FakeRedisBus()
+    worker_a, received_a = await start_worker(bus)
+    worker_b, received_b = await start_worker(bus)
+
+    await worker_a.publish("game", "1234", '{"type":"game_delta"}')
+    await settle()
+
+    assert received_a == [("1234", '{"type":"game_delta"}', False)]
+    assert received_b == [("1234", '{"type":"game_delta"}', True)]
+    assert worker_b.stats()["received"] == 1
+    await worker_a.stop()
+    await worker_b.stop()
+    assert bus.subscribers == []
+
+async def test_redis_backplane_should_keep_channels_apart():
+    bus = FakeRedisBus()
+    game_worker, game_received = await start_worker(bus, "game")
+    lobby_worker, lobby_received = await start_worker(bus, "lobby")
+    sender = RedisBackplane(client=bus.client())
+    sender.subscribe("lobby", lambda key, text, remote: None)
+    await sender.start()
+
+    await sender.publish("lobby", "1234", "refresh")
+    await settle()
+
+    assert game_received == []
+    assert lobby_received == [("1234", "refresh", True)]
+    for backplane in (game_worker, lobby_worker, sender):
+        await backplane.stop()
+
+async def test_redis_backplane_without_start_should_only_deliver_locally():
+    client = MagicMock()
+    client.publish = AsyncMock()
+    backplane = RedisBackplane(client=client)
+    received = []
+    backplane.subscribe("game", lambda key, text, remote: received.append(text))
+
+    await backplane.publish("game", "1234", "zug")
+
+    assert received == ["zug"]
+    client.publish.assert_not_awaited()
+
+async def test_redis_backplane_publish_failure_should_still_deliver_locally():
+    bus = FakeRedisBus()
+    backplane, received = await start_worker(bus)
+    backplane.client.publish = AsyncMock(side_effect=ConnectionError("Redis weg"))
+
+    await backplane.publish("game", "1234", "zug")
+
+    assert received == [("1234", "zug", False)]
+    assert backplane.stats()["publish_failures"] == 1
+    await backplane.stop()
+
+def test_decode_should_keep_newlines_in_text():
+    data = RedisBackplane.encode("origin", "1234", "zeile 1\nzeile 2")
+
+    assert RedisBackplane.decode(data.encode()) == ("origin", "1234", "zeile 1\nzeile 2")
+
+def test_create_backplane_should_reject_unknown_backend():
+    assert isinstance(create_backplane("local"), LocalBackplane)
+    assert isinstance(create_backplane("redis"), RedisBackplane)
+    with pytest.raises(ValueError, match="Unbekanntes PUBSUB_BACKEND"):
+        create_backplane("kafka")
+
+async def test_move_on_one_worker_should_reach_socket_on_other_worker():
+    bus = FakeRedisBus()
+    workers = []
+    for _ in range(2):
+        service = ChessGameService()
+        service.game_repo = MagicMock()
+        service.backplane = RedisBackplane(client=bus.client())
+        service.backplane.subscribe("game", service.deliver_game_message)
+        await service.backplane.start()
+        workers.append(service)
+    worker_a, worker_b = workers
+
+    game = GameState.from_chess_game(ChessGame(
+        game_id=str(uuid.uuid4()),
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    ))
+    worker_a.game_store.put(game)
+    worker_b.game_store.put(GameState.from_document(game.to_document()))
+    spectator = AsyncMock()
+    await worker_b.connect(spectator, game.game_id)
+
+    await worker_a.move_figure((6, 4), (4, 4), game.game_id, "1234")
+    await settle()
+    await worker_b.game_connections.drain(game.game_id)
+
+    delta = json.loads(spectator.send_text.await_args.args[0])
+    assert delta["type"] == "game_delta"
+    assert delta["seq"] == 1
+    # Geschrieben wird, bevor Worker B vom Zug erfährt.
+    assert worker_a.game_repo.insert_game.call_args[0][0]["seq"] == 1
+    # Worker B hält keinen veralteten Stand mehr und lädt beim nächsten Zugriff mindestens seq 1.
+    assert worker_b.game_store.get(game.game_id) is None
+    assert worker_b.game_store.expected_seq(game.game_id) == 1
+    for service in workers:
+        await service.backplane.stop()
+        await service.game_connections.close()
+
+async def test_load_game_should_wait_until_stored_game_reaches_remote_seq(mocker):
+    mocker.patch("services.chess_game_service.GAME_RELOAD_DELAY", 0)
+    service = ChessGameService()
+    service.game_repo = MagicMock()
+    stale_game = GameState.from_chess_game(ChessGame(
+        game_id=str(uuid.uuid4()),
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    ))
+    current_game = GameState.from_document({**stale_game.to_document(), "seq": 1})
+    service.game_repo.find_game_state.side_effect = [stale_game, current_game]
+
+    service.deliver_game_message(stale_game.game_id, '{"type":"game_delta","v":2,"seq":1}', remote=True)
+
+    assert await service.load_game(stale_game.game_id) is current_game
+    assert service.game_repo.find_game_state.call_count == 2
+
+async def test_load_game_should_fail_if_stored_game_stays_behind(mocker):
+    mocker.patch("services.chess_game_service.GAME_RELOAD_DELAY", 0)
+    service = ChessGameService()
+    service.game_repo = MagicMock()
+    service.game_repo.find_game_state.return_value = GameState.from_chess_game(ChessGame(
+        game_id="1234",
+        time_stamp_start="2024-03-06T12:00:00",
+        player_white=UserInGame(user_id="1234", username="Max", color=PlayerColor.WHITE.value),
+        player_black=UserInGame(user_id="5678", username="Anna", color=PlayerColor.BLACK.value),
+        current_turn="white",
+        board=ChessBoardService().initialize_board(),
+        status=GameStatus.RUNNING
+    ))
+    service.game_store.release("1234", seq=2)
+
+    with pytest.raises(ValueError, match="Spielstand wird gerade aktualisiert"):
+        await service.load_game("1234")
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock
 from services.user_service import UserService
+from services.auth_service import AuthService
 from models.user import UserCreate, UserResponse, UserDB
 import uuid
 
@@ -10,7 +11,7 @@ def user_service():
     service.user_repo = MagicMock()
     return service
 
-def test_create_user_should_return_created_username(user_service):
+async def test_create_user_should_return_created_username(user_service):
     user_data = UserCreate(username="testuser", password="securepassword")
 
     user_service.user_repo.find_user_by_username.return_value = None
@@ -18,22 +19,31 @@ def test_create_user_should_return_created_username(user_service):
     mock_created_user = UserResponse(user_id=str(uuid.uuid4()), username=user_data.username)
     user_service.user_repo.insert_user.return_value = mock_created_user
 
-    created_user = user_service.create_user(user_data)
+    created_user = await user_service.create_user(user_data)
 
     assert created_user.username == user_data.username
     assert isinstance(created_user.user_id, str)
     assert len(created_user.user_id) == 36
     
-def test_create_user_existing_should_return_none(user_service):
+async def test_create_user_existing_should_return_none(user_service):
     user_data = UserCreate(username="existinguser", password="securepassword")
     user_service.user_repo.find_user_by_username = MagicMock(return_value=UserDB(user_id=str(uuid.uuid4()), username=user_data.username, password_hash="hashedpassword"))
     
-    created_user = user_service.create_user(user_data)
+    created_user = await user_service.create_user(user_data)
     
     assert created_user is None
     user_service.user_repo.find_user_by_username.assert_called_once_with(user_data.username)
 
-def test_get_user_by_username_should_return_created_username_and_its_id(user_service):
+async def test_create_user_duplicate_on_insert_should_return_none(user_service):
+    user_data = UserCreate(username="testuser", password="securepassword")
+    user_service.user_repo.find_user_by_username.return_value = None
+    user_service.user_repo.insert_user.side_effect = ValueError("Username existiert bereits")
+
+    created_user = await user_service.create_user(user_data)
+
+    assert created_user is None
+
+async def test_get_user_by_username_should_return_created_username_and_its_id(user_service):
     username = "testuser"
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     password_hash = "hashed_password_value"
@@ -42,23 +52,23 @@ def test_get_user_by_username_should_return_created_username_and_its_id(user_ser
 
     user_service.user_repo.find_user_by_username = MagicMock(return_value=mock_user_db)
 
-    user = user_service.get_user_by_username(username)
+    user = await user_service.get_user_by_username(username)
     
     assert user.username == username
     assert isinstance(user.user_id, str)
     assert len(user.user_id) == 36
     assert user.user_id == user_id
 
-def test_get_user_by_username_not_found_should_return_none(user_service):
+async def test_get_user_by_username_not_found_should_return_none(user_service):
     username = "nonexistentuser"
     user_service.user_repo.find_user_by_username = MagicMock(return_value=None)
     
-    user = user_service.get_user_by_username(username)
+    user = await user_service.get_user_by_username(username)
     
     assert user is None
     user_service.user_repo.find_user_by_username.assert_called_once_with(username)
 
-def test_get_user_by_id_should_return_created_username_and_its_id(user_service):
+async def test_get_user_by_id_should_return_created_username_and_its_id(user_service):
     username = "testuser"
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     password_hash = "hashed_password_value"
@@ -67,23 +77,23 @@ def test_get_user_by_id_should_return_created_username_and_its_id(user_service):
 
     user_service.user_repo.find_user_by_id = MagicMock(return_value=mock_user_db)
 
-    user = user_service.get_user_by_id(user_id)
+    user = await user_service.get_user_by_id(user_id)
     
     assert user.username == username
     assert isinstance(user.user_id, str)
     assert len(user.user_id) == 36
     assert user.user_id == user_id
     
-def test_get_user_by_id_not_found_should_return_none(user_service):
+async def test_get_user_by_id_not_found_should_return_none(user_service):
     user_id = "nonexistentid"
     user_service.user_repo.find_user_by_id = MagicMock(return_value=None)
 
-    user = user_service.get_user_by_id(user_id)
+    user = await user_service.get_user_by_id(user_id)
     
     assert user is None
     user_service.user_repo.find_user_by_id.assert_called_once_with(user_id)
     
-def test_update_user_should_return_updated_username(user_service):
+async def test_update_user_should_return_updated_username(user_service):
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     new_username = "updateduser"
 
@@ -91,14 +101,14 @@ def test_update_user_should_return_updated_username(user_service):
 
     user_service.user_repo.update_user = MagicMock(return_value=mock_user)
 
-    updated_user = user_service.update_user(user_id, username=new_username)
+    updated_user = await user_service.update_user(user_id, username=new_username)
     
     assert updated_user.username == new_username
     assert isinstance(updated_user.user_id, str)
     assert len(updated_user.user_id) == 36
     assert updated_user.user_id == user_id
 
-def test_update_user_should_return_updated_password(user_service):
+async def test_update_user_should_return_updated_password(user_service):
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     new_password = "newsecurepassword"
 
@@ -106,36 +116,45 @@ def test_update_user_should_return_updated_password(user_service):
 
     user_service.user_repo.update_user = MagicMock(return_value=mock_user)
 
-    updated_user = user_service.update_user(user_id, password=new_password)
+    updated_user = await user_service.update_user(user_id, password=new_password)
 
     assert updated_user.username == mock_user.username
     assert isinstance(updated_user.user_id, str)
     assert len(updated_user.user_id) == 36
     assert updated_user.user_id == user_id
 
-def test_update_user_not_found_should_return_none(user_service):
+async def test_update_user_should_hash_plain_password_once(user_service):
+    user_id = "123e4567-e89b-12d3-a456-426614174000"
+    user_service.user_repo.update_user = MagicMock(return_value=UserResponse(user_id=user_id, username="testuser"))
+
+    await user_service.update_user(user_id, password="newsecurepassword")
+
+    password_hash = user_service.user_repo.update_user.call_args.args[1]["password_hash"]
+    assert AuthService.verify_password("newsecurepassword", password_hash)
+
+async def test_update_user_not_found_should_return_none(user_service):
     user_id = "nonexistentid"
     user_service.user_repo.update_user = MagicMock(return_value=None)
 
-    updated_user = user_service.update_user(user_id, username="updateduser")
+    updated_user = await user_service.update_user(user_id, username="updateduser")
     
     assert updated_user is None
     user_service.user_repo.update_user.assert_called_once_with(user_id, {"username": "updateduser"})
     
-def test_delete_user_should_return_true_when_user_is_deleted(user_service):
+async def test_delete_user_should_return_true_when_user_is_deleted(user_service):
     user_id = "123e4567-e89b-12d3-a456-426614174000"
     user_service.user_repo.delete_user = MagicMock(return_value=True)
 
-    result = user_service.delete_user(user_id)
+    result = await user_service.delete_user(user_id)
     
     assert result is True
     user_service.user_repo.delete_user.assert_called_once_with(user_id)
 
-def test_delete_user_should_return_false_when_user_is_not_found(user_service):
+async def test_delete_user_should_return_false_when_user_is_not_found(user_service):
     user_id = "nonexistentid"
     user_service.user_repo.delete_user = MagicMock(return_value=False)
 
-    result = user_service.delete_user(user_id)
+    result = await user_service.delete_user(user_id)
     
     assert result is False
     user_service.user_repo.delete_user.assert_called_once_with(user_id)
\ No newline at end of file
@@ -0,0 +1,67 @@
+from services.zobrist_service import ZobristService
+from services.chess_board_service import ChessBoardService
+from models.bitboard_position import BitboardPosition, square_index
+from models.figure import FigureColor, Pawn, Queen
+from models.chess_board import ChessBoard
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+def test_hash_position_should_match_for_chess_board_and_fen():
+    board = ChessBoardService().initialize_board()
+
+    from_board = ZobristService.hash_position(BitboardPosition.from_chess_board(board, FigureColor.WHITE))
+    from_fen = ZobristService.hash_position(BitboardPosition.from_fen(START_FEN))
+
+    assert from_board == from_fen
+
+def test_hash_position_should_depend_on_side_to_move_and_castling_rights():
+    white_to_move = ZobristService.hash_position(BitboardPosition.from_fen(START_FEN))
+    black_to_move = ZobristService.hash_position(BitboardPosition.from_fen(START_FEN.replace(" w ", " b ")))
+    no_castling = ZobristService.hash_position(BitboardPosition.from_fen(START_FEN.replace("KQkq", "-")))
+
+    assert len({white_to_move, black_to_move, no_castling}) == 3
+
+def test_hash_position_should_only_count_en_passant_square_if_capture_is_possible():
+    without_capture = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq {} 0 1"
+    assert ZobristService.hash_position(BitboardPosition.from_fen(without_capture.format("e3"))) == \
+        ZobristService.hash_position(BitboardPosition.from_fen(without_capture.format("-")))
+
+    with_capture = "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq {} 0 1"
+    assert ZobristService.hash_position(BitboardPosition.from_fen(with_capture.format("e3"))) != \
+        ZobristService.hash_position(BitboardPosition.from_fen(with_capture.format("-")))
+
+def test_hash_position_should_be_equal_for_transpositions():
+    moves = {
+        "g1f3": (square_index((7, 6)), square_index((5, 5)), None),
+        "b1c3": (square_index((7, 1)), square_index((5, 2)), None),
+        "g8f6": (square_index((0, 6)), square_index((2, 5)), None),
+    }
+    first = BitboardPosition.from_fen(START_FEN)
+    second = BitboardPosition.from_fen(START_FEN)
+
+    for name in ("g1f3", "g8f6", "b1c3"):
+        first.make_move(moves[name])
+    for name in ("b1c3", "g8f6", "g1f3"):
+        second.make_move(moves[name])
+
+    assert ZobristService.hash_position(first) == ZobristService.hash_position(second)
+
+def test_update_for_move_and_promotion_should_match_full_hash():
+    board = ChessBoard.create_empty_board()
+    pawn = Pawn(color=FigureColor.WHITE, position=(1, 0))
+    board.squares[1][0] = pawn
+
+    before = ZobristService.hash_position(BitboardPosition.from_chess_board(board))
+    undo = board.make_move((1, 0), (0, 0))
+    queen = Queen(color=FigureColor.WHITE, position=(0, 0), id=pawn.id)
+    board.squares[0][0] = queen
+
+    updated = ZobristService.update_for_promotion(ZobristService.update_for_move(before, undo), pawn, queen, (0, 0))
+
+    assert updated == ZobristService.hash_position(BitboardPosition.from_chess_board(board))
+
+def test_format_hash_should_round_trip():
+    value = ZobristService.hash_position(BitboardPosition.from_fen(START_FEN))
+
+    assert len(ZobristService.format_hash(value)) == 16
+    assert ZobristService.parse_hash(ZobristService.format_hash(value)) == value
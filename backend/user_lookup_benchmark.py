@@ -0,0 +1,106 @@
+import sys
+import os
+import argparse
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+from typing import Iterator, List, NamedTuple, Optional
+from database import mongodb
+from database.indexes import USER_INDEXES
+
+
+class LatencySummary(NamedTuple):
+    samples: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def latency_summary(seconds: List[float]) -> LatencySummary:
+    ordered = sorted(seconds)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return LatencySummary(len(ordered), sum(ordered) / len(ordered) * 1000,
+                          percentile(0.50), percentile(0.95), percentile(0.99))
+
+
+def generate_users(start: int, count: int) -> Iterator[dict]:
+    # Gleiche Form wie UserRepository.insert_user, der Hash ist nur ein Platzhalter.
+    for number in range(start, start + count):
+        yield {"_id": f"benchmark-{number}", "username": f"user{number:07d}", "password_hash": "x" * 60}
+
+
+def winning_stage(plan: dict) -> str:
+    """Sucht im Ausführungsplan die Zugriffsart (IXSCAN oder COLLSCAN)."""
+    stage = plan.get("stage", "")
+    if stage in ("IXSCAN", "COLLSCAN", "IDHACK", "EXPRESS_IXSCAN"):
+        return stage
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            child_stage = winning_stage(child)
+            if child_stage:
+                return child_stage
+    return stage
+
+
+def measure_lookups(collection, total_users: int, samples: int) -> LatencySummary:
+    seconds = []
+    for _ in range(samples):
+        username = f"user{random.randrange(total_users):07d}"
+        start = time.perf_counter()
+        collection.find_one({"username": username})
+        seconds.append(time.perf_counter() - start)
+    return latency_summary(seconds)
+
+
+def print_summary(label: str, summary: LatencySummary, stage: str):
+    print(f"{label:<12} {stage:<9} n={summary.samples:<5} mean={summary.mean_ms:.2f}ms "
+          f"p50={summary.p50_ms:.2f}ms p95={summary.p95_ms:.2f}ms p99={summary.p99_ms:.2f}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latenz der Benutzersuche nach username, ohne und mit Index.")
+    parser.add_argument("--users", type=int, default=1_000_000, help="Anzahl erzeugter Benutzer")
+    parser.add_argument("--samples", type=int, default=1000, help="Suchen mit Index")
+    parser.add_argument("--scan-samples", type=int, default=20, help="Suchen ohne Index (Collection-Scan)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Benutzer pro insert_many")
+    parser.add_argument("--keep", action="store_true", help="Benchmark-Collection danach nicht löschen")
+    args = parser.parse_args(argv)
+
+    # Die Verbindungseinstellungen werden erst beim ersten Zugriff gelesen, also nach load_dotenv.
+    load_dotenv()
+    collection = mongodb.get_database()["users_benchmark"]
+    collection.drop()
+
+    start = time.perf_counter()
+    for batch_start in range(0, args.users, args.batch_size):
+        collection.insert_many(list(generate_users(batch_start, min(args.batch_size, args.users - batch_start))),
+                               ordered=False)
+    print(f"{args.users} Benutzer in {time.perf_counter() - start:.1f}s angelegt.")
+
+    query = {"username": f"user{args.users // 2:07d}"}
+    scan = measure_lookups(collection, args.users, args.scan_samples)
+    print_summary("ohne Index", scan, winning_stage(collection.find(query).explain()["queryPlanner"]["winningPlan"]))
+
+    start = time.perf_counter()
+    collection.create_indexes(USER_INDEXES)
+    print(f"Index in {time.perf_counter() - start:.1f}s angelegt.")
+
+    indexed = measure_lookups(collection, args.users, args.samples)
+    print_summary("mit Index", indexed, winning_stage(collection.find(query).explain()["queryPlanner"]["winningPlan"]))
+    print(f"p50 {scan.p50_ms / indexed.p50_ms:.0f}x schneller")
+
+    if not args.keep:
+        collection.drop()
+    mongodb.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,12 +10,18 @@ interface ChessBoardProps {
 
 const ChessBoard: React.FC<ChessBoardProps> = ({ board }) => {
   const [selectedSquare, setSelectedSquare] = useState<[number, number] | null>(null);
-  const { gameState, makeMove } = useGame();
+  const { gameState, legalMoves, makeMove } = useGame();
   const { user } = useUser();
   
   const files = ["a", "b", "c", "d", "e", "f", "g", "h"];
   const ranks = ["8", "7", "6", "5", "4", "3", "2", "1"];
 
+  const legalTargets = new Set(
+    legalMoves
+      .filter((move) => selectedSquare && move.start[0] === selectedSquare[0] && move.start[1] === selectedSquare[1])
+      .map((move) => `${move.end[0]}-${move.end[1]}`)
+  );
+
   const handleSquareClick = (row: number, col: number) => {
     if (!gameState || !gameState.game_id || !user?.user_id) {
       return;
@@ -60,7 +66,7 @@ const ChessBoard: React.FC<ChessBoardProps> = ({ board }) => {
             row.map((figure, colIndex) => (
               <div
                 key={`${rowIndex}-${colIndex}`}
-                className={`square ${selectedSquare?.[0] === rowIndex && selectedSquare?.[1] === colIndex ? "selected" : ""} ${((rowIndex + colIndex) % 2 === 0 ? "light" : "dark")}`}
+                className={`square ${selectedSquare?.[0] === rowIndex && selectedSquare?.[1] === colIndex ? "selected" : ""} ${legalTargets.has(`${rowIndex}-${colIndex}`) ? "legal-target" : ""} ${((rowIndex + colIndex) % 2 === 0 ? "light" : "dark")}`}
                 onClick={() => handleSquareClick(rowIndex, colIndex)}
               >
                 {figure ? <img src={`/assets/${figure.color}_${figure.name}.png`} alt={figure.name} /> : ""}
@@ -1,8 +1,37 @@
-import React, { createContext, useContext, useEffect, useState } from "react";
-import { ChessGame } from "../../models/ChessGame";
+import React, { createContext, useContext, useEffect, useRef, useState } from "react";
+import axios from "axios";
+import { ChessGame, GameDelta, LegalMove } from "../../models/ChessGame";
+
+interface PlayerState {
+    move_history: string[];
+    captured_figures: unknown[];
+}
+
+// Stand, wie ihn das Backend schickt (snake_case), die Spieler werden vom Delta fortgeschrieben.
+type GameStateData = ChessGame & { player_white: PlayerState; player_black: PlayerState };
+
+const applyGameDelta = (game: GameStateData, delta: GameDelta): GameStateData => {
+    const squares = game.board.squares.map((row) => [...row]);
+    for (const { position, figure } of delta.squares) {
+        squares[position[0]][position[1]] = figure;
+    }
+
+    const updated: GameStateData = { ...game, ...delta.changes, board: { ...game.board, squares } };
+    if (delta.move) {
+        const mover = delta.move.color === "white" ? "player_white" : "player_black";
+        const player = game[mover];
+        updated[mover] = {
+            ...player,
+            move_history: [...player.move_history, delta.move.notation],
+            captured_figures: delta.move.captured ? [...player.captured_figures, delta.move.captured] : player.captured_figures,
+        };
+    }
+    return updated;
+};
 
 interface GameContextType {
     gameState: ChessGame | null;
+    legalMoves: LegalMove[];
     connectGameWebSocket: (gameId: string) => void;
     makeMove: (gameId: string, userId: string, start: [number, number], end: [number, number]) => void;
 }
@@ -13,6 +42,9 @@ export const GameProvider: React.FC<{ children: React.ReactNode }> = ({ children
     const BACKEND_URL = import.meta.env.VITE_BACKEND_URL;
     const [gameState, setGameState] = useState<ChessGame | null>(null);
     const [gameSocket, setGameSocket] = useState<WebSocket | null>(null);
+    const [legalMoves, setLegalMoves] = useState<LegalMove[]>([]);
+    // Sequenznummer des zuletzt angewendeten Stands, null bis der erste Snapshot da ist.
+    const lastSeq = useRef<number | null>(null);
 
     const connectGameWebSocket = (gameId: string) => {
         const gameWebSocket = new WebSocket(`${BACKEND_URL.replace("http", "ws")}/game/ws/${gameId}`);
@@ -24,7 +56,20 @@ export const GameProvider: React.FC<{ children: React.ReactNode }> = ({ children
             console.log("Nachricht erhalten:", event.data);
             const data = JSON.parse(event.data);
             if (data.type === "game_state") {
+                lastSeq.current = data.seq ?? null;
                 setGameState(data.data);
+            } else if (data.type === "game_delta") {
+                if (lastSeq.current === null || data.seq <= lastSeq.current) {
+                    return;
+                }
+                if (data.seq !== lastSeq.current + 1) {
+                    // Lücke: Deltas dazwischen fehlen, den vollständigen Stand neu anfordern.
+                    lastSeq.current = null;
+                    gameWebSocket.send(JSON.stringify({ action: "sync" }));
+                    return;
+                }
+                lastSeq.current = data.seq;
+                setGameState((game) => game ? applyGameDelta(game as GameStateData, data) : game);
             }
         };
 
@@ -46,11 +91,25 @@ export const GameProvider: React.FC<{ children: React.ReactNode }> = ({ children
         }
     };
 
+    useEffect(() => {
+        if (!gameState?.game_id) {
+            setLegalMoves([]);
+            return;
+        }
+
+        axios.get(`${BACKEND_URL}/game/legal_moves/${gameState.game_id}`)
+            .then((response) => setLegalMoves(response.data.legal_moves))
+            .catch((error) => {
+                console.error("Fehler beim Laden der legalen Züge:", error);
+                setLegalMoves([]);
+            });
+    }, [gameState]);
+
     useEffect(() => {
         return () => gameSocket?.close();
     }, []);
 
-    return <GameContext.Provider value={{ gameState, connectGameWebSocket, makeMove }}>
+    return <GameContext.Provider value={{ gameState, legalMoves, connectGameWebSocket, makeMove }}>
         {children}
     </GameContext.Provider>;
 };
@@ -2,7 +2,7 @@ import axios from 'axios';
 import { useCallback, useEffect, useState } from 'react';
 import secureLocalStorage from "react-secure-storage";
 import { useNavigate } from 'react-router-dom';
-import { Lobby } from '../../models/Lobby';
+import { Lobby, LobbyDirectoryMessage } from '../../models/Lobby';
 import { ChessGame } from '../../models/ChessGame';
 import { useGame } from './GameHooks';
 
@@ -66,6 +66,43 @@ export default function LobbyHooks(
         }
     };
     
+    // Alle Lobbys per Push statt Polling: Snapshot beim Verbinden, danach nur die Änderungen.
+    const connectLobbyDirectory = useCallback((): WebSocket => {
+        const lobbies = new Map<string, Lobby>();
+        // null bis zum ersten Snapshot und nach einer Lücke, bis der neue Snapshot da ist.
+        let lastSeq: number | null = null;
+        const directorySocket = new WebSocket(`${BACKEND_URL.replace("http", "ws")}/lobby/directory/ws`);
+
+        directorySocket.onmessage = (event) => {
+            const data: LobbyDirectoryMessage = JSON.parse(event.data);
+
+            if (data.type === "lobby_snapshot") {
+                lobbies.clear();
+                data.lobbies.forEach(lobby => lobbies.set(lobby.game_id, lobby));
+                lastSeq = data.seq;
+            } else if (data.type === "lobby_events") {
+                if (lastSeq === null || data.seq <= lastSeq) return;
+                if (data.seq !== lastSeq + 1) {
+                    lastSeq = null;
+                    directorySocket.send(JSON.stringify({ action: "sync" }));
+                    return;
+                }
+                for (const change of data.events) {
+                    if (change.event === "removed") {
+                        lobbies.delete(change.game_id);
+                    } else {
+                        lobbies.set(change.game_id, { game_id: change.game_id, players: change.players ?? [] });
+                    }
+                }
+                lastSeq = data.seq;
+            }
+            updateLobbies(Array.from(lobbies.values()));
+        };
+
+        directorySocket.onclose = () => console.log("Lobby-Verzeichnis WebSocket geschlossen.");
+        return directorySocket;
+    }, [BACKEND_URL, updateLobbies]);
+
     const listLobbies = useCallback(async (): Promise<Lobby[]> => {
         try {
             const response = await axios.get(`${BACKEND_URL}/lobby/list`);
@@ -139,6 +176,6 @@ export default function LobbyHooks(
         };
     }, []);
 
-    return { createLobby, listLobbies, joinLobby, leaveLobby, setPlayerColor, setPlayerStatus, startGame, connectLobbyWebSocket };
+    return { createLobby, listLobbies, connectLobbyDirectory, joinLobby, leaveLobby, setPlayerColor, setPlayerStatus, startGame, connectLobbyWebSocket };
     
 }
@@ -16,6 +16,11 @@ export enum GameStatus {
     twoSquarePawnMove: boolean;
 }
 
+export interface LegalMove {
+    start: [number, number];
+    end: [number, number];
+}
+
 export interface ChessGame {
     game_id: string;
     timeStampStart: string;
@@ -25,4 +30,20 @@ export interface ChessGame {
     board: ChessBoard;
     status: GameStatus;
     lastMove?: MoveData;
-  }
\ No newline at end of file
+  }
+export interface GameDelta {
+    type: "game_delta";
+    v: number;
+    seq: number;
+    game_id: string;
+    move: {
+        start: [number, number];
+        end: [number, number];
+        color: PlayerColor;
+        notation: string;
+        captured: Figure | null;
+        promotion: string | null;
+    } | null;
+    squares: { position: [number, number]; figure: Figure | null }[];
+    changes: Record<string, unknown>;
+}
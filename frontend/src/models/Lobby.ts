@@ -3,4 +3,14 @@ import { User } from './User';
 export type Lobby = {
     game_id: string;
     players: User[];
-    };
\ No newline at end of file
+    };
+// Nachrichten von /lobby/directory/ws: Snapshot beim Verbinden, danach gebündelte Änderungen.
+export type LobbyDirectoryEvent = {
+    event: "created" | "updated" | "removed";
+    game_id: string;
+    players?: User[];
+};
+
+export type LobbyDirectoryMessage =
+    | { type: "lobby_snapshot"; seq: number; lobbies: Lobby[]; next_cursor: string | null }
+    | { type: "lobby_events"; seq: number; events: LobbyDirectoryEvent[] };
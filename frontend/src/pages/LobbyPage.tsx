@@ -6,7 +6,7 @@ import { useUser } from "../components/hooks/UserHooks";
 
 export default function LobbyPage() {
     const [lobbies, setLobbies] = useState<Lobby[]>([]);
-    const { listLobbies, createLobby, joinLobby, leaveLobby, setPlayerColor, setPlayerStatus, startGame } = LobbyHooks(setLobbies, () => { });
+    const { listLobbies, connectLobbyDirectory, createLobby, joinLobby, leaveLobby, setPlayerColor, setPlayerStatus, startGame } = LobbyHooks(setLobbies, () => { });
     const { user } = useUser();
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
@@ -28,7 +28,9 @@ export default function LobbyPage() {
     }, [listLobbies]);
 
     useEffect(() => {
-    }, [lobbies]);
+        const directorySocket = connectLobbyDirectory();
+        return () => directorySocket.close();
+    }, [connectLobbyDirectory]);
 
     const handleCreateLobby = async () => {
         if (!user?.user_id || !user?.username) {